@@ -4,10 +4,15 @@ FastAPI server for Wine Store RAG Chatbot
 Provides API endpoints for Next.js integration
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from typing import Optional
 import sys
+import threading
+import time
 from pathlib import Path
 import logging
 
@@ -17,6 +22,10 @@ sys.path.append(str(current_dir))
 sys.path.append(str(current_dir / "llm_scripts"))
 
 from llm_scripts.rag_system import WineRAGSystem
+from llm_scripts.qdrant_connection import close_qdrant_clients, describe_qdrant_client
+from llm_scripts.conversation import SessionStore
+from llm_scripts import metrics
+from llm_scripts.metrics import PrometheusMetrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -41,15 +50,47 @@ app.add_middleware(
 # Initialize RAG system
 rag_system = WineRAGSystem()
 
+# Conversation sessions for multi-turn chat
+sessions = SessionStore()
+
+# Prometheus metrics: stage latencies and counters from the RAG pipeline,
+# gauges read at scrape time
+prometheus_metrics = PrometheusMetrics()
+prometheus_metrics.add_gauge("llm_running", "Generations running",
+                             lambda: rag_system.scheduler.stats()['running'])
+prometheus_metrics.add_gauge("llm_queue_depth", "Generations waiting for a slot",
+                             lambda: rag_system.scheduler.stats()['queue_depth'])
+prometheus_metrics.add_gauge("active_conversations", "Conversations held in memory", lambda: len(sessions))
+metrics.add_hook(prometheus_metrics)
+
+@app.on_event("startup")
+async def warm_up_model():
+    """Load the generation model in the background (low priority)"""
+    threading.Thread(target=rag_system.warm_up, name="llm-warm-up", daemon=True).start()
+
+@app.on_event("shutdown")
+async def close_connections():
+    """Release pooled Qdrant connections, the session database and the embedding batcher"""
+    close_qdrant_clients()
+    sessions.close()
+    if rag_system.query_batcher:
+        rag_system.query_batcher.close()
+
 # Pydantic models for request/response
 class ChatRequest(BaseModel):
     message: str
     limit: int = 3
+    conversation_id: Optional[str] = None
+    timeout: Optional[float] = None  # seconds to wait for the LLM before a busy answer
+    debug: bool = False  # return the request's trace
 
 class ChatResponse(BaseModel):
     response: str
     relevant_documents: list
     query: str
+    answer_path: str = "llm"
+    conversation_id: Optional[str] = None
+    trace: Optional[dict] = None
 
 class EmailProcessRequest(BaseModel):
     max_emails: int = 10
@@ -69,41 +110,76 @@ async def root():
     return {
         "message": "Wine Store RAG API is running",
         "status": "healthy",
-        "model": rag_system.model_name
+        "model": rag_system.model_name,
+        "embeddings": rag_system.embedder_info
     }
 
 # Chat endpoint
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, response: Response, debug: bool = False):
     """
     Main chat endpoint for customer support
+    
+    Answers 503 with a busy message (and Retry-After) when the LLM cannot
+    start the generation within the request's timeout. With debug=true (query
+    parameter or body field) the response includes the request's trace: a
+    span per stage with Qdrant candidate counts, prompt size and Ollama timings.
     """
+    metrics.count('requests', endpoint='chat')
     try:
         logger.info(f"Chat request: {request.message[:50]}...")
+        timeout = request.timeout if request.timeout is not None else rag_system.scheduler.queue_timeout
+        deadline = time.monotonic() + timeout
         
-        # Use RAG system to generate response
-        result = rag_system.query(request.message, limit=request.limit)
+        def answer():
+            # Continue the conversation (a new one when no id is given); its
+            # other messages wait so no turn is lost
+            with sessions.turn(request.conversation_id) as session:
+                return session, rag_system.query(request.message, limit=request.limit, session=session,
+                                                 deadline=deadline, trace=debug or request.debug)
+        
+        # Use RAG system to generate response (in a worker thread, so
+        # concurrent identical requests can be coalesced)
+        session, result = await run_in_threadpool(answer)
+        
+        if result.get('answer_path') == "busy":
+            response.status_code = 503
+            response.headers["Retry-After"] = str(int(result.get('retry_after', 1)))
         
         return ChatResponse(
             response=result['response'],
             relevant_documents=result['relevant_documents'],
-            query=result['query']
+            query=result['query'],
+            answer_path=result.get('answer_path', "llm"),
+            conversation_id=session.conversation_id,
+            trace=result.get('trace')
         )
         
     except Exception as e:
+        metrics.count('errors', stage='chat')
         logger.error(f"Chat error: {e}")
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
+# End a conversation
+@app.delete("/api/chat/{conversation_id}")
+async def end_conversation(conversation_id: str):
+    """
+    Forget a conversation's history
+    """
+    sessions.delete(conversation_id)
+    return {"conversation_id": conversation_id, "deleted": True}
+
 # Search endpoint
 @app.post("/api/search", response_model=SearchResponse)
 async def search(request: SearchRequest):
     """
     Search the knowledge base for relevant documents
     """
+    metrics.count('requests', endpoint='search')
     try:
         logger.info(f"Search request: {request.query}")
         
-        results = rag_system.search(request.query, limit=request.limit)
+        results = await run_in_threadpool(rag_system.search, request.query, limit=request.limit)
         
         return SearchResponse(
             results=results,
@@ -170,8 +246,11 @@ async def get_status():
         return {
             "status": "healthy",
             "model": rag_system.model_name,
+            "embeddings": rag_system.embedder_info,
             "knowledge_base_documents": len(test_results),
             "vector_database": "connected",
+            "qdrant": describe_qdrant_client(rag_system.client),
+            "active_conversations": len(sessions),
             "rag_system": "active"
         }
         
@@ -182,6 +261,29 @@ async def get_status():
             "error": str(e)
         }
 
+# Serving metrics
+@app.get("/api/metrics")
+async def get_metrics():
+    """
+    Request coalescing, query-embedding batching and generation scheduling statistics
+    """
+    return {
+        "generation": rag_system.scheduler.stats(),
+        "coalescing": {
+            "query": rag_system.query_flight.stats(),
+            "search": rag_system.search_flight.stats()
+        },
+        "query_embedding": rag_system.query_batcher.stats() if rag_system.query_batcher else None
+    }
+
+# Prometheus scrape endpoint
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_scrape():
+    """
+    Per-stage latency histograms, counters and gauges in the Prometheus text format
+    """
+    return PlainTextResponse(prometheus_metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Get conversation suggestions
 @app.get("/api/suggestions")
 async def get_suggestions():
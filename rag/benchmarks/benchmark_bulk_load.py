@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Bulk-load benchmark
+Compares loading a collection with one upsert of every point into an indexed
+collection (the previous ingestion path) against the bulk-load path used by
+rebuilds: no HNSW graph while loading, parallel batched upload_collection,
+then one index build. Both are timed until the collection is fully indexed.
+
+Uses synthetic vectors, so only Qdrant is measured. Indexing settings and
+parallel uploads only take effect on a Qdrant server:
+
+    ./qdrant &   # or docker run -p 6333:6333 -p 6334:6334 qdrant/qdrant
+    python benchmarks/benchmark_bulk_load.py --url http://localhost:6333
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+parent_dir = Path(__file__).parent.parent
+sys.path.append(str(parent_dir))
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+from llm_scripts.collection_profiles import COLLECTION_PROFILES, get_collection_profile
+from llm_scripts.collection_versions import wait_until_indexed
+from llm_scripts.qdrant_connection import create_qdrant_client
+
+
+def synthetic_points(count: int, dimension: int):
+    """Normalised random vectors with chunk-sized payloads"""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(count, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    payloads = [{'content': f"chunk {i} " + "lorem ipsum " * 60, 'metadata': {'type': 'synthetic', 'i': i}}
+                for i in range(count)]
+    return vectors, payloads
+
+
+def load_single_upsert(client, name, profile, vectors, payloads):
+    client.create_collection(collection_name=name, **profile.collection_config(vectors.shape[1]))
+    client.upsert(collection_name=name, points=[
+        PointStruct(id=i + 1, vector=vector, payload=payload)
+        for i, (vector, payload) in enumerate(zip(vectors.tolist(), payloads))
+    ])
+
+
+def load_bulk(client, name, profile, vectors, payloads, batch_size, workers):
+    client.create_collection(collection_name=name, **profile.collection_config(vectors.shape[1], bulk_load=True))
+    client.upload_collection(collection_name=name, vectors=vectors, payload=payloads, ids=range(1, len(payloads) + 1),
+                             batch_size=batch_size, parallel=workers, wait=True)
+    client.update_collection(collection_name=name, **profile.indexing_config())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk loading of a collection")
+    parser.add_argument("--url", default=None, help="Qdrant server URL (default: in-memory local mode)")
+    parser.add_argument("--points", type=int, default=50000, help="Points to load")
+    parser.add_argument("--dim", type=int, default=768, help="Vector dimension")
+    parser.add_argument("--profile", default="default", choices=list(COLLECTION_PROFILES), help="Collection profile")
+    parser.add_argument("--batch-size", type=int, default=256, help="Points per upload request")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel upload processes")
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    client = create_qdrant_client(url=args.url) if args.url else QdrantClient(":memory:")
+    if not args.url:
+        print("⚠️  Local mode has no HNSW index or parallel upload; use --url for meaningful numbers")
+
+    profile = get_collection_profile(args.profile)
+    vectors, payloads = synthetic_points(args.points, args.dim)
+    print(f"📦 Loading {args.points} x {args.dim}-dim points with profile {profile.name}")
+
+    results = {}
+    for mode in ("single_upsert", "bulk"):
+        name = f"benchmark_load_{mode}"
+        if client.collection_exists(name):
+            client.delete_collection(name)
+
+        start = time.perf_counter()
+        if mode == "bulk":
+            load_bulk(client, name, profile, vectors, payloads, args.batch_size, args.workers)
+        else:
+            load_single_upsert(client, name, profile, vectors, payloads)
+        loaded = time.perf_counter() - start
+        wait_until_indexed(client, name, timeout=3600)
+        total = time.perf_counter() - start
+
+        results[mode] = {
+            'load_seconds': loaded,
+            'total_seconds': total,
+            'points_per_second': args.points / total,
+        }
+        print(f"  {mode:14s} load {loaded:7.1f}s  indexed after {total:7.1f}s  {args.points / total:9.0f} points/s")
+        client.delete_collection(name)
+
+    print(f"\n🚀 Bulk load: {results['single_upsert']['total_seconds'] / results['bulk']['total_seconds']:.1f}x faster")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
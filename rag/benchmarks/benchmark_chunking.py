@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Chunking throughput benchmark
+Compares the previous per-document split_documents loop with the fast chunker
+(in-process and across worker processes)
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+parent_dir = Path(__file__).parent.parent
+sys.path.append(str(parent_dir))
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.schema import Document
+
+from llm_scripts.chunking import chunk_documents
+
+
+def build_corpus(copies: int):
+    """Email-sized and page-sized documents built from the bundled sample data"""
+    documents = []
+    for path in sorted((parent_dir / "data").glob("*.json")):
+        with open(path) as f:
+            records = json.load(f)
+        for record in records:
+            text = json.dumps(record, indent=2)
+            for copy in range(copies):
+                documents.append({
+                    'id': f"{path.stem}_{len(documents)}",
+                    'content': text * (1 + copy % 4),
+                    'metadata': {'type': 'email', 'source_file': path.name}
+                })
+    return documents
+
+
+def langchain_chunk(documents):
+    """The chunking loop WineRAGSystem used before the fast chunker"""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, length_function=len)
+    chunked_docs = []
+    for doc in documents:
+        chunks = splitter.split_documents([Document(page_content=doc['content'], metadata=doc['metadata'])])
+        for i, chunk in enumerate(chunks):
+            chunk.metadata['chunk_id'] = f"{doc['id']}_chunk_{i}"
+            chunk.metadata['original_id'] = doc['id']
+        chunked_docs.extend(chunks)
+    return chunked_docs
+
+
+def run(name, func, documents):
+    start = time.perf_counter()
+    chunks = func(documents)
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<28} {elapsed:8.3f}s  {len(documents) / elapsed:10.0f} docs/s  {len(chunks) / elapsed:10.0f} chunks/s")
+    return chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunking throughput benchmark")
+    parser.add_argument("--copies", type=int, default=200, help="Copies of each sample record")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for the parallel run")
+    args = parser.parse_args()
+
+    documents = build_corpus(args.copies)
+    total_chars = sum(len(doc['content']) for doc in documents)
+    print(f"📊 Chunking {len(documents)} documents ({total_chars:,} characters)")
+
+    reference = run("langchain split_documents", langchain_chunk, documents)
+    fast = run("fast chunker (1 process)", lambda docs: chunk_documents(docs, workers=1, use_strategies=False), documents)
+    run("fast chunker (parallel)", lambda docs: chunk_documents(docs, workers=args.workers, use_strategies=False), documents)
+
+    same = [c.page_content for c in fast] == [c.page_content for c in reference]
+    print(f"{'✅' if same else '❌'} Output identical: {same}")
+
+
+if __name__ == "__main__":
+    main()
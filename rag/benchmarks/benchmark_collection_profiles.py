@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Collection profile benchmark
+Reports recall@k against exact search, query latency and estimated RAM for
+every collection profile, on the bundled sample data (emails, conversations,
+business data and wine PDFs)
+
+Quantization, on-disk storage and HNSW only take effect on a Qdrant server:
+
+    ./qdrant &   # or docker run -p 6333:6333 -p 6334:6334 qdrant/qdrant
+    python benchmarks/benchmark_collection_profiles.py --url http://localhost:6333
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+parent_dir = Path(__file__).parent.parent
+sys.path.append(str(parent_dir))
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct, SearchParams
+
+from llm_scripts.chunking import chunk_documents
+from llm_scripts.collection_profiles import COLLECTION_PROFILES
+from llm_scripts.embeddings import create_embedding_backend
+from llm_scripts.qdrant_connection import create_qdrant_client
+
+QUERIES = [
+    "What red wines do you have under $50?",
+    "What are your best-rated wines?",
+    "What wines pair well with seafood?",
+    "What do customers say about your Chardonnay?",
+    "What's your return policy?",
+    "Do you have any Italian wines?",
+    "How can I track my order?",
+    "How should I store wine?",
+    "Merlot with red fruit aromas",
+    "Wine for an anniversary dinner with lobster",
+]
+
+
+def load_corpus(max_pdfs: int):
+    """Sample JSON records and PDF pages as RAG documents"""
+    documents = []
+    for path in sorted((parent_dir / "data").glob("*.json")):
+        with open(path) as f:
+            for i, record in enumerate(json.load(f)):
+                documents.append({
+                    'id': f"{path.stem}_{i}",
+                    'content': json.dumps(record, indent=2),
+                    'metadata': {'type': 'sample', 'source_file': path.name}
+                })
+
+    from pypdf import PdfReader
+    for pdf in sorted((parent_dir / "pdfs").glob("*.pdf"))[:max_pdfs]:
+        for page_num, page in enumerate(PdfReader(str(pdf)).pages):
+            text = page.extract_text()
+            if text.strip():
+                documents.append({
+                    'id': f"pdf_{pdf.stem}_page_{page_num}",
+                    'content': text,
+                    'metadata': {'type': 'pdf', 'filename': pdf.name, 'page': page_num}
+                })
+    return chunk_documents(documents)
+
+
+def wait_until_indexed(client: QdrantClient, name: str, timeout: float = 300):
+    start = time.time()
+    while time.time() - start < timeout:
+        info = client.get_collection(name)
+        if str(info.status).lower().endswith("green"):
+            return
+        time.sleep(0.5)
+
+
+def percentile(values, p):
+    return float(np.percentile(values, p)) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collection profile benchmark")
+    parser.add_argument("--url", default=None, help="Qdrant server URL (default: in-memory local mode)")
+    parser.add_argument("--backend", default="hash", help="Embedding backend (hash, ollama, local)")
+    parser.add_argument("--model", default=None, help="Embedding model")
+    parser.add_argument("--profiles", default=",".join(COLLECTION_PROFILES), help="Comma-separated profiles")
+    parser.add_argument("--synthetic", type=int, default=20000,
+                        help="Pad the corpus to this many vectors with perturbed copies")
+    parser.add_argument("--max-pdfs", type=int, default=100, help="PDFs to include")
+    parser.add_argument("--k", type=int, default=5, help="Results per query")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed passes over the query set")
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    client = create_qdrant_client(url=args.url) if args.url else QdrantClient(":memory:")
+    if not args.url:
+        print("⚠️  Local mode ignores quantization/on-disk/HNSW settings; use --url for meaningful numbers")
+
+    backend = create_embedding_backend(args.backend, args.model)
+    chunks = load_corpus(args.max_pdfs)
+    print(f"📚 Embedding {len(chunks)} chunks with {backend.name}/{backend.model}...")
+    vectors = backend.embed_array([chunk.page_content for chunk in chunks])
+    payloads = [{'content': chunk.page_content, 'metadata': chunk.metadata} for chunk in chunks]
+
+    # Pad with perturbed copies so memory and latency numbers reflect a larger catalogue
+    rng = np.random.RandomState(0)
+    if args.synthetic > len(vectors):
+        extra = args.synthetic - len(vectors)
+        base = vectors[rng.randint(0, len(vectors), size=extra)]
+        noisy = base + rng.normal(scale=0.05, size=base.shape).astype(np.float32)
+        vectors = np.vstack([vectors, noisy / np.linalg.norm(noisy, axis=1, keepdims=True)])
+        payloads += [payloads[i % len(payloads)] for i in range(extra)]
+
+    avg_payload_bytes = int(np.mean([len(json.dumps(p)) for p in payloads]))
+    queries = backend.embed_array(QUERIES)
+    dimension = vectors.shape[1]
+    print(f"📊 {len(vectors)} vectors, {dimension} dims, {len(QUERIES)} queries, k={args.k}")
+
+    results = []
+    ground_truth = None
+    for name in args.profiles.split(","):
+        profile = COLLECTION_PROFILES[name]
+        collection = f"bench_{name}"
+        if client.collection_exists(collection):
+            client.delete_collection(collection)
+        client.create_collection(collection_name=collection, **profile.collection_config(dimension))
+        client.upload_points(
+            collection_name=collection,
+            points=(PointStruct(id=i, vector=v.tolist(), payload=p) for i, (v, p) in enumerate(zip(vectors, payloads))),
+            batch_size=256
+        )
+        wait_until_indexed(client, collection)
+
+        if ground_truth is None:
+            ground_truth = [
+                {p.id for p in client.query_points(collection, query=q.tolist(), limit=args.k,
+                                                   search_params=SearchParams(exact=True)).points}
+                for q in queries
+            ]
+
+        latencies = []
+        recalls = []
+        for _ in range(args.repeat):
+            for q, truth in zip(queries, ground_truth):
+                start = time.perf_counter()
+                found = client.query_points(collection, query=q.tolist(), limit=args.k,
+                                            search_params=profile.search_params()).points
+                latencies.append((time.perf_counter() - start) * 1000)
+                recalls.append(len(truth & {p.id for p in found}) / len(truth))
+
+        result = {
+            'profile': name,
+            'recall_at_k': float(np.mean(recalls)),
+            'latency_p50_ms': percentile(latencies, 50),
+            'latency_p95_ms': percentile(latencies, 95),
+            'estimated_ram_mb': profile.estimate_ram_bytes(len(vectors), dimension, avg_payload_bytes) / 1e6,
+        }
+        results.append(result)
+        print(f"  {name:<22} recall@{args.k}={result['recall_at_k']:.3f}  "
+              f"p50={result['latency_p50_ms']:.2f}ms  p95={result['latency_p95_ms']:.2f}ms  "
+              f"RAM≈{result['estimated_ram_mb']:.1f}MB")
+        client.delete_collection(collection)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({'vectors': len(vectors), 'dimension': dimension, 'k': args.k, 'results': results}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Prompt prefix benchmark
+Compares prefill cost of the previous prompt layout (variable context and
+question between static instructions) with the prefix layout (static
+instructions first), sequentially and with concurrent chats. Reads the
+prefill timings Ollama reports for every request.
+
+Needs a running Ollama server with the generation model pulled:
+
+    ollama serve &
+    OLLAMA_NUM_PARALLEL=4 python benchmarks/benchmark_prompt_prefix.py --concurrency 4
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import ollama
+
+# Add parent directory to path
+parent_dir = Path(__file__).parent.parent
+sys.path.append(str(parent_dir))
+
+from llm_scripts.prompts import OLLAMA_KEEP_ALIVE, build_prompt, generation_timings
+
+QUESTIONS = [
+    "What red wines do you have under $50?",
+    "Do you ship to Canada?",
+    "Which wine goes well with salmon?",
+    "What is your return policy?",
+    "Can you recommend a sparkling wine for a wedding?",
+    "Do you have any Italian whites?",
+    "How long does delivery take?",
+    "What's your best-rated Cabernet?",
+]
+
+
+def sample_context(i: int) -> str:
+    return (
+        "WINE PRODUCTS:\n"
+        f"- Wine: Estate Reserve No. {i}\nType: Red\nPrice: ${20 + i}.00\nCountry: Italy\n"
+        f"Description: A structured red with dark cherry and spice, vintage {2010 + i}.\n"
+        "\nADDITIONAL INFORMATION:\n"
+        f"- Orders ship within {1 + i % 3} business days. Unopened bottles can be returned within 30 days."
+    )
+
+
+def legacy_prompt(context: str, question: str) -> str:
+    """Previous layout: instructions after the variable parts"""
+    return f"""You are a wine store customer service assistant. Answer the user's question concisely and directly.
+
+CONTEXT:
+{context}
+
+USER QUESTION: {question}
+
+INSTRUCTIONS:
+- If asking about specific wines, focus on the wine products listed above
+- Keep responses concise and to the point
+- If we have the wines they're asking about, say so directly
+- Don't include irrelevant information about return policies or wine clubs unless specifically asked
+- If you don't have specific information, say so clearly
+
+RESPONSE:"""
+
+
+LAYOUTS = {
+    'legacy': legacy_prompt,
+    'prefix': build_prompt,
+}
+
+
+def run_layout(client, model, layout, requests, concurrency, num_predict):
+    make_prompt = LAYOUTS[layout]
+
+    def one(i):
+        prompt = make_prompt(sample_context(i), QUESTIONS[i % len(QUESTIONS)])
+        response = client.generate(model=model, prompt=prompt, keep_alive=OLLAMA_KEEP_ALIVE,
+                                   options={'num_predict': num_predict, 'temperature': 0})
+        return generation_timings(dict(response))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        timings = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'wall_seconds': wall,
+        'mean_prefill_ms': sum(t['prefill_ms'] for t in timings) / requests,
+        'mean_prefill_tokens': sum(t['prefill_tokens'] for t in timings) / requests,
+        'mean_decode_ms': sum(t['decode_ms'] for t in timings) / requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prefill cost of prompt layouts")
+    parser.add_argument("--model", default="llama3.2:latest", help="Ollama generation model")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per layout and concurrency level")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent chats (also runs 1)")
+    parser.add_argument("--num-predict", type=int, default=16, help="Tokens generated per request")
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    client = ollama.Client()
+    # Load the model before timing
+    client.generate(model=args.model, prompt="Hello", keep_alive=OLLAMA_KEEP_ALIVE, options={'num_predict': 1})
+
+    results = {}
+    for concurrency in sorted({1, args.concurrency}):
+        for layout in LAYOUTS:
+            key = f"{layout}_c{concurrency}"
+            results[key] = run_layout(client, args.model, layout, args.requests, concurrency, args.num_predict)
+            r = results[key]
+            print(f"  {layout:7s} x{concurrency:<3d} prefill {r['mean_prefill_ms']:7.1f}ms "
+                  f"({r['mean_prefill_tokens']:5.0f} tokens)  decode {r['mean_decode_ms']:7.1f}ms  "
+                  f"wall {r['wall_seconds']:6.1f}s")
+
+        legacy, prefix = results[f"legacy_c{concurrency}"], results[f"prefix_c{concurrency}"]
+        if prefix['mean_prefill_ms']:
+            print(f"🚀 x{concurrency}: prefill {legacy['mean_prefill_ms'] / prefix['mean_prefill_ms']:.1f}x faster "
+                  "with the static prefix")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Query-embedding micro-batching benchmark
+Embeds single queries from many concurrent threads, once with a direct
+backend call per query and once through QueryBatcher, and reports
+throughput and p50/p95 latency for each.
+
+The hash backend has no per-call overhead, so it only shows the batcher's
+own cost; use the local or ollama backend for real numbers:
+
+    python benchmarks/benchmark_query_batching.py --backend ollama --concurrency 16
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+parent_dir = Path(__file__).parent.parent
+sys.path.append(str(parent_dir))
+
+from llm_scripts.embeddings import (
+    EMBEDDING_BACKENDS, QUERY_BATCH_SIZE, QUERY_BATCH_WAIT_MS, QueryBatcher, create_embedding_backend
+)
+
+QUESTIONS = [
+    "What red wines do you have under $50?",
+    "Do you ship to Canada?",
+    "Which wine goes well with salmon?",
+    "What is your return policy?",
+    "Can you recommend a sparkling wine for a wedding?",
+    "Do you have any Italian whites?",
+]
+
+
+def run(embed, requests: int, concurrency: int):
+    latencies = []
+
+    def one(i):
+        start = time.perf_counter()
+        embed(f"{QUESTIONS[i % len(QUESTIONS)]} #{i}")
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'queries_per_second': requests / wall,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark micro-batching of query embeddings")
+    parser.add_argument("--backend", default="hash", choices=list(EMBEDDING_BACKENDS), help="Embedding backend")
+    parser.add_argument("--model", default=None, help="Embedding model (backend default if omitted)")
+    parser.add_argument("--requests", type=int, default=512, help="Queries per run")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent callers")
+    parser.add_argument("--batch-size", type=int, default=QUERY_BATCH_SIZE, help="Maximum queries per batch")
+    parser.add_argument("--wait-ms", type=float, default=QUERY_BATCH_WAIT_MS, help="Batching window")
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    backend = create_embedding_backend(args.backend, args.model)
+    backend.embed_array(["warm up"])
+    batcher = QueryBatcher(backend, args.batch_size, args.wait_ms)
+
+    results = {}
+    for concurrency in sorted({1, args.concurrency}):
+        for mode, embed in (("direct", lambda text: backend.embed_array([text])[0]), ("batched", batcher.embed)):
+            key = f"{mode}_c{concurrency}"
+            results[key] = run(embed, args.requests, concurrency)
+            r = results[key]
+            print(f"  {mode:8s} x{concurrency:<3d} {r['queries_per_second']:8.0f} queries/s  "
+                  f"p50 {r['p50_ms']:7.2f}ms  p95 {r['p95_ms']:7.2f}ms")
+    results['batcher'] = batcher.stats()
+    print(f"\n📦 Mean batch size {results['batcher']['mean_batch_size']:.1f}, "
+          f"largest {results['batcher']['largest_batch']}")
+    batcher.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
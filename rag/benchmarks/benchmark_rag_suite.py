@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Reproducible RAG benchmark suite
+Builds the knowledge base from a fixed fixture corpus (the data/*.json
+samples and the wine PDFs), then measures ingestion throughput, retrieval
+quality on a labelled query set (recall@k, MRR) and p50/p95/p99 search and
+chat latency. Runs offline: the deterministic hash embedder replaces the
+embedding model and a stub LLM replaces Ollama, so quality numbers are
+identical between runs and only code changes move them.
+
+Results are written as JSON; compare a run against a previous one to catch
+regressions (exits with status 1 when quality drops or latency grows past
+the tolerances):
+
+    python benchmarks/benchmark_rag_suite.py --output baseline.json
+    # ... change code ...
+    python benchmarks/benchmark_rag_suite.py --output current.json --baseline baseline.json
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+# Add parent directory to path
+parent_dir = Path(__file__).parent.parent
+sys.path.append(str(parent_dir))
+
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import Generation, LLMResult
+
+from llm_scripts.embeddings import HashEmbeddingBackend
+from llm_scripts.rag_system import WineRAGSystem
+
+SUITE_VERSION = 1
+QUERY_FILE = Path(__file__).parent / "fixtures" / "rag_queries.json"
+K_VALUES = (1, 3, 5, 10)
+
+# Flagged when a quality metric drops by more than this (absolute)
+QUALITY_TOLERANCE = 0.0
+# Flagged when a latency percentile grows by more than this fraction
+LATENCY_TOLERANCE = 0.5
+
+
+class StubLLM(LLM):
+    """
+    Deterministic stand-in for Ollama
+
+    Answers with a fixed sentence built from the question and reports
+    Ollama-style generation_info (token counts and durations), optionally
+    sleeping for the simulated time to first token and decode.
+    """
+
+    answer_tokens: int = 40
+    ttft_ms: float = 0.0
+    tokens_per_second: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _call(self, prompt: str, stop=None, run_manager=None, **kwargs) -> str:
+        question = prompt.rsplit("USER QUESTION:", 1)[-1].split("RESPONSE:", 1)[0].strip()
+        filler = " ".join(["wine"] * max(0, self.answer_tokens - 8))
+        return f"Thank you for asking about {question[:80]} {filler}".strip()
+
+    def _generate(self, prompts: List[str], stop=None, run_manager=None, **kwargs) -> LLMResult:
+        generations = []
+        for prompt in prompts:
+            text = self._call(prompt, stop)
+            prompt_tokens = len(prompt) // 4
+            decode_tokens = len(text.split())
+            decode_ms = 1000 * decode_tokens / self.tokens_per_second if self.tokens_per_second else 0.0
+            if self.ttft_ms or decode_ms:
+                time.sleep((self.ttft_ms + decode_ms) / 1000)
+            generations.append([Generation(text=text, generation_info={
+                'load_duration': 0,
+                'prompt_eval_count': prompt_tokens,
+                'prompt_eval_duration': int(self.ttft_ms * 1e6),
+                'eval_count': decode_tokens,
+                'eval_duration': int(decode_ms * 1e6),
+                'total_duration': int((self.ttft_ms + decode_ms) * 1e6),
+            })])
+        return LLMResult(generations=generations)
+
+
+def load_fixture_corpus(max_pdfs: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Sample business data, emails, conversations and PDF pages as RAG documents
+
+    Document ids are the record ids of the JSON samples and
+    pdf_<file>_page_<n> for PDF pages; the labelled queries refer to them.
+    """
+    data_dir = parent_dir / "data"
+    documents = []
+
+    with open(data_dir / "sample_wine_business_data.json") as f:
+        for record in json.load(f):
+            documents.append({
+                'id': record['id'],
+                'content': record['content'],
+                'metadata': {'type': record['type'], **record.get('metadata', {})}
+            })
+
+    with open(data_dir / "sample_wine_emails.json") as f:
+        for record in json.load(f):
+            documents.append({
+                'id': record['id'],
+                'content': f"Subject: {record['subject']}\nFrom: {record['from']}\nDate: {record['date']}\n\n"
+                           f"{record['full_body']}",
+                'metadata': {'type': 'email', 'subject': record['subject'], 'sender': record['from'],
+                             'date': record['date']}
+            })
+
+    with open(data_dir / "sample_wine_conversations.json") as f:
+        for record in json.load(f):
+            question, answer = record['customer_email'], record['business_response']
+            documents.append({
+                'id': record['id'],
+                'content': f"Subject: {question['subject']}\n\nCustomer: {question['body']}\n\n"
+                           f"Response: {answer['body']}",
+                'metadata': {'type': 'conversation', 'subject': question['subject'], 'date': question['date']}
+            })
+
+    from pypdf import PdfReader
+    for pdf in sorted((parent_dir / "pdfs").glob("*.pdf"))[:max_pdfs]:
+        for page_num, page in enumerate(PdfReader(str(pdf)).pages):
+            text = page.extract_text() or ""
+            if text.strip():
+                documents.append({
+                    'id': f"pdf_{pdf.stem}_page_{page_num}",
+                    'content': text,
+                    'metadata': {'type': 'pdf', 'source': f"pdfs/{pdf.name}", 'filename': pdf.name,
+                                 'page': page_num}
+                })
+    return documents
+
+
+def load_labelled_queries(path: Path = QUERY_FILE, document_ids: set = None) -> List[Dict[str, Any]]:
+    """Queries with the ids of their relevant documents (limited to documents in the corpus)"""
+    with open(path) as f:
+        queries = json.load(f)
+    if document_ids is not None:
+        queries = [{**q, 'relevant': [doc_id for doc_id in q['relevant'] if doc_id in document_ids]}
+                   for q in queries]
+        queries = [q for q in queries if q['relevant']]
+    return queries
+
+
+def _source_ids(doc: Dict[str, Any]) -> List[str]:
+    """Ids of the documents a search result stands for (its own and its deduplicated copies)"""
+    metadata = doc.get('metadata') or {}
+    ids = [metadata.get('original_id')]
+    ids.extend(chunk_id.rsplit("_chunk_", 1)[0] for chunk_id in metadata.get('duplicate_ids', []))
+    return [doc_id for doc_id in ids if doc_id]
+
+
+def retrieval_quality(rankings: List[List[str]], relevant: List[List[str]],
+                      k_values=K_VALUES) -> Dict[str, float]:
+    """
+    Mean recall@k and MRR over queries
+
+    Args:
+        rankings: Retrieved document ids per query, best first
+        relevant: Relevant document ids per query
+
+    Returns:
+        Dictionary with recall@<k> for each k, mrr@<max k> and hit_rate@<max k>
+    """
+    max_k = max(k_values)
+    quality = {f"recall@{k}": [] for k in k_values}
+    reciprocal_ranks = []
+    for ranking, wanted in zip(rankings, relevant):
+        wanted = set(wanted)
+        for k in k_values:
+            quality[f"recall@{k}"].append(len(wanted & set(ranking[:k])) / len(wanted))
+        rank = next((i + 1 for i, doc_id in enumerate(ranking[:max_k]) if doc_id in wanted), None)
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+    summary = {name: round(float(np.mean(values)), 4) for name, values in quality.items()}
+    summary[f"mrr@{max_k}"] = round(float(np.mean(reciprocal_ranks)), 4)
+    summary[f"hit_rate@{max_k}"] = round(float(np.mean([r > 0 for r in reciprocal_ranks])), 4)
+    return summary
+
+
+def latency_summary(seconds: List[float]) -> Dict[str, float]:
+    """p50/p95/p99, mean and max in milliseconds"""
+    ms = np.asarray(seconds) * 1000
+    return {
+        'samples': len(ms),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'mean_ms': round(float(ms.mean()), 3),
+        'max_ms': round(float(ms.max()), 3),
+    }
+
+
+def run_suite(max_pdfs: Optional[int] = None, dimension: int = 256, reranker: str = "none",
+              repeats: int = 5, chat_repeats: int = 2, ttft_ms: float = 0.0,
+              tokens_per_second: float = 0.0) -> Dict[str, Any]:
+    """
+    Build the fixture knowledge base and run every measurement
+
+    Args:
+        max_pdfs: PDFs included in the corpus (None for all)
+        dimension: Hash embedding size
+        reranker: Reranker of the RAG system under test
+        repeats: Timed passes over the query set for search latency
+        chat_repeats: Timed passes over the query set for chat latency
+        ttft_ms: Simulated LLM time to first token
+        tokens_per_second: Simulated LLM decode speed (0 answers instantly)
+
+    Returns:
+        Results dictionary (see main)
+    """
+    start = time.perf_counter()
+    documents = load_fixture_corpus(max_pdfs)
+    load_seconds = time.perf_counter() - start
+    queries = load_labelled_queries(document_ids={doc['id'] for doc in documents})
+
+    db_path = tempfile.mkdtemp()
+    try:
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=dimension),
+                            reranker=reranker, coalesce_requests=False)
+        rag.llm = StubLLM(ttft_ms=ttft_ms, tokens_per_second=tokens_per_second)
+
+        # Ingestion: chunk, deduplicate, embed, bulk-load and index
+        rebuild = rag.rebuild_collection(documents)
+        ingestion = {
+            'corpus_load_seconds': round(load_seconds, 3),
+            'documents': len(documents),
+            'chunks': rebuild['points'],
+            'timings_seconds': {stage: round(value, 4) for stage, value in rebuild['timings'].items()},
+            'chunks_per_second': round(rebuild['chunks_per_second'], 1),
+            'documents_per_second': round(len(documents) / rebuild['timings']['total'], 1),
+        }
+
+        # Retrieval quality (deterministic)
+        max_k = max(K_VALUES)
+        rankings = []
+        for query in queries:
+            ranking = []
+            for doc in rag.search(query['query'], limit=max_k):
+                ranking.extend(doc_id for doc_id in _source_ids(doc) if doc_id not in ranking)
+            rankings.append(ranking)
+        quality = retrieval_quality(rankings, [q['relevant'] for q in queries])
+        per_query = [
+            {
+                'query': query['query'],
+                'first_relevant_rank': next((i + 1 for i, doc_id in enumerate(ranking)
+                                             if doc_id in query['relevant']), None),
+                'top_5': ranking[:5],
+            }
+            for query, ranking in zip(queries, rankings)
+        ]
+
+        # Latency (search first, warm: the quality pass above loaded everything)
+        search_times = []
+        for _ in range(repeats):
+            for query in queries:
+                start = time.perf_counter()
+                rag.search(query['query'], limit=5)
+                search_times.append(time.perf_counter() - start)
+
+        chat_times = []
+        answer_paths: Dict[str, int] = {}
+        for _ in range(chat_repeats):
+            for query in queries:
+                start = time.perf_counter()
+                result = rag.query(query['query'])
+                chat_times.append(time.perf_counter() - start)
+                answer_paths[result['answer_path']] = answer_paths.get(result['answer_path'], 0) + 1
+
+        rag.client.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+
+    return {
+        'suite_version': SUITE_VERSION,
+        'config': {
+            'max_pdfs': max_pdfs, 'embedding': f"hash-{dimension}", 'reranker': reranker, 'repeats': repeats,
+            'chat_repeats': chat_repeats, 'llm_ttft_ms': ttft_ms, 'llm_tokens_per_second': tokens_per_second,
+            'queries': len(queries),
+        },
+        'ingestion': ingestion,
+        'quality': quality,
+        'latency': {
+            'search': latency_summary(search_times),
+            'chat': {**latency_summary(chat_times), 'answer_paths': answer_paths},
+        },
+        'per_query': per_query,
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    quality_tolerance: float = QUALITY_TOLERANCE,
+                    latency_tolerance: float = LATENCY_TOLERANCE) -> List[str]:
+    """
+    Regressions of a run against a baseline run
+
+    Returns:
+        Human-readable descriptions of quality drops, latency increases and
+        lower ingestion throughput beyond the tolerances (empty when none)
+    """
+    regressions = []
+    if baseline.get('config', {}).get('queries') != current['config']['queries']:
+        regressions.append("query set changed: quality numbers are not comparable")
+    for name, value in current['quality'].items():
+        before = baseline.get('quality', {}).get(name)
+        if before is not None and value < before - quality_tolerance:
+            regressions.append(f"{name} dropped {before:.4f} -> {value:.4f}")
+    for kind in ('search', 'chat'):
+        for name in ('p50_ms', 'p95_ms', 'p99_ms'):
+            before = baseline.get('latency', {}).get(kind, {}).get(name)
+            value = current['latency'][kind][name]
+            if before and value > before * (1 + latency_tolerance):
+                regressions.append(f"{kind} {name} grew {before:.2f} -> {value:.2f}")
+    before = baseline.get('ingestion', {}).get('chunks_per_second')
+    value = current['ingestion']['chunks_per_second']
+    if before and value < before / (1 + latency_tolerance):
+        regressions.append(f"ingestion chunks/s fell {before:.0f} -> {value:.0f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline RAG benchmark: ingestion, recall@k/MRR and latency")
+    parser.add_argument("--max-pdfs", type=int, default=None, help="PDFs in the corpus (default: all)")
+    parser.add_argument("--dimension", type=int, default=256, help="Hash embedding size")
+    parser.add_argument("--reranker", default="none", help="Reranker under test (none, features)")
+    parser.add_argument("--repeats", type=int, default=5, help="Passes over the queries for search latency")
+    parser.add_argument("--chat-repeats", type=int, default=2, help="Passes over the queries for chat latency")
+    parser.add_argument("--llm-ttft-ms", type=float, default=0.0, help="Simulated time to first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=0.0,
+                        help="Simulated decode speed (0 answers instantly)")
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    parser.add_argument("--baseline", default=None, help="Previous results to compare against")
+    parser.add_argument("--quality-tolerance", type=float, default=QUALITY_TOLERANCE,
+                        help="Allowed absolute drop of recall/MRR")
+    parser.add_argument("--latency-tolerance", type=float, default=LATENCY_TOLERANCE,
+                        help="Allowed relative growth of latency percentiles")
+    args = parser.parse_args()
+
+    print("🧪 Running RAG benchmark suite...")
+    results = run_suite(args.max_pdfs, args.dimension, args.reranker, args.repeats, args.chat_repeats,
+                        args.llm_ttft_ms, args.llm_tokens_per_second)
+
+    ingestion = results['ingestion']
+    print(f"\n📥 Ingestion: {ingestion['documents']} documents -> {ingestion['chunks']} chunks in "
+          f"{ingestion['timings_seconds']['total']:.2f}s ({ingestion['chunks_per_second']:.0f} chunks/s)")
+    print("🎯 Quality: " + "  ".join(f"{name} {value:.3f}" for name, value in results['quality'].items()))
+    for kind, summary in results['latency'].items():
+        print(f"⏱️  {kind:6s} p50 {summary['p50_ms']:7.2f}ms  p95 {summary['p95_ms']:7.2f}ms  "
+              f"p99 {summary['p99_ms']:7.2f}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"💾 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results, args.quality_tolerance, args.latency_tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
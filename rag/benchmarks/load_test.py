@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Load test for api_server.py
+Drives /api/chat and /api/search (and a streaming chat endpoint, when one is
+given) with a weighted request mix, either closed loop (a fixed number of
+users, each sending its next request when the previous one finished) or
+open loop (Poisson arrivals at a fixed rate, independent of how fast the
+server answers). Each load level reports throughput, latency and
+time-to-first-byte percentiles, busy (503) and error rates, and the
+server's generation scheduler stats.
+
+Against a running server:
+
+    python benchmarks/load_test.py --url http://localhost:8000 --users 1,4,16 --duration 60
+
+Self-contained, with a simulated Ollama (see stub_ollama.py) and a knowledge
+base built from the fixture corpus in a temporary directory:
+
+    python benchmarks/load_test.py --start-server --rate 1,2,4 --stub-ttft-ms 300 \\
+        --stub-tokens-per-second 25 --stub-parallel 4 --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import httpx
+import numpy as np
+
+# Add parent directory to path
+parent_dir = Path(__file__).parent.parent
+sys.path.append(str(parent_dir))
+sys.path.append(str(Path(__file__).parent))
+
+from stub_ollama import StubOllamaServer
+
+QUERY_FILE = Path(__file__).parent / "fixtures" / "rag_queries.json"
+DEFAULT_MIX = "chat=0.8,search=0.2"
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """'chat=0.8,search=0.2' -> {'chat': 0.8, 'search': 0.2}"""
+    weights = {}
+    for part in mix.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in ("chat", "search", "chat_stream"):
+            raise ValueError(f"Unknown request kind: {kind}")
+        weights[kind] = float(weight or 1)
+    return weights
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """p50/p90/p95/p99 and max in milliseconds (empty when there are no values)"""
+    if not values:
+        return {}
+    ms = np.asarray(values) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(ms, 50)), 2),
+        'p90_ms': round(float(np.percentile(ms, 90)), 2),
+        'p95_ms': round(float(np.percentile(ms, 95)), 2),
+        'p99_ms': round(float(np.percentile(ms, 99)), 2),
+        'max_ms': round(float(ms.max()), 2),
+    }
+
+
+def summarize(records: List[Dict[str, Any]], window: float) -> Dict[str, Any]:
+    """
+    Throughput, latency percentiles, busy and error rates of a load level
+
+    Args:
+        records: One record per request (kind, status, latency, ttfb, answer_path, error)
+        window: Measured seconds (after warm-up)
+
+    Returns:
+        Summary for all requests and per request kind
+    """
+    def summary(group):
+        ok = [r for r in group if r['status'] == 200]
+        busy = [r for r in group if r['status'] == 503]
+        errors = [r for r in group if r['status'] not in (200, 503)]
+        error_kinds: Dict[str, int] = {}
+        for r in errors:
+            key = r['error'] or f"HTTP {r['status']}"
+            error_kinds[key] = error_kinds.get(key, 0) + 1
+        answer_paths: Dict[str, int] = {}
+        for r in ok:
+            if r.get('answer_path'):
+                answer_paths[r['answer_path']] = answer_paths.get(r['answer_path'], 0) + 1
+        return {
+            'requests': len(group),
+            'ok': len(ok),
+            'busy': len(busy),
+            'errors': len(errors),
+            'busy_rate': round(len(busy) / len(group), 4) if group else 0.0,
+            'error_rate': round(len(errors) / len(group), 4) if group else 0.0,
+            'throughput_rps': round(len(ok) / window, 3) if window else 0.0,
+            'latency': percentiles([r['latency'] for r in ok]),
+            'ttfb': percentiles([r['ttfb'] for r in ok if r['ttfb'] is not None]),
+            'answer_paths': answer_paths,
+            'error_kinds': error_kinds,
+        }
+
+    result = summary(records)
+    result['by_kind'] = {kind: summary([r for r in records if r['kind'] == kind])
+                         for kind in sorted({r['kind'] for r in records})}
+    return result
+
+
+class LoadGenerator:
+    """Sends the request mix to one server and records every request"""
+
+    def __init__(self, base_url: str, mix: Dict[str, float], questions: List[str], stream_path: str = None,
+                 chat_timeout: float = None, unique_questions: bool = False, request_timeout: float = 120.0,
+                 seed: int = 0):
+        """
+        Args:
+            base_url: API server URL
+            mix: Request kinds and their weights
+            questions: Questions/queries sent in turn
+            stream_path: Streaming chat endpoint (for the chat_stream kind)
+            chat_timeout: `timeout` sent with chat requests (server-side LLM queue wait)
+            unique_questions: Make every question unique (defeats request coalescing)
+            request_timeout: Client-side timeout per request
+            seed: Seed of the request mix and arrivals
+        """
+        self.base_url = base_url.rstrip("/")
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.questions = questions
+        self.stream_path = stream_path
+        self.chat_timeout = chat_timeout
+        self.unique_questions = unique_questions
+        self.request_timeout = request_timeout
+        self.random = random.Random(seed)
+        self._sequence = 0
+
+    def _next_request(self):
+        kind = self.random.choices(self.kinds, self.weights)[0]
+        question = self.questions[self._sequence % len(self.questions)]
+        if self.unique_questions:
+            question = f"{question} #{self._sequence}"
+        self._sequence += 1
+        if kind == "search":
+            return kind, "/api/search", {'query': question, 'limit': 5}
+        body = {'message': question, 'limit': 3}
+        if self.chat_timeout is not None:
+            body['timeout'] = self.chat_timeout
+        if kind == "chat_stream":
+            if not self.stream_path:
+                raise ValueError("chat_stream requests need --stream-path")
+            return kind, self.stream_path, body
+        return kind, "/api/chat", body
+
+    async def send(self, client: httpx.AsyncClient) -> Dict[str, Any]:
+        """Send one request of the mix; never raises"""
+        kind, path, body = self._next_request()
+        record = {'kind': kind, 'start': time.perf_counter(), 'status': None, 'latency': None, 'ttfb': None,
+                  'answer_path': None, 'error': None}
+        try:
+            async with client.stream("POST", path, json=body) as response:
+                chunks = []
+                async for chunk in response.aiter_bytes():
+                    if record['ttfb'] is None:
+                        record['ttfb'] = time.perf_counter() - record['start']
+                    chunks.append(chunk)
+                record['status'] = response.status_code
+            if kind == "chat" and record['status'] in (200, 503):
+                record['answer_path'] = json.loads(b"".join(chunks)).get('answer_path')
+        except Exception as e:
+            record['error'] = type(e).__name__
+        record['latency'] = time.perf_counter() - record['start']
+        return record
+
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(base_url=self.base_url, timeout=self.request_timeout,
+                                 limits=httpx.Limits(max_connections=None, max_keepalive_connections=None))
+
+    async def closed_loop(self, users: int, duration: float, think_time: float = 0.0) -> List[Dict[str, Any]]:
+        """`users` concurrent users, each sending back to back (plus think time) for `duration` seconds"""
+        end = time.perf_counter() + duration
+        records = []
+
+        async def user():
+            while time.perf_counter() < end:
+                records.append(await self.send(client))
+                if think_time:
+                    await asyncio.sleep(think_time)
+
+        async with self._client() as client:
+            await asyncio.gather(*(user() for _ in range(users)))
+        return records
+
+    async def open_loop(self, rate: float, duration: float, max_in_flight: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Poisson arrivals at `rate` requests/s for `duration` seconds
+
+        Arrivals that find max_in_flight requests outstanding are recorded
+        as client_overload errors instead of being sent.
+        """
+        start = time.perf_counter()
+        records = []
+        tasks = set()
+
+        async def one():
+            records.append(await self.send(client))
+
+        async with self._client() as client:
+            next_arrival = start
+            while True:
+                next_arrival += self.random.expovariate(rate)
+                if next_arrival - start >= duration:
+                    break
+                await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+                if len(tasks) >= max_in_flight:
+                    records.append({'kind': "overload", 'start': time.perf_counter(), 'status': None,
+                                    'latency': 0.0, 'ttfb': None, 'answer_path': None, 'error': "client_overload"})
+                    continue
+                task = asyncio.ensure_future(one())
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        return records
+
+    def server_metrics(self) -> Optional[Dict[str, Any]]:
+        """The server's /api/metrics snapshot (None when unavailable)"""
+        try:
+            response = httpx.get(f"{self.base_url}/api/metrics", timeout=10)
+            return response.json() if response.status_code == 200 else None
+        except httpx.HTTPError:
+            return None
+
+
+def run_level(generator: LoadGenerator, mode: str, level: float, duration: float, warmup: float,
+              think_time: float = 0.0, max_in_flight: int = 1000) -> Dict[str, Any]:
+    """Run one load level and summarize the requests started after the warm-up"""
+    start = time.perf_counter()
+    if mode == "closed":
+        records = asyncio.run(generator.closed_loop(int(level), warmup + duration, think_time))
+    else:
+        records = asyncio.run(generator.open_loop(level, warmup + duration, max_in_flight))
+    wall = time.perf_counter() - start
+    measured = [r for r in records if r['start'] - start >= warmup]
+    return {
+        'mode': mode,
+        'level': level,
+        'wall_seconds': round(wall, 2),
+        'summary': summarize(measured, max(duration, wall - warmup)),
+        'server_metrics': generator.server_metrics(),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def local_stack(stub: StubOllamaServer, seed_pdfs: int = 10, startup_timeout: float = 120.0):
+    """
+    Start api_server.py against the stub Ollama in a temporary directory
+
+    The knowledge base is built from the fixture corpus (seed_pdfs PDFs,
+    negative for an empty one) with the hash embedder, which the server
+    then uses for queries. RAG_* settings in the environment (e.g.
+    RAG_LLM_CONCURRENCY) are passed through.
+
+    Yields:
+        The server's base URL
+    """
+    workdir = tempfile.mkdtemp(prefix="rag-load-")
+    process = None
+    log_path = os.path.join(workdir, "api_server.log")
+    stub.start()
+    try:
+        env = {**os.environ, 'OLLAMA_HOST': stub.url, 'RAG_EMBEDDING_BACKEND': "hash"}
+        env.pop("QDRANT_URL", None)
+        if seed_pdfs >= 0:
+            seed_knowledge_base(os.path.join(workdir, "qdrant_db"), seed_pdfs, env)
+
+        port = _free_port()
+        with open(log_path, "w") as log:
+            process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "api_server:app", "--app-dir", str(parent_dir),
+                 "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+                cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+            )
+        base_url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if process.poll() is not None or time.monotonic() > deadline:
+                with open(log_path) as f:
+                    raise RuntimeError(f"api_server did not start:\n{f.read()[-2000:]}")
+            try:
+                if httpx.get(base_url + "/", timeout=2).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.5)
+        yield base_url
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def seed_knowledge_base(db_path: str, max_pdfs: int, env: Dict[str, str]):
+    """Build the fixture knowledge base in a subprocess (the server needs the local database unlocked)"""
+    script = (
+        "import sys; sys.path[:0] = [sys.argv[1], sys.argv[2]]\n"
+        "from benchmark_rag_suite import load_fixture_corpus\n"
+        "from llm_scripts.rag_system import WineRAGSystem\n"
+        "rag = WineRAGSystem(db_path=sys.argv[3], embedding_backend='hash')\n"
+        "rag.rebuild_collection(load_fixture_corpus(int(sys.argv[4])))\n"
+        "rag.client.close()\n"
+    )
+    subprocess.run(
+        [sys.executable, "-c", script, str(parent_dir), str(Path(__file__).parent), db_path, str(max_pdfs)],
+        env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def print_level(result: Dict[str, Any]):
+    s = result['summary']
+    unit = "users" if result['mode'] == "closed" else "req/s"
+    latency, ttfb = s['latency'], s['ttfb']
+    print(f"  {result['level']:>6g} {unit}  {s['throughput_rps']:7.2f} ok/s  "
+          f"p50 {latency.get('p50_ms', 0):8.1f}ms  p95 {latency.get('p95_ms', 0):8.1f}ms  "
+          f"p99 {latency.get('p99_ms', 0):8.1f}ms  ttfb p50 {ttfb.get('p50_ms', 0):8.1f}ms  "
+          f"busy {s['busy_rate']:6.1%}  errors {s['error_rate']:6.1%}  ({s['requests']} requests)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the RAG API server")
+    parser.add_argument("--url", default="http://localhost:8000", help="API server URL")
+    loop = parser.add_mutually_exclusive_group()
+    loop.add_argument("--users", default=None, help="Closed loop: concurrent users per level, e.g. 1,4,16")
+    loop.add_argument("--rate", default=None, help="Open loop: arrivals per second per level, e.g. 0.5,1,2")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds per level excluded from the results")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Closed loop: seconds between a user's requests")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Open loop: outstanding request cap")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Request kinds and weights (chat, search, chat_stream)")
+    parser.add_argument("--stream-path", default=None, help="Streaming chat endpoint for chat_stream requests")
+    parser.add_argument("--chat-timeout", type=float, default=None, help="LLM queue timeout sent with chat requests")
+    parser.add_argument("--unique-questions", action="store_true", help="Defeat request coalescing")
+    parser.add_argument("--request-timeout", type=float, default=120.0, help="Client timeout per request")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the request mix and arrivals")
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+
+    stub_args = parser.add_argument_group("local server with a simulated Ollama")
+    stub_args.add_argument("--start-server", action="store_true", help="Start api_server.py against a stub Ollama")
+    stub_args.add_argument("--seed-pdfs", type=int, default=10, help="PDFs in the knowledge base (-1 for none)")
+    stub_args.add_argument("--stub-ttft-ms", type=float, default=300.0, help="Simulated time to first token")
+    stub_args.add_argument("--stub-tokens-per-second", type=float, default=25.0, help="Simulated decode speed")
+    stub_args.add_argument("--stub-answer-tokens", type=int, default=64, help="Tokens per simulated answer")
+    stub_args.add_argument("--stub-parallel", type=int, default=4, help="Simulated OLLAMA_NUM_PARALLEL")
+    stub_args.add_argument("--stub-error-rate", type=float, default=0.0, help="Fraction of failing generations")
+    args = parser.parse_args()
+
+    mode, levels = ("open", args.rate) if args.rate else ("closed", args.users or "1,4,16")
+    levels = [float(level) for level in levels.split(",")]
+    with open(QUERY_FILE) as f:
+        questions = [query['query'] for query in json.load(f)]
+
+    def run(base_url):
+        generator = LoadGenerator(base_url, parse_mix(args.mix), questions, args.stream_path, args.chat_timeout,
+                                  args.unique_questions, args.request_timeout, args.seed)
+        print(f"🚦 {mode}-loop load test against {base_url} ({args.mix}, {args.duration:g}s per level)")
+        results = []
+        for level in levels:
+            result = run_level(generator, mode, level, args.duration, args.warmup, args.think_time,
+                               args.max_in_flight)
+            print_level(result)
+            results.append(result)
+        return results
+
+    stub = None
+    if args.start_server:
+        stub = StubOllamaServer(ttft_ms=args.stub_ttft_ms, tokens_per_second=args.stub_tokens_per_second,
+                                answer_tokens=args.stub_answer_tokens, parallel=args.stub_parallel,
+                                error_rate=args.stub_error_rate, seed=args.seed)
+        print(f"🤖 Starting api_server.py against a stub Ollama (TTFT {args.stub_ttft_ms:g}ms, "
+              f"{args.stub_tokens_per_second:g} tokens/s, {args.stub_parallel} parallel)...")
+        with local_stack(stub, args.seed_pdfs) as base_url:
+            results = run(base_url)
+    else:
+        results = run(args.url)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({'config': vars(args), 'stub': stub.stats() if stub else None, 'levels': results}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Local Ollama stand-in for load tests
+Serves /api/generate (streamed NDJSON, like Ollama) and /api/embed with a
+simulated model: at most `parallel` generations run at once (like
+OLLAMA_NUM_PARALLEL, the rest queue), each waits ttft_ms (plus prefill time
+per prompt token) before its first token and then emits tokens_per_second.
+Embeddings come from the deterministic hash embedder. Only the standard
+library is used, so it runs wherever the RAG system does.
+
+    python benchmarks/stub_ollama.py --port 11434 --ttft-ms 300 --tokens-per-second 25 --parallel 4
+    OLLAMA_HOST=http://127.0.0.1:11434 RAG_EMBEDDING_BACKEND=hash python api_server.py
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Any
+
+# Add parent directory to path
+parent_dir = Path(__file__).parent.parent
+sys.path.append(str(parent_dir))
+
+from llm_scripts.embeddings import HashEmbeddingBackend
+
+ANSWER_WORDS = (
+    "Thank you for reaching out! Based on our current selection, we recommend a bottle that pairs "
+    "well with your meal and fits your budget. Let us know if you would like more details about "
+    "shipping, storage or our other wines."
+).split()
+
+
+class StubOllamaServer:
+    """
+    Simulated Ollama server running in a background thread
+
+    Use as a context manager or call start()/stop(); `url` is the value
+    for OLLAMA_HOST.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, ttft_ms: float = 300.0,
+                 tokens_per_second: float = 25.0, answer_tokens: int = 64, parallel: int = 4,
+                 prefill_tokens_per_second: float = 0.0, error_rate: float = 0.0, embedding_dimension: int = 256,
+                 seed: int = 0):
+        """
+        Args:
+            host: Interface to listen on
+            port: Port (0 picks a free one)
+            ttft_ms: Time from admission to the first token
+            tokens_per_second: Decode speed per generation (0 emits all tokens at once)
+            answer_tokens: Tokens per answer unless the request sets num_predict
+            parallel: Generations running at once; others queue
+            prefill_tokens_per_second: Adds prompt_tokens / this to the TTFT (0 disables)
+            error_rate: Fraction of generations answered with HTTP 500
+            embedding_dimension: Size of /api/embed vectors
+            seed: Seed of the injected errors
+        """
+        self.ttft_ms = ttft_ms
+        self.tokens_per_second = tokens_per_second
+        self.answer_tokens = answer_tokens
+        self.parallel = parallel
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.error_rate = error_rate
+        self.embedder = HashEmbeddingBackend(dimension=embedding_dimension)
+        self._slots = threading.Semaphore(parallel)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {'generations': 0, 'embeddings': 0, 'errors': 0, 'running': 0, 'max_running': 0,
+                       'queued': 0, 'max_queued': 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubOllamaServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        """Generations, embeddings, injected errors and peak running/queued generations"""
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, key: str, delta: int = 1):
+        with self._lock:
+            self._stats[key] += delta
+            peak = f"max_{key}"
+            if peak in self._stats:
+                self._stats[peak] = max(self._stats[peak], self._stats[key])
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self.error_rate > 0 and self._random.random() < self.error_rate
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, body: Dict[str, Any]):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _write_chunk(self, body: Dict[str, Any]):
+                data = (json.dumps(body) + "\n").encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path == "/api/version":
+                    self._send_json(200, {'version': "0.0.0-stub"})
+                elif self.path == "/api/tags":
+                    self._send_json(200, {'models': []})
+                else:
+                    self._send_json(404, {'error': f"not found: {self.path}"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if self.path == "/api/generate":
+                    self._generate(request)
+                elif self.path == "/api/embed":
+                    self._embed(request)
+                else:
+                    self._send_json(404, {'error': f"not found: {self.path}"})
+
+            def _embed(self, request: Dict[str, Any]):
+                texts = request.get('input') or []
+                texts = [texts] if isinstance(texts, str) else list(texts)
+                stub._count('embeddings')
+                vectors = stub.embedder.embed_array(texts) if texts else []
+                self._send_json(200, {'model': request.get('model'), 'embeddings': [list(map(float, v)) for v in vectors]})
+
+            def _generate(self, request: Dict[str, Any]):
+                start = time.perf_counter()
+                prompt_tokens = max(1, len(request.get('prompt', "")) // 4)
+                answer_tokens = (request.get('options') or {}).get('num_predict') or stub.answer_tokens
+
+                # Wait for a slot like Ollama's request queue
+                stub._count('queued')
+                stub._slots.acquire()
+                stub._count('queued', -1)
+                stub._count('running')
+                try:
+                    stub._count('generations')
+                    if stub._should_fail():
+                        stub._count('errors')
+                        self._send_json(500, {'error': "simulated model failure"})
+                        return
+
+                    admitted = time.perf_counter()
+                    prefill_seconds = stub.ttft_ms / 1000
+                    if stub.prefill_tokens_per_second:
+                        prefill_seconds += prompt_tokens / stub.prefill_tokens_per_second
+                    time.sleep(prefill_seconds)
+                    first_token = time.perf_counter()
+
+                    model = request.get('model', "stub")
+                    stream = request.get('stream', True)
+                    words = [ANSWER_WORDS[i % len(ANSWER_WORDS)] for i in range(answer_tokens)]
+                    if stream:
+                        self.send_response(200)
+                        self.send_header("Content-Type", "application/x-ndjson")
+                        self.send_header("Transfer-Encoding", "chunked")
+                        self.end_headers()
+                    for i, word in enumerate(words):
+                        if stub.tokens_per_second and i:
+                            time.sleep(1 / stub.tokens_per_second)
+                        if stream:
+                            self._write_chunk({'model': model, 'created_at': _now(), 'response': word + " ",
+                                               'done': False})
+                    end = time.perf_counter()
+
+                    final = {
+                        'model': model,
+                        'created_at': _now(),
+                        'response': "" if stream else " ".join(words),
+                        'done': True,
+                        'done_reason': "stop",
+                        'total_duration': int((end - start) * 1e9),
+                        'load_duration': int((admitted - start) * 1e9),
+                        'prompt_eval_count': prompt_tokens,
+                        'prompt_eval_duration': int((first_token - admitted) * 1e9),
+                        'eval_count': len(words),
+                        'eval_duration': int((end - first_token) * 1e9),
+                    }
+                    if stream:
+                        self._write_chunk(final)
+                        self.wfile.write(b"0\r\n\r\n")
+                    else:
+                        self._send_json(200, final)
+                finally:
+                    stub._count('running', -1)
+                    stub._slots.release()
+
+        return Handler
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated Ollama server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Time to first token once admitted")
+    parser.add_argument("--tokens-per-second", type=float, default=25.0, help="Decode speed per generation")
+    parser.add_argument("--answer-tokens", type=int, default=64, help="Tokens per answer")
+    parser.add_argument("--parallel", type=int, default=4, help="Concurrent generations (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=0.0,
+                        help="Prompt processing speed added to the TTFT (0 disables)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of generations failing with 500")
+    args = parser.parse_args()
+
+    server = StubOllamaServer(args.host, args.port, args.ttft_ms, args.tokens_per_second, args.answer_tokens,
+                              args.parallel, args.prefill_tokens_per_second, args.error_rate)
+    print(f"🤖 Stub Ollama listening on {server.url} (TTFT {args.ttft_ms:.0f}ms, "
+          f"{args.tokens_per_second:g} tokens/s, {args.parallel} parallel)")
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,7 @@ sys.path.append(str(parent_dir))
 sys.path.append(str(parent_dir / "llm_scripts"))
 
 from llm_scripts.rag_system import WineRAGSystem
+from llm_scripts.conversation import SessionStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -26,29 +27,31 @@ class WineChatbot:
     def __init__(self):
         """Initialize the wine chatbot with RAG system"""
         self.rag = WineRAGSystem()
-        self.conversation_history = []
+        self.sessions = SessionStore()
         logger.info("Wine Chatbot initialized with RAG system")
     
-    def chat(self, message: str, history: List[List[str]]) -> tuple:
+    def chat(self, message: str, history: List[List[str]], conversation_id: str = None) -> tuple:
         """
         Main chat function that processes user messages
         
         Args:
             message: User's message
             history: Conversation history
+            conversation_id: Id of this browser session's conversation
             
         Returns:
-            Tuple of (updated_history, empty_message)
+            Tuple of (updated_history, empty_message, conversation_id)
         """
         if not message.strip():
-            return history, ""
+            return history, "", conversation_id
         
         try:
             # Add user message to history
             history.append([message, ""])
             
-            # Use RAG system to generate response
-            result = self.rag.query(message, limit=3)
+            # Use RAG system to generate response, with the conversation's memory
+            with self.sessions.turn(conversation_id) as session:
+                result = self.rag.query(message, limit=3, session=session)
             
             # Extract response
             response = result['response']
@@ -60,13 +63,13 @@ class WineChatbot:
             logger.info(f"User: {message[:50]}...")
             logger.info(f"Bot: {response[:50]}...")
             
-            return history, ""
+            return history, "", session.conversation_id
             
         except Exception as e:
             error_msg = f"I apologize, but I encountered an error: {str(e)}"
             history[-1][1] = error_msg
             logger.error(f"Chat error: {e}")
-            return history, ""
+            return history, "", conversation_id
     
     def get_system_status(self) -> str:
         """Get system status information"""
@@ -82,6 +85,7 @@ class WineChatbot:
 - ✅ RAG System: Active
 - ✅ Vector Database: Connected
 - ✅ LLM Model: {self.rag.model_name}
+- ✅ Embeddings: {self.rag.embedder_info['backend']}/{self.rag.embedder_info['model']} ({self.rag.embedding_dim} dims)
 - 📚 Knowledge Base: {doc_count} documents available
 
 🎯 **I can help you with:**
@@ -205,17 +209,20 @@ def create_interface():
                 # Send button
                 send_btn = gr.Button("Send", variant="primary", size="lg")
                 
+                # Conversation id of this browser session
+                conversation_id = gr.State(None)
+                
                 # Chat functionality
                 msg_input.submit(
                     fn=chatbot.chat,
-                    inputs=[msg_input, chatbot_interface],
-                    outputs=[chatbot_interface, msg_input]
+                    inputs=[msg_input, chatbot_interface, conversation_id],
+                    outputs=[chatbot_interface, msg_input, conversation_id]
                 )
                 
                 send_btn.click(
                     fn=chatbot.chat,
-                    inputs=[msg_input, chatbot_interface],
-                    outputs=[chatbot_interface, msg_input]
+                    inputs=[msg_input, chatbot_interface, conversation_id],
+                    outputs=[chatbot_interface, msg_input, conversation_id]
                 )
             
             # Right column - System controls and info
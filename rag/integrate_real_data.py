@@ -11,13 +11,14 @@ from pathlib import Path
 import asyncio
 from typing import List, Dict, Any
 import asyncpg
-? Should we migrate the whole darn Python shit to Typescript? 
+# ? Should we migrate the whole darn Python shit to Typescript? 
 # Add parent directory to path
 parent_dir = Path(__file__).parent
 sys.path.append(str(parent_dir))
 
 # Import RAG system
 from llm_scripts.rag_system import WineRAGSystem
+from llm_scripts.review_summarizer import summarize_reviews
 
 # Database connection
 async def get_db_connection():
@@ -118,7 +119,7 @@ Featured: {'Yes' if wine['featured'] else 'No'}
                     'type': 'wine_product',
                     'wine_id': wine['id'],
                     'name': wine['name'],
-                    'type': wine['type'],
+                    'wine_type': wine['type'],
                     'price': wine['price'],
                     'region': wine['region_name'] or 'Unknown',
                     'country': wine['country'] or 'Unknown',
@@ -164,41 +165,27 @@ async def get_real_review_data():
         reviews = await conn.fetch(reviews_query)
         print(f"✅ Loaded {len(reviews)} real reviews from database")
         
-        # Convert to RAG documents
-        review_docs = []
-        for review in reviews:
-            review_content = f"""
-Customer Review for {review['wine_name']}:
-Rating: {review['rating']}/5 stars
-Reviewer: {review['authorName']}
-Comment: {review['comment']}
-Vintage: {review['vintage'] or 'Not specified'}
-Date: {review['createdAt'].strftime('%Y-%m-%d')}
-
-Wine Details:
-- Type: {review['wine_type']}
-- Region: {review['region_name'] or 'Unknown'}
-- Country: {review['country'] or 'Unknown'}
-- Price: ${review['price'] / 100:.2f}
-"""
-            
-            review_doc = {
-                'id': f"review_{review['id']}",
-                'content': review_content,
-                'metadata': {
-                    'type': 'customer_review',
-                    'review_id': review['id'],
-                    'wine_id': review['wineId'],
-                    'wine_name': review['wine_name'],
-                    'rating': review['rating'],
-                    'author': review['authorName'],
-                    'vintage': review['vintage'],
-                    'date': review['createdAt'].isoformat()
-                }
+        # Aggregate reviews per wine and vintage instead of one document per review
+        review_rows = [
+            {
+                'id': review['id'],
+                'wine_id': review['wineId'],
+                'wine_name': review['wine_name'],
+                'wine_type': review['wine_type'],
+                'price': review['price'],
+                'region': review['region_name'],
+                'country': review['country'],
+                'rating': review['rating'],
+                'author': review['authorName'],
+                'comment': review['comment'],
+                'vintage': review['vintage'],
+                'date': review['createdAt'].isoformat()
             }
-            review_docs.append(review_doc)
+            for review in reviews
+        ]
+        review_docs = summarize_reviews(review_rows)
         
-        print(f"✅ Created {len(review_docs)} review documents")
+        print(f"✅ Created {len(review_docs)} review summary documents from {len(reviews)} reviews")
         return review_docs
         
     except Exception as e:
@@ -281,16 +268,14 @@ async def build_complete_rag_system():
         print("❌ No documents found!")
         return False
     
-    # Chunk documents
-    print("\n✂️  Chunking documents...")
-    chunked_docs = rag.chunk_documents(all_documents)
-    print(f"✅ Created {len(chunked_docs)} searchable chunks")
-    
-    # Create embeddings and store
-    print("\n🔢 Creating embeddings and storing in vector database...")
+    # Chunk, embed and load into a new collection version; the API keeps
+    # serving the current one until the alias is swapped
+    print("\n🔢 Creating embeddings and storing in a new collection version...")
     print("⏳ This will take 2-3 minutes...")
     
-    rag.create_embeddings_and_store(chunked_docs)
+    result = rag.rebuild_collection(all_documents)
+    print(f"✅ Created {result['points']} searchable chunks in {result['collection']}")
+    print(f"⏱️  {result['timings']['total']:.1f}s ({result['chunks_per_second']:.0f} chunks/s)")
     print("✅ Complete RAG system built with real data!")
     
     return True
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Answer planner for the RAG system
+Recognises questions that are pure catalog filters ("Do you have any Italian
+wines?", "What red wines under $50?") and answers them from the retrieved
+wine products' payload fields with a template, without an LLM call.
+Everything else is left to generation.
+"""
+
+import re
+from typing import List, Dict, Any, Optional
+
+from llm_scripts.reranking import COUNTRIES, WINE_TYPES, parse_query_constraints, price_in_dollars
+
+# Wine products listed in a templated answer
+CATALOG_ANSWER_ITEMS = 5
+
+_FILTER_KEYS = ('max_price', 'min_price', 'wine_types', 'countries')
+_LOOKUP_RE = re.compile(
+    r"\b(do you (have|carry|sell|stock)|have you got|got any|what|which|show|list|any|available)\b"
+)
+# Questions that need reasoning or prose, not a list
+_OPEN_ENDED_RE = re.compile(
+    r"\b(pair|pairs|pairing|food|dish|dinner|taste|tastes|flavou?rs?|difference|differ|compare|versus|vs|why|"
+    r"how|explain|describe|tell me about|recommend|suggest|gift|occasion|party|wedding|ship|shipping|deliver|"
+    r"delivery|return|refund|order|club|store|hours)\b"
+)
+_TYPE_LABELS = {'rose': 'rosé'}
+
+
+def plan_query(question: str) -> Optional[Dict[str, Any]]:
+    """
+    Decide whether a question is a pure catalog lookup
+
+    Args:
+        question: User question
+
+    Returns:
+        The parsed catalog constraints when the question only filters the
+        catalog (price, type, country, optionally "best rated"), None when
+        it needs the LLM
+    """
+    text = question.lower()
+    constraints = parse_query_constraints(question)
+    if not any(key in constraints for key in _FILTER_KEYS):
+        return None
+    if constraints.get('wants_featured') or _OPEN_ENDED_RE.search(text) or not _LOOKUP_RE.search(text):
+        return None
+    return constraints
+
+
+def matches_constraints(metadata: Dict[str, Any], constraints: Dict[str, Any]) -> bool:
+    """True when a wine product satisfies every catalog constraint"""
+    if metadata.get('type') != 'wine_product':
+        return False
+    if 'max_price' in constraints or 'min_price' in constraints:
+        price = price_in_dollars(metadata)
+        if price is None:
+            return False
+        if price > constraints.get('max_price', float('inf')) or price < constraints.get('min_price', 0.0):
+            return False
+    if 'wine_types' in constraints:
+        wine_type = str(metadata.get('wine_type') or "").lower()
+        if not any(s in wine_type for t in constraints['wine_types'] for s in WINE_TYPES[t]):
+            return False
+    if 'countries' in constraints:
+        country = str(metadata.get('country') or "").lower()
+        if not any(n in country or c in country for c in constraints['countries'] for n in COUNTRIES[c]):
+            return False
+    return True
+
+
+def describe_constraints(constraints: Dict[str, Any]) -> str:
+    """Readable description of the filter, e.g. "Italian red wines under $50" """
+    words = []
+    for country in constraints.get('countries', []):
+        names = COUNTRIES[country]
+        words.append((names[1] if len(names) > 1 else names[0]).title())
+    words.extend(_TYPE_LABELS.get(t, t) for t in constraints.get('wine_types', []))
+    description = " ".join(words + ["wines"])
+
+    low, high = constraints.get('min_price'), constraints.get('max_price')
+    if low is not None and high is not None:
+        description += f" between ${low:g} and ${high:g}"
+    elif high is not None:
+        description += f" under ${high:g}"
+    elif low is not None:
+        description += f" over ${low:g}"
+    return description
+
+
+def _format_wine(metadata: Dict[str, Any]) -> str:
+    details = [str(metadata[key]) for key in ('wine_type', 'region', 'country')
+               if metadata.get(key) and metadata[key] != 'Unknown']
+    line = f"- {metadata.get('name', 'Unnamed wine')}"
+    if details:
+        line += f" ({', '.join(details)})"
+    price = price_in_dollars(metadata)
+    if price is not None:
+        line += f" - ${price:.2f}"
+    if metadata.get('average_rating'):
+        line += f", rated {float(metadata['average_rating']):.1f}/5"
+        if metadata.get('review_count'):
+            line += f" ({metadata['review_count']} reviews)"
+    return line
+
+
+def select_catalog_matches(constraints: Dict[str, Any], documents: List[Dict[str, Any]],
+                           max_items: int = CATALOG_ANSWER_ITEMS) -> List[Dict[str, Any]]:
+    """
+    Wine products among the retrieved documents that satisfy the constraints
+
+    Kept in retrieval order (best rated first when the question asks for
+    ratings), one entry per wine.
+    """
+    matches = []
+    seen = set()
+    for doc in documents:
+        metadata = doc.get('metadata') or {}
+        key = metadata.get('wine_id', metadata.get('name'))
+        if matches_constraints(metadata, constraints) and key not in seen:
+            seen.add(key)
+            matches.append(doc)
+    if constraints.get('wants_rating'):
+        matches.sort(key=lambda doc: -float(doc['metadata'].get('average_rating') or 0.0))
+    return matches[:max_items]
+
+
+def render_catalog_answer(constraints: Dict[str, Any], matches: List[Dict[str, Any]]) -> str:
+    """
+    Templated answer listing the matching wine products
+
+    The matches come from the top retrieved documents, not a catalog scan,
+    so the answer presents them as examples rather than the full range.
+
+    Args:
+        constraints: Constraints returned by plan_query
+        matches: Matching documents from select_catalog_matches
+
+    Returns:
+        Answer text
+    """
+    description = describe_constraints(constraints)
+    if constraints.get('wants_rating'):
+        intro = f"Here are some highly rated {description} from our selection:"
+    else:
+        intro = f"Yes, we carry {description}. Here are some of them:"
+    lines = [intro]
+    lines.extend(_format_wine(doc['metadata']) for doc in matches)
+    lines.append("\nThis isn't our full range. Would you like more options, or details about any of these?")
+    return "\n".join(lines)
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+High-throughput document chunking for the RAG system
+Produces exactly the chunks of RecursiveCharacterTextSplitter(chunk_size,
+chunk_overlap, length_function=len) while working on plain strings and
+avoiding a LangChain Document and a metadata deep copy per chunk.
+Document types can register their own chunking strategy (wine products are
+kept atomic, emails split on replies and paragraphs, PDFs on sections).
+"""
+
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, NamedTuple, Callable
+
+DEFAULT_SEPARATORS = ["\n\n", "\n", " ", ""]
+
+# Below this many characters in a batch, process start-up costs more than it saves
+PARALLEL_MIN_CHARS = 2_000_000
+
+
+class Chunk(NamedTuple):
+    """
+    A chunk of a source document
+
+    Exposes page_content and metadata like a LangChain Document, so it can be
+    passed anywhere the RAG system previously used split Documents. Metadata
+    values are shared with the source document and must not be mutated in place.
+    """
+    page_content: str
+    metadata: Dict[str, Any]
+
+
+class FastRecursiveSplitter:
+    """
+    String-only port of RecursiveCharacterTextSplitter
+
+    Matches LangChain's defaults: separators ["\\n\\n", "\\n", " ", ""],
+    separators kept at the start of each split, character lengths and
+    whitespace stripping of every chunk.
+    """
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, separators: List[str] = None):
+        if chunk_overlap > chunk_size:
+            raise ValueError(f"Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators or DEFAULT_SEPARATORS
+
+    def split_text(self, text: str) -> List[str]:
+        """Split one text into chunks"""
+        # Fast path: a text shorter than a chunk always comes back whole
+        if len(text) < self.chunk_size:
+            text = text.strip()
+            return [text] if text else []
+        return self._split(text, self.separators)
+
+    def split_texts(self, texts: List[str]) -> List[List[str]]:
+        """Split many texts, returning one list of chunks per text"""
+        return [self.split_text(text) for text in texts]
+
+    def _split(self, text: str, separators: List[str]) -> List[str]:
+        separator = separators[-1]
+        remaining = []
+        for i, candidate in enumerate(separators):
+            if candidate == "":
+                separator = candidate
+                break
+            if candidate in text:
+                separator = candidate
+                remaining = separators[i + 1:]
+                break
+
+        if separator:
+            pieces = text.split(separator)
+            splits = [pieces[0]] + [separator + piece for piece in pieces[1:]]
+            splits = [s for s in splits if s]
+        else:
+            splits = list(text)
+
+        chunks = []
+        good_splits = []
+        for s in splits:
+            if len(s) < self.chunk_size:
+                good_splits.append(s)
+                continue
+            if good_splits:
+                chunks.extend(self._merge(good_splits))
+                good_splits = []
+            if remaining:
+                chunks.extend(self._split(s, remaining))
+            else:
+                chunks.append(s)
+        if good_splits:
+            chunks.extend(self._merge(good_splits))
+        return chunks
+
+    def _merge(self, splits: List[str]) -> List[str]:
+        # Splits keep their separators, so they are joined with "" and the
+        # separator length is always zero
+        chunk_size = self.chunk_size
+        chunk_overlap = self.chunk_overlap
+        chunks = []
+        current = deque()
+        total = 0
+        for s in splits:
+            length = len(s)
+            if total + length > chunk_size and current:
+                chunk = "".join(current).strip()
+                if chunk:
+                    chunks.append(chunk)
+                while total > chunk_overlap or (total + length > chunk_size and total > 0):
+                    total -= len(current.popleft())
+            current.append(s)
+            total += length
+        chunk = "".join(current).strip()
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+
+# Chunking strategy registry: document type -> function(text, splitter) -> chunks
+CHUNKING_STRATEGIES: Dict[str, Callable[[str, FastRecursiveSplitter], List[str]]] = {}
+
+
+def register_chunking_strategy(*doc_types: str):
+    """
+    Register a chunking strategy for one or more document types
+
+    Strategies must be module-level functions so worker processes can use them.
+
+    Args:
+        doc_types: Values of metadata['type'] handled by the strategy
+    """
+    def decorator(func):
+        for doc_type in doc_types:
+            CHUNKING_STRATEGIES[doc_type] = func
+        return func
+    return decorator
+
+
+def _pack_segments(segments: List[str], splitter: FastRecursiveSplitter, joiner: str = "\n\n") -> List[str]:
+    """Greedily pack whole segments into chunks, splitting only oversized ones"""
+    chunks = []
+    current = ""
+    for segment in segments:
+        segment = segment.strip()
+        if not segment:
+            continue
+        if len(segment) > splitter.chunk_size:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.extend(splitter.split_text(segment))
+        elif not current:
+            current = segment
+        elif len(current) + len(joiner) + len(segment) <= splitter.chunk_size:
+            current = f"{current}{joiner}{segment}"
+        else:
+            chunks.append(current)
+            current = segment
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# Wine product fields that are always kept, in display order
+_WINE_KEY_FIELDS = (
+    "Wine", "Type", "Price", "Region", "Country", "Grapes", "Food Pairing", "Body",
+    "Acidity", "Alcohol Content", "Featured", "Product Code", "Average Rating",
+)
+_WINE_FIELD_RE = re.compile(r"^([A-Z][A-Za-z ]+):\s*(.*)$")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+@register_chunking_strategy("wine_product")
+def chunk_wine_product(text: str, splitter: FastRecursiveSplitter) -> List[str]:
+    """
+    Keep a wine product as a single chunk
+
+    When the document is longer than a chunk, the key fields (name, type,
+    price, region...) are always kept; long free-text fields are cut at a
+    sentence boundary and individual reviews are dropped once the budget is
+    spent, so a wine is never split across chunks.
+    """
+    text = text.strip()
+    if len(text) <= splitter.chunk_size:
+        return [text] if text else []
+
+    key_lines, free_lines, review_lines = [], [], []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        field = _WINE_FIELD_RE.match(line)
+        if line.startswith("- "):
+            review_lines.append(line)
+        elif field and field.group(1) in _WINE_KEY_FIELDS:
+            key_lines.append(line)
+        else:
+            free_lines.append(line)
+
+    budget = splitter.chunk_size - sum(len(line) + 1 for line in key_lines)
+    kept = []
+    for line in free_lines + review_lines:
+        if len(line) + 1 <= budget:
+            kept.append(line)
+            budget -= len(line) + 1
+            continue
+        # Truncate the field at the last sentence that still fits
+        truncated = ""
+        for sentence in _SENTENCE_END_RE.split(line):
+            candidate = f"{truncated} {sentence}".strip()
+            if len(candidate) + 1 > budget:
+                break
+            truncated = candidate
+        if truncated and not line.startswith("- "):
+            kept.append(truncated)
+            budget -= len(truncated) + 1
+
+    return ["\n".join(key_lines + kept)]
+
+
+_EMAIL_REPLY_RE = re.compile(
+    r"^(?=On .{0,200}?wrote:\s*$|-{2,}\s*(?:Original Message|Forwarded message)|From:\s.*\n(?:.*\n){0,3}?(?:Sent|Date):\s)",
+    re.IGNORECASE | re.MULTILINE
+)
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+
+@register_chunking_strategy("email")
+def chunk_email(text: str, splitter: FastRecursiveSplitter) -> List[str]:
+    """Split an email on replies first, then pack whole paragraphs"""
+    if len(text) < splitter.chunk_size and not _EMAIL_REPLY_RE.search(text):
+        return splitter.split_text(text)
+
+    chunks = []
+    for message in _EMAIL_REPLY_RE.split(text):
+        chunks.extend(_pack_segments(_PARAGRAPH_RE.split(message), splitter))
+    return chunks
+
+
+# A section starts at a numbered heading, an all-caps line or a short "Title:" line
+_PDF_SECTION_RE = re.compile(
+    r"^(?=\d+(?:\.\d+)*\.?\s+[A-Z]|[A-Z][A-Z0-9 &/,'-]{3,}$|[^\n.!?]{1,40}:\s*$)",
+    re.MULTILINE
+)
+
+
+@register_chunking_strategy("pdf")
+def chunk_pdf(text: str, splitter: FastRecursiveSplitter) -> List[str]:
+    """Split a PDF page on section headings, packing whole sections into chunks"""
+    if len(text) < splitter.chunk_size:
+        return splitter.split_text(text)
+    return _pack_segments(_PDF_SECTION_RE.split(text), splitter, joiner="\n")
+
+
+def split_typed_texts(texts: List[str], doc_types: List[str], splitter: FastRecursiveSplitter) -> List[List[str]]:
+    """Split texts with the strategy registered for each document type"""
+    results = []
+    for text, doc_type in zip(texts, doc_types):
+        strategy = CHUNKING_STRATEGIES.get(doc_type)
+        results.append(strategy(text, splitter) if strategy else splitter.split_text(text))
+    return results
+
+
+def _split_batch(args) -> List[List[str]]:
+    texts, doc_types, chunk_size, chunk_overlap = args
+    return split_typed_texts(texts, doc_types, FastRecursiveSplitter(chunk_size, chunk_overlap))
+
+
+def split_texts_parallel(texts: List[str], chunk_size: int = 1000, chunk_overlap: int = 200,
+                         workers: int = None, batch_size: int = 500, doc_types: List[str] = None) -> List[List[str]]:
+    """
+    Split texts across worker processes
+
+    Small batches are split in-process, since starting workers would cost more
+    than the split itself.
+
+    Args:
+        texts: Texts to split
+        chunk_size: Maximum chunk size in characters
+        chunk_overlap: Overlap between consecutive chunks in characters
+        workers: Number of worker processes (defaults to the CPU count)
+        batch_size: Texts sent to a worker at a time
+        doc_types: Document type of each text, used to pick a chunking
+            strategy (None uses the recursive splitter for everything)
+
+    Returns:
+        One list of chunks per input text, in input order
+    """
+    doc_types = doc_types or [None] * len(texts)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or sum(len(t) for t in texts) < PARALLEL_MIN_CHARS:
+        return split_typed_texts(texts, doc_types, FastRecursiveSplitter(chunk_size, chunk_overlap))
+
+    batches = [
+        (texts[i:i + batch_size], doc_types[i:i + batch_size], chunk_size, chunk_overlap)
+        for i in range(0, len(texts), batch_size)
+    ]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for batch_result in executor.map(_split_batch, batches):
+            results.extend(batch_result)
+    return results
+
+
+def chunk_documents(documents: List[Dict[str, Any]], chunk_size: int = 1000, chunk_overlap: int = 200,
+                    workers: int = None, use_strategies: bool = True) -> List[Chunk]:
+    """
+    Split document dictionaries into chunks
+
+    Each document is split with the strategy registered for its
+    metadata['type'], falling back to the recursive splitter.
+
+    Args:
+        documents: Documents with 'id', 'content' and 'metadata'
+        chunk_size: Maximum chunk size in characters
+        chunk_overlap: Overlap between consecutive chunks in characters
+        workers: Worker processes for large batches (defaults to the CPU count)
+        use_strategies: Use per-type chunking strategies (False splits every
+            document with the recursive splitter)
+
+    Returns:
+        List of Chunk objects with chunk_id and original_id in their metadata
+    """
+    split_lists = split_texts_parallel(
+        [doc['content'] for doc in documents],
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        workers=workers,
+        doc_types=[doc['metadata'].get('type') for doc in documents] if use_strategies else None
+    )
+
+    chunks = []
+    for doc, pieces in zip(documents, split_lists):
+        base_metadata = doc['metadata']
+        doc_id = doc['id']
+        for i, piece in enumerate(pieces):
+            # Shallow copy: nested metadata values are shared between chunks
+            metadata = dict(base_metadata)
+            metadata['chunk_id'] = f"{doc_id}_chunk_{i}"
+            metadata['original_id'] = doc_id
+            chunks.append(Chunk(piece, metadata))
+    return chunks
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Request coalescing for the RAG system
+Single-flight execution: concurrent calls with the same key share one
+in-flight computation and all receive its result, so a burst of identical
+questions costs one embedding, one search and one generation.
+"""
+
+import re
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Callable, Hashable, Tuple
+
+from llm_scripts import metrics, tracing
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """Case, whitespace and trailing punctuation-insensitive form of a question"""
+    return _WHITESPACE_RE.sub(" ", text.lower()).strip().rstrip("?!. ")
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls by key
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running wait for and share its result or exception.
+    Results are not cached: the next call after completion runs again.
+    Thread-safe.
+    """
+
+    def __init__(self, name: str = "default"):
+        """
+        Args:
+            name: Operation label of the coalesced-requests counter
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.requests = 0
+        self.executions = 0
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs), or join the identical call already in flight
+
+        Args:
+            key: Identity of the call
+            fn: Function to run
+
+        Returns:
+            The function's result (shared with the other callers)
+        """
+        return self.execute(key, fn, *args, **kwargs)[0]
+
+    def execute(self, key: Hashable, fn: Callable, *args, **kwargs) -> Tuple[Any, bool]:
+        """
+        Like do(), but also tells whether the result came from another caller
+
+        Returns:
+            Tuple of (result, shared); shared is True when this call joined
+            one already in flight instead of running fn itself
+        """
+        with self._lock:
+            self.requests += 1
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.executions += 1
+        if not leader:
+            metrics.count('coalesced', operation=self.name)
+            tracing.set_attributes(coalesced=True)
+            return future.result(), True
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests, executions, coalesced requests and coalescing rate"""
+        with self._lock:
+            coalesced = self.requests - self.executions
+            return {
+                'requests': self.requests,
+                'executions': self.executions,
+                'coalesced': coalesced,
+                'coalescing_rate': coalesced / self.requests if self.requests else 0.0,
+                'in_flight': len(self._calls),
+            }
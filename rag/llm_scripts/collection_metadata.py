@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Collection metadata for the RAG system
+Records how each Qdrant collection was built (embedder, dimension...) so a
+change of configuration can be detected and the collection rebuilt.
+Metadata belongs to physical collections; an alias resolves to its target.
+"""
+
+import uuid
+from typing import Dict, Any, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams, PointStruct
+
+# Qdrant collections carry no free-form metadata, so it is kept as payload in
+# a tiny side collection with one point per described collection
+METADATA_COLLECTION = "rag_collection_metadata"
+
+
+def _point_id(collection_name: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"rag-collection:{collection_name}"))
+
+
+def resolve_collection_name(client: QdrantClient, name: str) -> str:
+    """Physical collection behind an alias (or the name itself)"""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == name:
+            return alias.collection_name
+    return name
+
+
+def _ensure_metadata_collection(client: QdrantClient):
+    if not client.collection_exists(METADATA_COLLECTION):
+        client.create_collection(
+            collection_name=METADATA_COLLECTION,
+            vectors_config=VectorParams(size=1, distance=Distance.DOT)
+        )
+
+
+def read_collection_metadata(client: QdrantClient, collection_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the metadata recorded for a collection
+
+    Args:
+        client: Qdrant client
+        collection_name: Described collection
+
+    Returns:
+        Metadata dictionary, or None if nothing was recorded
+    """
+    if not client.collection_exists(METADATA_COLLECTION):
+        return None
+    collection_name = resolve_collection_name(client, collection_name)
+    points = client.retrieve(METADATA_COLLECTION, ids=[_point_id(collection_name)], with_payload=True)
+    return points[0].payload if points else None
+
+
+def write_collection_metadata(client: QdrantClient, collection_name: str, metadata: Dict[str, Any]):
+    """
+    Record metadata for a collection, replacing what was there
+
+    Args:
+        client: Qdrant client
+        collection_name: Described collection
+        metadata: JSON-serialisable metadata
+    """
+    _ensure_metadata_collection(client)
+    collection_name = resolve_collection_name(client, collection_name)
+    client.upsert(
+        collection_name=METADATA_COLLECTION,
+        points=[PointStruct(id=_point_id(collection_name), vector=[1.0], payload=metadata)]
+    )
+
+
+def update_collection_metadata(client: QdrantClient, collection_name: str, **fields):
+    """Merge fields into the metadata recorded for a collection"""
+    metadata = read_collection_metadata(client, collection_name) or {}
+    metadata.update(fields)
+    write_collection_metadata(client, collection_name, metadata)
+
+
+def delete_collection_metadata(client: QdrantClient, collection_name: str):
+    """Forget the metadata recorded for a collection"""
+    if client.collection_exists(METADATA_COLLECTION):
+        client.delete(METADATA_COLLECTION, points_selector=[_point_id(collection_name)])
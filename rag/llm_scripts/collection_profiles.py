@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Collection profiles for the RAG system
+Named storage configurations for the wine_knowledge collection: vector
+quantization (scalar int8 / binary) with rescoring, on-disk vectors and
+payloads, and HNSW tuning
+"""
+
+import os
+from typing import Dict, Any, Optional
+
+from qdrant_client.models import (
+    Distance, VectorParams, HnswConfigDiff, SearchParams, QuantizationSearchParams,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    BinaryQuantization, BinaryQuantizationConfig, Disabled, VectorParamsDiff, OptimizersConfigDiff, CollectionParamsDiff
+)
+
+DEFAULT_COLLECTION_PROFILE = os.getenv("RAG_COLLECTION_PROFILE", "default")
+
+# Qdrant's default: segments above this size (KB of vectors) get an HNSW index
+DEFAULT_INDEXING_THRESHOLD = 20000
+
+
+class CollectionProfile:
+    """
+    Storage and search configuration for a collection
+
+    Quantized profiles keep the compressed vectors in RAM for the HNSW search
+    and rescore the top oversampling * limit candidates with the original
+    vectors, which can then live on disk.
+
+    Note: the embedded local mode (QdrantClient(path=...)) stores plain
+    vectors and searches exhaustively; quantization, on-disk storage and HNSW
+    settings only take effect on a Qdrant server.
+    """
+
+    def __init__(self, name: str, quantization: Optional[str] = None, on_disk_vectors: bool = False,
+                 on_disk_payload: bool = False, hnsw_m: int = 16, hnsw_ef_construct: int = 100,
+                 hnsw_on_disk: bool = False, search_ef: Optional[int] = None, rescore: bool = True,
+                 oversampling: float = 2.0, description: str = ""):
+        """
+        Args:
+            name: Profile name
+            quantization: None, "scalar" (int8) or "binary"
+            on_disk_vectors: Keep original vectors on disk (memmapped)
+            on_disk_payload: Keep payloads on disk
+            hnsw_m: Edges per node in the HNSW graph
+            hnsw_ef_construct: Candidate list size while building the graph
+            hnsw_on_disk: Keep the HNSW graph on disk
+            search_ef: Candidate list size at query time (None uses Qdrant's default)
+            rescore: Rescore quantized candidates with the original vectors
+            oversampling: Candidates fetched per requested result before rescoring
+            description: Human-readable summary
+        """
+        if quantization not in (None, "scalar", "binary"):
+            raise ValueError(f"Unknown quantization: {quantization}")
+        self.name = name
+        self.quantization = quantization
+        self.on_disk_vectors = on_disk_vectors
+        self.on_disk_payload = on_disk_payload
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construct = hnsw_ef_construct
+        self.hnsw_on_disk = hnsw_on_disk
+        self.search_ef = search_ef
+        self.rescore = rescore
+        self.oversampling = oversampling
+        self.description = description
+
+    def quantization_config(self):
+        """Quantization config for create_collection (None when disabled)"""
+        if self.quantization == "scalar":
+            return ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True))
+        if self.quantization == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        return None
+
+    def collection_config(self, dimension: int, bulk_load: bool = False) -> Dict[str, Any]:
+        """
+        Keyword arguments for QdrantClient.create_collection
+
+        Args:
+            dimension: Vector dimension
+            bulk_load: Create the collection for a bulk load: no HNSW graph
+                (m=0) and no indexing while points arrive; build the index
+                once at the end with indexing_config()
+
+        Returns:
+            Dictionary of create_collection arguments
+        """
+        config = {
+            'vectors_config': VectorParams(size=dimension, distance=Distance.COSINE, on_disk=self.on_disk_vectors),
+            'on_disk_payload': self.on_disk_payload,
+            'hnsw_config': HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct, on_disk=self.hnsw_on_disk),
+            'quantization_config': self.quantization_config(),
+        }
+        if bulk_load:
+            config['hnsw_config'] = HnswConfigDiff(m=0, ef_construct=self.hnsw_ef_construct, on_disk=self.hnsw_on_disk)
+            # Few large segments, merged and indexed once after the load
+            config['optimizers_config'] = OptimizersConfigDiff(indexing_threshold=0, default_segment_number=2)
+        return config
+
+    def indexing_config(self) -> Dict[str, Any]:
+        """Keyword arguments for QdrantClient.update_collection to index a bulk-loaded collection"""
+        return {
+            'hnsw_config': HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct, on_disk=self.hnsw_on_disk),
+            'optimizers_config': OptimizersConfigDiff(indexing_threshold=DEFAULT_INDEXING_THRESHOLD),
+        }
+
+    def update_config(self) -> Dict[str, Any]:
+        """Keyword arguments for QdrantClient.update_collection to switch an existing collection to this profile"""
+        return {
+            'vectors_config': {"": VectorParamsDiff(on_disk=self.on_disk_vectors)},
+            'collection_params': CollectionParamsDiff(on_disk_payload=self.on_disk_payload),
+            'hnsw_config': HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct, on_disk=self.hnsw_on_disk),
+            'quantization_config': self.quantization_config() or Disabled.DISABLED,
+        }
+
+    def search_params(self) -> Optional[SearchParams]:
+        """Search parameters matching the profile (None for plain float vectors)"""
+        if not self.quantization and self.search_ef is None:
+            return None
+        quantization = None
+        if self.quantization:
+            quantization = QuantizationSearchParams(rescore=self.rescore, oversampling=self.oversampling)
+        return SearchParams(hnsw_ef=self.search_ef, quantization=quantization)
+
+    def estimate_ram_bytes(self, points: int, dimension: int, avg_payload_bytes: int = 0) -> int:
+        """
+        Rough resident memory estimate for a collection using this profile
+
+        Counts vectors kept in RAM (original and/or quantized), the HNSW graph
+        links and in-memory payloads; ignores Qdrant's fixed overhead.
+        """
+        ram = 0
+        if not self.on_disk_vectors:
+            ram += points * dimension * 4
+        if self.quantization == "scalar":
+            ram += points * dimension
+        elif self.quantization == "binary":
+            ram += points * ((dimension + 7) // 8)
+        if not self.hnsw_on_disk:
+            # Layer 0 keeps 2*m links per node, 4 bytes each
+            ram += points * self.hnsw_m * 2 * 4
+        if not self.on_disk_payload:
+            ram += points * avg_payload_bytes
+        return ram
+
+    def describe(self) -> Dict[str, Any]:
+        """Profile settings, as recorded with the collection"""
+        return {
+            'name': self.name,
+            'quantization': self.quantization,
+            'on_disk_vectors': self.on_disk_vectors,
+            'on_disk_payload': self.on_disk_payload,
+            'hnsw_m': self.hnsw_m,
+            'hnsw_ef_construct': self.hnsw_ef_construct,
+            'hnsw_on_disk': self.hnsw_on_disk,
+            'search_ef': self.search_ef,
+            'rescore': self.rescore,
+            'oversampling': self.oversampling,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CollectionProfile":
+        """Rebuild a profile recorded with describe()"""
+        known = COLLECTION_PROFILES.get(data['name'])
+        if known is not None and known.describe() == data:
+            return known
+        return cls(**data)
+
+
+COLLECTION_PROFILES = {
+    'default': CollectionProfile(
+        'default',
+        description="Full float32 vectors, payloads and graph in RAM"
+    ),
+    'scalar_int8': CollectionProfile(
+        'scalar_int8', quantization="scalar", oversampling=2.0,
+        description="int8 vectors in RAM for search, float32 rescoring (~4x smaller search index)"
+    ),
+    'scalar_int8_on_disk': CollectionProfile(
+        'scalar_int8_on_disk', quantization="scalar", on_disk_vectors=True, on_disk_payload=True, oversampling=2.0,
+        description="int8 vectors in RAM, float32 vectors and payloads on disk"
+    ),
+    'binary': CollectionProfile(
+        'binary', quantization="binary", on_disk_vectors=True, on_disk_payload=True, oversampling=4.0,
+        description="1-bit vectors in RAM (~32x smaller), float32 rescoring from disk; best for >=768 dims"
+    ),
+    'on_disk': CollectionProfile(
+        'on_disk', on_disk_vectors=True, on_disk_payload=True, hnsw_on_disk=True,
+        description="Everything on disk, smallest RAM, slowest search"
+    ),
+    'low_memory_graph': CollectionProfile(
+        'low_memory_graph', quantization="scalar", on_disk_vectors=True, on_disk_payload=True,
+        hnsw_m=8, hnsw_ef_construct=64, search_ef=64,
+        description="int8 search vectors with a sparser HNSW graph (m=8)"
+    ),
+}
+
+
+def get_collection_profile(profile) -> CollectionProfile:
+    """Resolve a profile name (or pass a CollectionProfile through)"""
+    if isinstance(profile, CollectionProfile):
+        return profile
+    if profile not in COLLECTION_PROFILES:
+        raise ValueError(f"Unknown collection profile: {profile} (available: {', '.join(COLLECTION_PROFILES)})")
+    return COLLECTION_PROFILES[profile]
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Versioned collections for blue/green rebuilds
+The knowledge base name (wine_knowledge) is a Qdrant alias pointing at a
+versioned collection (wine_knowledge_v20250101T120000000000). Rebuilds fill
+a new version while readers keep using the alias, then the alias is switched
+in one atomic operation and old versions are garbage-collected.
+"""
+
+import logging
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    CollectionStatus, CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation
+)
+
+from llm_scripts.collection_metadata import delete_collection_metadata
+
+logger = logging.getLogger(__name__)
+
+
+def new_version_name(alias: str) -> str:
+    """Name for a new version of an aliased collection (sorts by creation time)"""
+    return f"{alias}_v{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')}"
+
+
+def get_alias_target(client: QdrantClient, alias: str) -> Optional[str]:
+    """Collection the alias points at, or None"""
+    for description in client.get_aliases().aliases:
+        if description.alias_name == alias:
+            return description.collection_name
+    return None
+
+
+def collection_or_alias_exists(client: QdrantClient, name: str) -> bool:
+    """Whether name is an existing collection or alias"""
+    return get_alias_target(client, name) is not None or client.collection_exists(name)
+
+
+def list_versions(client: QdrantClient, alias: str) -> List[str]:
+    """Versioned collections of an alias, oldest first"""
+    prefix = f"{alias}_v"
+    return sorted(c.name for c in client.get_collections().collections if c.name.startswith(prefix))
+
+
+def wait_until_indexed(client: QdrantClient, collection_name: str, timeout: float = 600.0,
+                       poll_interval: float = 1.0) -> bool:
+    """
+    Wait for the optimizer to finish indexing a collection
+
+    Returns:
+        True when the collection is green, False on timeout
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        status = client.get_collection(collection_name).status
+        if status == CollectionStatus.GREEN:
+            return True
+        if status == CollectionStatus.RED:
+            raise RuntimeError(f"Collection {collection_name} failed to optimize")
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(poll_interval)
+
+
+def swap_alias(client: QdrantClient, alias: str, collection_name: str) -> Optional[str]:
+    """
+    Point the alias at collection_name in a single atomic operation
+
+    A plain collection still named like the alias (built before versioning)
+    has to be dropped first, since an alias cannot shadow a collection; only
+    that one-time migration leaves a short window without the alias.
+
+    Args:
+        client: Qdrant client
+        alias: Alias readers use (e.g. wine_knowledge)
+        collection_name: Versioned collection to serve
+
+    Returns:
+        Collection the alias pointed at before, if any
+    """
+    previous = get_alias_target(client, alias)
+    if previous is None and client.collection_exists(alias):
+        logger.warning(f"Replacing unversioned collection {alias} with alias -> {collection_name}")
+        client.delete_collection(alias)
+        delete_collection_metadata(client, alias)
+
+    operations = []
+    if previous is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    operations.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=collection_name, alias_name=alias)))
+    client.update_collection_aliases(change_aliases_operations=operations)
+
+    logger.info(f"Alias {alias} -> {collection_name} (was {previous})")
+    return previous
+
+
+def garbage_collect_versions(client: QdrantClient, alias: str, keep: int = 1) -> List[str]:
+    """
+    Delete old versions of an aliased collection
+
+    Args:
+        client: Qdrant client
+        alias: Alias whose versions are collected
+        keep: Previous versions kept for rollback, besides the live one
+
+    Returns:
+        Names of the deleted collections
+    """
+    live = get_alias_target(client, alias)
+    if live is None:
+        return []
+    # Only versions older than the live one; newer ones may be rebuilds in progress
+    older = [name for name in list_versions(client, alias) if name < live]
+    doomed = older[:max(len(older) - keep, 0)]
+    for name in doomed:
+        client.delete_collection(name)
+        delete_collection_metadata(client, name)
+        logger.info(f"Deleted old collection version {name}")
+    return doomed
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Prompt context builder for the RAG system
+Fits retrieved documents into a hard token budget: long documents are
+compressed to their most query-relevant sentences (extractive, no model
+call) and documents are packed by relevance per token, so prompt size and
+prefill time stay predictable
+"""
+
+import os
+import re
+from typing import List, Dict, Any, Tuple
+
+from llm_scripts.reranking import tokenize
+
+# Defaults, overridable with environment variables
+DEFAULT_CONTEXT_TOKENS = int(os.getenv("RAG_CONTEXT_TOKENS", "1500"))
+DEFAULT_DOC_TOKENS = int(os.getenv("RAG_CONTEXT_DOC_TOKENS", "400"))
+
+# Llama-style BPE tokenizers average about 4 characters per token on English text
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_FIELD_RE = re.compile(r"^[A-Z][A-Za-z ]{1,30}:\s*\S")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token count estimate (no tokenizer needed)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def compress_text(text: str, query_terms: set, max_tokens: int) -> str:
+    """
+    Keep the sentences of a text most relevant to the query, within max_tokens
+
+    Sentences are scored by query-term overlap; short "Field: value" lines
+    (product facts) and the opening sentence get a bonus. Repeated sentences
+    are kept once and kept sentences stay in their original order.
+
+    Args:
+        text: Document text
+        query_terms: Tokenized query terms
+        max_tokens: Token budget for the result
+
+    Returns:
+        Compressed text (the text itself if it already fits)
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    sentences = [s.strip() for s in _SENTENCE_RE.split(text) if s and s.strip()]
+    scored = []
+    for i, sentence in enumerate(sentences):
+        terms = set(tokenize(sentence))
+        score = len(terms & query_terms) / (len(query_terms) or 1)
+        if _FIELD_RE.match(sentence) and len(sentence) < 120:
+            score += 0.5
+        if i == 0:
+            score += 0.25
+        scored.append((score, i))
+
+    budget = max_tokens
+    kept = []
+    seen = set()
+    for score, i in sorted(scored, key=lambda item: (-item[0], item[1])):
+        cost = estimate_tokens(sentences[i]) + 1
+        if cost <= budget and sentences[i] not in seen:
+            kept.append(i)
+            seen.add(sentences[i])
+            budget -= cost
+
+    if not kept:
+        # Not even one sentence fits: hard-truncate the best one
+        best = sentences[min(scored, key=lambda item: (-item[0], item[1]))[1]]
+        return best[:max_tokens * CHARS_PER_TOKEN].rstrip() + " …"
+    return "\n".join(sentences[i] for i in sorted(kept))
+
+
+def build_context(query: str, documents: List[Dict[str, Any]], max_tokens: int = DEFAULT_CONTEXT_TOKENS,
+                  max_doc_tokens: int = DEFAULT_DOC_TOKENS) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build the prompt context for retrieved documents within a token budget
+
+    The most relevant document is always included (compressed if needed);
+    the rest are packed greedily by relevance per token. Wine products are
+    listed first, as the prompt expects.
+
+    Args:
+        query: User question
+        documents: Retrieved documents ({content, metadata, score[, rerank_score]})
+        max_tokens: Token budget for the whole context
+        max_doc_tokens: Token budget for a single document
+
+    Returns:
+        Tuple of (context text, stats with documents, dropped, compressed and tokens)
+    """
+    query_terms = set(tokenize(query))
+    candidates = []
+    for rank, doc in enumerate(documents):
+        text = compress_text(doc['content'], query_terms, max_doc_tokens)
+        relevance = doc.get('rerank_score', doc.get('score'))
+        # Documents without a score keep their retrieval order
+        relevance = float(relevance) if relevance is not None else 1.0 / (rank + 1)
+        candidates.append({
+            'doc': doc, 'text': text, 'tokens': estimate_tokens(text) + 2,
+            'relevance': max(relevance, 1e-6), 'rank': rank, 'compressed': text != doc['content']
+        })
+
+    selected = []
+    budget = max_tokens
+    if candidates:
+        top = max(candidates, key=lambda c: (c['relevance'], -c['rank']))
+        if top['tokens'] > budget:
+            top['text'] = compress_text(top['text'], query_terms, budget - 2)
+            top['tokens'] = estimate_tokens(top['text']) + 2
+            top['compressed'] = True
+        selected.append(top)
+        budget -= top['tokens']
+        for candidate in sorted(candidates, key=lambda c: (-c['relevance'] / c['tokens'], c['rank'])):
+            if candidate is not top and candidate['tokens'] <= budget:
+                selected.append(candidate)
+                budget -= candidate['tokens']
+
+    selected.sort(key=lambda c: c['rank'])
+    wine_products = [c for c in selected if c['doc']['metadata'].get('type') == 'wine_product']
+    other_docs = [c for c in selected if c['doc']['metadata'].get('type') != 'wine_product']
+
+    context_parts = []
+    if wine_products:
+        context_parts.append("WINE PRODUCTS:")
+        context_parts.extend(f"- {c['text']}" for c in wine_products)
+    if other_docs:
+        context_parts.append("\nADDITIONAL INFORMATION:" if wine_products else "ADDITIONAL INFORMATION:")
+        context_parts.extend(f"- {c['text']}" for c in other_docs)
+    context = "\n".join(context_parts)
+
+    stats = {
+        'documents': len(selected),
+        'dropped': len(candidates) - len(selected),
+        'compressed': sum(c['compressed'] for c in selected),
+        'tokens': estimate_tokens(context),
+        'budget': max_tokens,
+    }
+    return context, stats
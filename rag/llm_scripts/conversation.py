@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Conversation memory for the RAG system
+Sessions keyed by conversation id, kept in memory with LRU eviction and a TTL
+and optionally backed by SQLite. Follow-up questions are rewritten with the
+conversation's topic before retrieval, and turns beyond the most recent few
+are folded into a rolling summary so each session's prompt share stays bounded.
+Turns of one conversation are serialised so concurrent messages don't lose
+each other's history.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Callable, Iterator
+
+from llm_scripts.context_builder import estimate_tokens
+
+# Defaults, overridable with environment variables
+SESSION_MAX = int(os.getenv("RAG_SESSION_MAX", "1000"))
+SESSION_TTL = float(os.getenv("RAG_SESSION_TTL", "3600"))
+SESSION_DB = os.getenv("RAG_SESSION_DB") or None
+SESSION_TURNS = int(os.getenv("RAG_SESSION_TURNS", "4"))
+SUMMARY_TOKENS = int(os.getenv("RAG_SESSION_SUMMARY_TOKENS", "200"))
+SESSION_PURGE_EVERY = int(os.getenv("RAG_SESSION_PURGE_EVERY", "100"))
+
+# Stored answers and answers quoted in the prompt are cut to these sizes
+MAX_ANSWER_CHARS = 2000
+HISTORY_ANSWER_TOKENS = 60
+
+# Follow-ups open with a connective or a reference to an earlier answer, or
+# point back at it with an anaphoric "one"/trailing pronoun; "that", "this",
+# "more" or "other" elsewhere in a question are ordinary words
+_FOLLOW_UP_START_RE = re.compile(
+    r"^(and|also|but|so|what about|how about|what else|anything else|any other|which one|is it|is that|"
+    r"are they|are there|does it|do they|can i|same|it|its|they|them|those|these|that one|this one|"
+    r"the same|the other|another|something (similar|cheaper|else)|(a )?(cheaper|pricier|similar)|"
+    r"(more|less) expensive)\b"
+)
+_FOLLOW_UP_REFERENCE_RE = re.compile(
+    r"\b(that|this|the same|the other|another|(a |any )?(cheaper|pricier|similar|other)) ones?\b|"
+    r"\b(it|they|them|those|these)\W*$"
+)
+_FOLLOW_UP_MAX_WORDS = 10
+
+
+def _first_sentences(text: str, max_tokens: int) -> str:
+    """Opening of a text cut at a sentence boundary within max_tokens"""
+    text = " ".join(text.split())
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max_tokens * 4]
+    end = max(cut.rfind(". "), cut.rfind("? "), cut.rfind("! "))
+    return cut[:end + 1] if end > 0 else cut.rstrip() + " …"
+
+
+def summarize_turns(summary: str, turns: List[Dict[str, Any]], max_tokens: int = SUMMARY_TOKENS) -> str:
+    """
+    Default rolling summary: one extractive line per folded turn
+
+    Keeps the newest lines that fit in max_tokens, so the summary never
+    grows past the budget. Any callable with this signature can be passed
+    to SessionStore instead (e.g. one that asks the LLM to summarise).
+    """
+    lines = [line for line in summary.split("\n") if line]
+    for turn in turns:
+        lines.append(f"- Asked: {turn['question']} Answered: {_first_sentences(turn['answer'], 30)}")
+    kept = []
+    budget = max_tokens
+    for line in reversed(lines):
+        cost = estimate_tokens(line) + 1
+        if cost > budget:
+            break
+        kept.append(line)
+        budget -= cost
+    return "\n".join(reversed(kept))
+
+
+class ConversationSession:
+    """
+    One conversation: recent turns, a rolling summary and the current topic
+
+    The topic is the last standalone question; follow-ups are searched as
+    "<topic> <follow-up>" so retrieval keeps the subject of the conversation.
+    """
+
+    def __init__(self, conversation_id: str, turns: List[Dict[str, Any]] = None, summary: str = "",
+                 topic: str = "", last_active: float = None, max_turns: int = SESSION_TURNS,
+                 summary_tokens: int = SUMMARY_TOKENS,
+                 summarizer: Callable[[str, List[Dict[str, Any]], int], str] = summarize_turns):
+        self.conversation_id = conversation_id
+        self.turns = turns or []
+        self.summary = summary
+        self.topic = topic
+        self.last_active = last_active or time.time()
+        self.max_turns = max_turns
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+
+    def is_follow_up(self, question: str) -> bool:
+        """Short questions that lean on earlier turns ("what about a cheaper one?")"""
+        if not self.topic:
+            return False
+        text = question.lower().strip()
+        if len(text.split()) > _FOLLOW_UP_MAX_WORDS:
+            return False
+        return bool(_FOLLOW_UP_START_RE.search(text) or _FOLLOW_UP_REFERENCE_RE.search(text))
+
+    def rewrite_query(self, question: str) -> str:
+        """Standalone search query for a question in this conversation"""
+        if self.is_follow_up(question):
+            return f"{self.topic} {question}"
+        return question
+
+    def add_turn(self, question: str, answer: str, search_query: str = None):
+        """
+        Record a turn and fold the oldest turns into the summary
+
+        Args:
+            question: User question as asked
+            answer: Assistant answer
+            search_query: Rewritten query used for retrieval
+        """
+        if not self.is_follow_up(question):
+            self.topic = question
+        self.turns.append({
+            'question': question,
+            'answer': answer[:MAX_ANSWER_CHARS],
+            'search_query': search_query or question,
+        })
+        if len(self.turns) > self.max_turns:
+            folded = self.turns[:-self.max_turns]
+            self.turns = self.turns[-self.max_turns:]
+            self.summary = self.summarizer(self.summary, folded, self.summary_tokens)
+        self.last_active = time.time()
+
+    def prompt_history(self) -> str:
+        """Summary and recent turns for the prompt ("" for a new conversation)"""
+        parts = []
+        if self.summary:
+            parts.append(f"Earlier in this conversation:\n{self.summary}")
+        for turn in self.turns:
+            parts.append(f"Customer: {turn['question']}")
+            parts.append(f"Assistant: {_first_sentences(turn['answer'], HISTORY_ANSWER_TOKENS)}")
+        return "\n".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'conversation_id': self.conversation_id,
+            'turns': self.turns,
+            'summary': self.summary,
+            'topic': self.topic,
+            'last_active': self.last_active,
+        }
+
+
+class SessionStore:
+    """
+    Conversation sessions with LRU eviction, TTL and optional SQLite backing
+
+    At most max_sessions sessions are held in memory. With a db_path,
+    evicted sessions are reloaded from SQLite on their next message; without
+    one they are dropped. Sessions idle for longer than ttl_seconds expire
+    and are purged every purge_every saves. Safe to share between threads;
+    use turn() to serialise concurrent messages of one conversation.
+    """
+
+    def __init__(self, max_sessions: int = SESSION_MAX, ttl_seconds: float = SESSION_TTL,
+                 db_path: Optional[str] = SESSION_DB, max_turns: int = SESSION_TURNS,
+                 summary_tokens: int = SUMMARY_TOKENS,
+                 summarizer: Callable[[str, List[Dict[str, Any]], int], str] = summarize_turns,
+                 purge_every: int = SESSION_PURGE_EVERY):
+        """
+        Args:
+            max_sessions: Sessions kept in memory
+            ttl_seconds: Idle time after which a session expires
+            db_path: SQLite file for persistence (None keeps sessions in memory only)
+            max_turns: Recent turns kept verbatim per session
+            summary_tokens: Token budget of each session's rolling summary
+            summarizer: Folds old turns into the summary
+            purge_every: Saves between purges of expired sessions (0 disables)
+        """
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+        self.purge_every = purge_every
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Per-conversation turn locks: [lock, holders and waiters]
+        self._turn_locks: Dict[str, list] = {}
+        self._saves = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, last_active REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def _new_session(self, conversation_id: str, data: Dict[str, Any] = None) -> ConversationSession:
+        data = data or {}
+        return ConversationSession(
+            conversation_id, turns=data.get('turns'), summary=data.get('summary', ""), topic=data.get('topic', ""),
+            last_active=data.get('last_active'), max_turns=self.max_turns, summary_tokens=self.summary_tokens,
+            summarizer=self.summarizer
+        )
+
+    def _expired(self, session: ConversationSession, now: float) -> bool:
+        return now - session.last_active > self.ttl_seconds
+
+    def _load(self, conversation_id: str) -> Optional[ConversationSession]:
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT data FROM sessions WHERE id = ?", (conversation_id,)).fetchone()
+        return self._new_session(conversation_id, json.loads(row[0])) if row else None
+
+    def _remember(self, session: ConversationSession):
+        self._sessions[session.conversation_id] = session
+        self._sessions.move_to_end(session.conversation_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def get(self, conversation_id: Optional[str] = None) -> ConversationSession:
+        """
+        Session for a conversation id
+
+        Unknown, expired or missing ids start a new conversation (with a new
+        id when none was given).
+        """
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(conversation_id) if conversation_id else None
+            if session is None and conversation_id:
+                session = self._load(conversation_id)
+            if session is not None and self._expired(session, now):
+                self._delete(conversation_id)
+                session = None
+            if session is None:
+                session = self._new_session(conversation_id or uuid.uuid4().hex, {'last_active': now})
+            self._remember(session)
+            return session
+
+    def save(self, session: ConversationSession):
+        """Store a session after a turn, purging expired sessions every purge_every saves"""
+        with self._lock:
+            self._remember(session)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sessions (id, data, last_active) VALUES (?, ?, ?)",
+                    (session.conversation_id, json.dumps(session.to_dict()), session.last_active)
+                )
+                self._db.commit()
+            self._saves += 1
+            purge = self.purge_every > 0 and self._saves % self.purge_every == 0
+        if purge:
+            self.purge_expired()
+
+    @contextmanager
+    def turn(self, conversation_id: Optional[str] = None) -> Iterator[ConversationSession]:
+        """
+        Session for one message, held exclusively and saved afterwards
+
+        Concurrent messages of the same conversation wait for each other, so
+        each one sees the turns added before it. Blocks; call from a worker
+        thread in async code. The session is not saved if the block raises.
+        """
+        if not conversation_id:
+            session = self.get()
+            yield session
+            self.save(session)
+            return
+        with self._lock:
+            entry = self._turn_locks.setdefault(conversation_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                session = self.get(conversation_id)
+                yield session
+                self.save(session)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._turn_locks[conversation_id]
+
+    def _delete(self, conversation_id: str):
+        self._sessions.pop(conversation_id, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (conversation_id,))
+            self._db.commit()
+
+    def delete(self, conversation_id: str):
+        """Forget a conversation"""
+        with self._lock:
+            self._delete(conversation_id)
+
+    def purge_expired(self) -> int:
+        """Drop expired sessions from memory and SQLite; returns how many were in memory"""
+        now = time.time()
+        with self._lock:
+            expired = [cid for cid, session in self._sessions.items() if self._expired(session, now)]
+            for cid in expired:
+                self._sessions.pop(cid)
+            if self._db is not None:
+                self._db.execute("DELETE FROM sessions WHERE last_active < ?", (now - self.ttl_seconds,))
+                self._db.commit()
+        return len(expired)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection for the RAG system
+Drops exact and near-duplicate chunks (exact hash + MinHash LSH) before they
+are embedded, so overlapping email exports and quoted reply chains are only
+stored once
+"""
+
+import hashlib
+import re
+import zlib
+from typing import List, Dict, Any, Tuple, Optional, Iterable
+
+import numpy as np
+
+# Free-text document types; structured records (e.g. wine_product) can share
+# long marketing copy while describing different products, so they are never
+# merged
+DEDUP_TYPES = frozenset({
+    'email', 'pdf', 'customer_question', 'business_response', 'conversation', 'customer_review', 'faq', 'note'
+})
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_QUOTE_MARKER_RE = re.compile(r"^\s*>+\s?", re.MULTILINE)
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize_text(text: str) -> str:
+    """Normalise text so trivially different copies hash the same"""
+    text = _QUOTE_MARKER_RE.sub("", text)
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+class MinHashDeduplicator:
+    """
+    Exact and near-duplicate detector using MinHash signatures and LSH banding
+
+    Documents are compared on word shingles. Candidate pairs come from LSH
+    buckets and are confirmed with the estimated Jaccard similarity, so the
+    cost stays roughly linear in the number of chunks.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, bands: int = 32, shingle_size: int = 5, seed: int = 1):
+        """
+        Args:
+            threshold: Estimated Jaccard similarity above which chunks are duplicates
+            num_perm: Number of MinHash permutations
+            bands: Number of LSH bands (must divide num_perm)
+            shingle_size: Words per shingle
+            seed: Seed for the permutation coefficients
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        # Coefficients and shingle hashes are below 2^32, so a * x + b stays
+        # below 2^64 and the uint64 arithmetic never wraps before the mod p
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+
+    def _shingles(self, text: str) -> np.ndarray:
+        words = text.split()
+        if len(words) <= self.shingle_size:
+            grams = [" ".join(words)]
+        else:
+            grams = [" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+        return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in set(grams)), dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of already-normalised text"""
+        shingles = self._shingles(text)
+        # (num_perm, n_shingles) universal hashes, reduced with a column-wise min
+        hashed = (np.outer(self._a, shingles) + self._b[:, None]) % _MERSENNE_PRIME
+        return (hashed & _MAX_HASH).min(axis=1)
+
+    def find_duplicates(self, texts: List[str]) -> List[int]:
+        """
+        Map every text to the index of the first text it duplicates
+
+        Args:
+            texts: Texts to compare
+
+        Returns:
+            List where entry i is i itself for unique texts, or the index of
+            the earlier text that i duplicates
+        """
+        canonical = list(range(len(texts)))
+        exact_seen: Dict[str, int] = {}
+        buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        signatures: Dict[int, np.ndarray] = {}
+
+        for i, text in enumerate(texts):
+            normalized = normalize_text(text)
+            digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+            if digest in exact_seen:
+                canonical[i] = exact_seen[digest]
+                continue
+            exact_seen[digest] = i
+
+            signature = self.signature(normalized)
+            match = None
+            keys = []
+            for band in range(self.bands):
+                key = (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                keys.append(key)
+                if match is not None:
+                    continue
+                for candidate in buckets.get(key, ()):
+                    if np.mean(signatures[candidate] == signature) >= self.threshold:
+                        match = candidate
+                        break
+
+            if match is not None:
+                canonical[i] = match
+                continue
+
+            signatures[i] = signature
+            for key in keys:
+                buckets.setdefault(key, []).append(i)
+
+        return canonical
+
+
+def deduplicate_chunks(chunks: List[Any], deduplicator: MinHashDeduplicator = None,
+                       types: Optional[Iterable[str]] = DEDUP_TYPES) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Drop duplicate chunks, merging their ids into the surviving chunk
+
+    Args:
+        chunks: Chunk objects with page_content and metadata attributes
+        deduplicator: Detector to use (defaults to MinHashDeduplicator())
+        types: metadata['type'] values eligible for deduplication; other
+            chunks are always kept (None compares every chunk)
+
+    Returns:
+        Tuple of (unique chunks, stats dictionary)
+    """
+    deduplicator = deduplicator or MinHashDeduplicator()
+    types = frozenset(types) if types is not None else None
+    eligible = [i for i, chunk in enumerate(chunks) if types is None or chunk.metadata.get('type') in types]
+    canonical = list(range(len(chunks)))
+    matches = deduplicator.find_duplicates([chunks[i].page_content for i in eligible])
+    for position, i in enumerate(eligible):
+        canonical[i] = eligible[matches[position]]
+
+    unique = []
+    exact = near = chars_saved = 0
+    for i, chunk in enumerate(chunks):
+        keep = canonical[i]
+        if keep == i:
+            unique.append(chunk)
+            continue
+
+        survivor = chunks[keep]
+        if normalize_text(chunk.page_content) == normalize_text(survivor.page_content):
+            exact += 1
+        else:
+            near += 1
+        chars_saved += len(chunk.page_content)
+
+        duplicate_id = chunk.metadata.get('chunk_id')
+        if duplicate_id:
+            survivor.metadata.setdefault('duplicate_ids', []).append(duplicate_id)
+
+    stats = {
+        'input_chunks': len(chunks),
+        'unique_chunks': len(unique),
+        'exact_duplicates': exact,
+        'near_duplicates': near,
+        'chars_saved': chars_saved,
+        'saved_ratio': (exact + near) / len(chunks) if chunks else 0.0
+    }
+    return unique, stats
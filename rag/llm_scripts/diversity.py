@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Result diversification for the RAG system
+Maximal marginal relevance over candidate vectors and per-source collapsing,
+so overlapping chunks, reply chains and similar reviews do not fill the
+context with near-identical text
+"""
+
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.clip(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12, None)
+
+
+def mmr_select(query_vector: np.ndarray, candidate_vectors: np.ndarray, limit: int, lambda_mult: float = 0.7,
+               relevance: Optional[np.ndarray] = None) -> List[int]:
+    """
+    Pick candidates by maximal marginal relevance
+
+    Each step takes the candidate maximising
+    lambda * relevance - (1 - lambda) * max similarity to those already picked.
+    The candidate similarity matrix is computed once and the running maximum
+    is updated with one vector operation per pick.
+
+    Args:
+        query_vector: (dim,) query embedding
+        candidate_vectors: (n, dim) candidate embeddings
+        limit: Number of candidates to pick
+        lambda_mult: 1.0 ranks by relevance only, 0.0 by diversity only
+        relevance: (n,) relevance scores (defaults to cosine similarity to the query)
+
+    Returns:
+        Indices of the picked candidates, in pick order
+    """
+    n = len(candidate_vectors)
+    limit = min(limit, n)
+    if limit <= 0:
+        return []
+
+    vectors = _normalize(np.asarray(candidate_vectors, dtype=np.float32))
+    if relevance is None:
+        relevance = vectors @ _normalize(np.asarray(query_vector, dtype=np.float32))
+    relevance = np.asarray(relevance, dtype=np.float32)
+    similarity = vectors @ vectors.T
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < limit:
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return selected
+
+
+def collapse_by_source(documents: List[Dict[str, Any]], max_per_source: int = 1) -> List[int]:
+    """
+    Keep at most max_per_source chunks of each source document
+
+    Documents are expected best first; chunks are grouped by
+    metadata['original_id'] and chunks without one are always kept.
+
+    Returns:
+        Indices of the kept documents, in input order
+    """
+    kept = []
+    seen: Dict[Any, int] = {}
+    for i, doc in enumerate(documents):
+        source = (doc.get('metadata') or {}).get('original_id')
+        if source is not None:
+            if seen.get(source, 0) >= max_per_source:
+                continue
+            seen[source] = seen.get(source, 0) + 1
+        kept.append(i)
+    return kept
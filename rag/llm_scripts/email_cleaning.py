@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Email normalisation for the RAG system
+Converts HTML to text and strips quoted replies, signatures and legal
+boilerplate so only the new content of each email is chunked and embedded
+"""
+
+import html
+import re
+from typing import List
+
+# Separator used to run the markup passes over a whole batch at once
+_RECORD_SEPARATOR = "\x1e"
+
+# HTML to text
+_HTML_HINT_RE = re.compile(r"<\s*(html|body|div|p|br|table|span)\b", re.IGNORECASE)
+_HTML_DROP_RE = re.compile(r"<(script|style|head)\b[^\x1e]*?</\1\s*>", re.IGNORECASE)
+_HTML_QUOTE_RE = re.compile(r"<blockquote\b[^\x1e]*?</blockquote\s*>|<div[^>]*class=\"?gmail_quote[^\x1e]*", re.IGNORECASE)
+_HTML_BREAK_RE = re.compile(r"<\s*(br|/p|/div|/tr|/li|/h[1-6])\s*/?>", re.IGNORECASE)
+_HTML_TAG_RE = re.compile(r"<[^>\x1e]+>")
+
+# Quoted history: everything from the reply header onwards is dropped
+_REPLY_HEADER_RE = re.compile(
+    r"^(?:"
+    r"On .{0,200}?wrote:\s*$"
+    r"|-{2,}\s*(?:Original Message|Forwarded message)\s*-{2,}"
+    r"|_{10,}\s*$"
+    r"|From:\s.*\n(?:.*\n){0,3}?(?:Sent|Date):\s"
+    r")",
+    re.IGNORECASE | re.MULTILINE
+)
+_QUOTED_LINE_RE = re.compile(r"^\s*>.*(?:\n|$)", re.MULTILINE)
+
+# Signatures and boilerplate
+_SIGNATURE_RE = re.compile(
+    r"^(?:--\s*$"
+    r"|(?:Sent from my|Get Outlook for)\b.*$"
+    r"|(?:Best|Kind|Warm)?\s*regards,?\s*$"
+    r"|(?:Thanks|Thank you|Cheers|Sincerely|Best),?\s*$)",
+    re.IGNORECASE | re.MULTILINE
+)
+_BOILERPLATE_RE = re.compile(
+    r"^[^\n\x1e]*(?:"
+    r"this (?:e-?mail|message)(?: and any attachments)? (?:is|are|may be) (?:confidential|intended)"
+    r"|unsubscribe|manage your (?:email )?preferences|view (?:this email )?in (?:your )?browser"
+    r"|please consider the environment before printing"
+    r")[^\n\x1e]*$",
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Whitespace
+_TRAILING_SPACE_RE = re.compile(r"[ \t]+(?=\n|$)")
+_INLINE_SPACE_RE = re.compile(r"[ \t]{2,}")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+# A signature marker only ends the message when it starts the trailing block:
+# at most a few short name/contact lines may follow it, none of them prose
+_MAX_SIGNATURE_LINES = 8
+_MAX_SIGNATURE_LINE_CHARS = 60
+_SENTENCE_RE = re.compile(r"^(?:\S+\s+){3,}\S*[.!?]$")
+
+
+def _html_to_text(batch: str) -> str:
+    batch = _HTML_DROP_RE.sub("", batch)
+    batch = _HTML_QUOTE_RE.sub("", batch)
+    batch = _HTML_BREAK_RE.sub("\n", batch)
+    batch = _HTML_TAG_RE.sub("", batch)
+    return html.unescape(batch)
+
+
+def _strip_quoted_history(body: str) -> str:
+    match = _REPLY_HEADER_RE.search(body)
+    if match and match.start() > 0:
+        body = body[:match.start()]
+    return _QUOTED_LINE_RE.sub("", body)
+
+
+def _is_signature_block(text: str) -> bool:
+    """True when text only holds short name/contact lines (no sentences)"""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if len(lines) > _MAX_SIGNATURE_LINES:
+        return False
+    return all(len(line) <= _MAX_SIGNATURE_LINE_CHARS and not _SENTENCE_RE.match(line) for line in lines)
+
+
+def _strip_signature(body: str) -> str:
+    for match in _SIGNATURE_RE.finditer(body):
+        if match.start() == 0:
+            continue
+        if _is_signature_block(body[match.end():]):
+            return body[:match.start()]
+    return body
+
+
+def clean_email_bodies(bodies: List[str]) -> List[str]:
+    """
+    Normalise a batch of email bodies for chunking
+
+    Markup, boilerplate and whitespace passes run once over the whole batch
+    (joined with a record separator); quoted history and signatures are cut
+    per message because they depend on where each message ends.
+
+    Args:
+        bodies: Raw text/plain or text/html email bodies
+
+    Returns:
+        Cleaned bodies, in the same order
+    """
+    if not bodies:
+        return []
+
+    bodies = [(body or "").replace(_RECORD_SEPARATOR, " ").replace("\r\n", "\n") for body in bodies]
+
+    # HTML parts are converted together; plain text parts are left untouched
+    html_indexes = [i for i, body in enumerate(bodies) if _HTML_HINT_RE.search(body)]
+    if html_indexes:
+        converted = _html_to_text(_RECORD_SEPARATOR.join(bodies[i] for i in html_indexes))
+        for i, text in zip(html_indexes, converted.split(_RECORD_SEPARATOR)):
+            bodies[i] = text
+
+    bodies = [_strip_signature(_strip_quoted_history(body)) for body in bodies]
+
+    batch = f"\n{_RECORD_SEPARATOR}\n".join(bodies)
+    batch = _BOILERPLATE_RE.sub("", batch)
+    batch = _TRAILING_SPACE_RE.sub("", batch.replace("\xa0", " "))
+    batch = _INLINE_SPACE_RE.sub(" ", batch)
+    batch = _BLANK_LINES_RE.sub("\n\n", batch)
+
+    return [body.strip() for body in batch.split(_RECORD_SEPARATOR)]
+
+
+def clean_email_body(body: str) -> str:
+    """Normalise a single email body (see clean_email_bodies)"""
+    return clean_email_bodies([body])[0]
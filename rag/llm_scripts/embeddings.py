@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Embedding backends for the RAG system
+Embeddings are configured independently of the generation LLM. Every backend
+implements EmbeddingBackend, declares its dimension and maximum batch size,
+and embeds whole batches per call, so ingestion and query code never depend
+on which one is active. Concurrent query embeddings are micro-batched.
+"""
+
+import hashlib
+import os
+import queue
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+
+# Defaults, overridable with environment variables
+DEFAULT_EMBEDDING_BACKEND = os.getenv("RAG_EMBEDDING_BACKEND", "ollama")
+DEFAULT_OLLAMA_EMBEDDING_MODEL = os.getenv("RAG_EMBEDDING_MODEL", "nomic-embed-text")
+DEFAULT_LOCAL_EMBEDDING_MODEL = os.getenv(
+    "RAG_LOCAL_EMBEDDING_MODEL",
+    str(Path(__file__).parent.parent / "models" / "all-MiniLM-L6-v2")
+)
+QUERY_BATCH_SIZE = int(os.getenv("RAG_QUERY_BATCH_SIZE", "32"))
+QUERY_BATCH_WAIT_MS = float(os.getenv("RAG_QUERY_BATCH_WAIT_MS", "2"))
+
+
+class EmbeddingBackend(ABC):
+    """
+    Base class for embedding backends
+
+    Subclasses implement _embed_batch for at most max_batch_size texts and
+    return an (n, dimension) float32 array; batching, list conversion and the
+    LangChain-style embed_documents/embed_query interface are shared.
+    """
+
+    name: str = "base"
+    max_batch_size: int = 32
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        """Length of the vectors produced by this backend"""
+
+    @property
+    @abstractmethod
+    def model(self) -> str:
+        """Model identifier recorded with the collections this backend builds"""
+
+    @abstractmethod
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed at most max_batch_size texts"""
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into an (n, dimension) array, batching as needed"""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        batches = [
+            self._embed_batch(texts[i:i + self.max_batch_size])
+            for i in range(0, len(texts), self.max_batch_size)
+        ]
+        return np.vstack(batches).astype(np.float32, copy=False)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of texts"""
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single text"""
+        return self.embed_array([text])[0].tolist()
+
+    def describe(self) -> Dict[str, Any]:
+        """Identity of this embedder, as recorded with the collections it builds"""
+        return {'backend': self.name, 'model': self.model, 'dimension': self.dimension}
+
+
+class OllamaEmbeddingBackend(EmbeddingBackend):
+    """
+    Embedding model served by Ollama
+
+    Uses the batched /api/embed endpoint, so a whole batch costs one HTTP
+    request over a pooled connection instead of one request per text.
+    """
+
+    name = "ollama"
+
+    def __init__(self, model: str = DEFAULT_OLLAMA_EMBEDDING_MODEL, host: str = None,
+                 max_batch_size: int = 64, keep_alive: str = "30m"):
+        """
+        Args:
+            model: Ollama embedding model
+            host: Ollama server URL (defaults to OLLAMA_HOST or localhost)
+            max_batch_size: Texts sent per request
+            keep_alive: How long Ollama keeps the model loaded between requests
+        """
+        from ollama import Client
+
+        self._model = model
+        self.max_batch_size = max_batch_size
+        self.keep_alive = keep_alive
+        self.client = Client(host=host)
+        self._dimension = None
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    @property
+    def dimension(self) -> int:
+        # Ollama does not expose the dimension, so probe once
+        if self._dimension is None:
+            self._dimension = self._embed_batch(["dimension probe"]).shape[1]
+        return self._dimension
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        response = self.client.embed(model=self._model, input=texts, keep_alive=self.keep_alive)
+        vectors = np.asarray(response['embeddings'], dtype=np.float32)
+        self._dimension = vectors.shape[1]
+        return vectors
+
+
+class LocalOnnxEmbeddingBackend(EmbeddingBackend):
+    """
+    In-process CPU sentence embedder
+
+    Runs a sentence-transformers model exported to ONNX (a directory with
+    model.onnx and tokenizer.json, e.g. all-MiniLM-L6-v2) with onnxruntime,
+    then mean-pools and L2-normalises the token vectors in NumPy. No Ollama
+    server and no HTTP round trip are involved.
+    """
+
+    name = "local"
+
+    def __init__(self, model_dir: str = DEFAULT_LOCAL_EMBEDDING_MODEL, max_length: int = 256,
+                 max_batch_size: int = 32, threads: int = None):
+        """
+        Args:
+            model_dir: Directory containing model.onnx and tokenizer.json
+            max_length: Maximum tokens per text (longer texts are truncated)
+            max_batch_size: Texts per inference call
+            threads: Intra-op threads for onnxruntime (defaults to all cores)
+        """
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError(
+                "The local embedding backend needs onnxruntime and tokenizers: "
+                "pip install onnxruntime tokenizers"
+            ) from e
+
+        model_path = Path(model_dir)
+        onnx_file = model_path / "model.onnx"
+        if not onnx_file.exists():
+            onnx_file = model_path / "onnx" / "model.onnx"
+
+        self.model_dir = str(model_path)
+        self.max_batch_size = max_batch_size
+
+        self.tokenizer = Tokenizer.from_file(str(model_path / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(str(onnx_file), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self._dimension = self.session.get_outputs()[0].shape[-1]
+        if not isinstance(self._dimension, int):
+            self._dimension = self._embed_batch(["dimension probe"]).shape[1]
+
+    @property
+    def model(self) -> str:
+        return Path(self.model_dir).name
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_vectors = self.session.run(None, inputs)[0]
+
+        # Mean pooling over real tokens, then L2 normalisation
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_vectors * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+
+class HashEmbeddingBackend(EmbeddingBackend):
+    """
+    Deterministic hash-based embedder for tests and offline benchmarks
+
+    Words and character trigrams are hashed into signed buckets (the hashing
+    trick), so texts sharing vocabulary get similar vectors. Results are
+    identical across processes and machines and need no model.
+    """
+
+    name = "hash"
+
+    _TOKEN_RE = re.compile(r"\w+")
+
+    def __init__(self, dimension: int = 256, max_batch_size: int = 256):
+        """
+        Args:
+            dimension: Vector length
+            max_batch_size: Texts per batch
+        """
+        self._dimension = dimension
+        self.max_batch_size = max_batch_size
+
+    @property
+    def model(self) -> str:
+        return f"hash-{self._dimension}"
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def _features(self, text: str) -> List[str]:
+        words = self._TOKEN_RE.findall(text.lower())
+        trigrams = [f"#{w[i:i + 3]}" for w in words for i in range(max(1, len(w) - 2))]
+        return words + trigrams
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self._dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                vectors[row, value % self._dimension] += 1.0 if value & (1 << 63) else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.clip(norms, 1e-12, None)
+
+
+EMBEDDING_BACKENDS = {
+    'ollama': OllamaEmbeddingBackend,
+    'local': LocalOnnxEmbeddingBackend,
+    'hash': HashEmbeddingBackend,
+}
+
+
+class QueryBatcher:
+    """
+    Micro-batcher for query embeddings
+
+    Callers block in embed() while a worker thread collects requests for up
+    to max_wait_ms after the first one (or until max_batch_size are queued),
+    embeds them with one backend call and resolves each caller's future.
+    The window is only waited for while queries are actually concurrent (a
+    moving average of how many other callers are waiting when one arrives),
+    so sequential or low-load queries are embedded immediately. Requests that
+    queue up while a batch is running form the next batch either way.
+    """
+
+    def __init__(self, backend: EmbeddingBackend, max_batch_size: int = QUERY_BATCH_SIZE,
+                 max_wait_ms: float = QUERY_BATCH_WAIT_MS):
+        """
+        Args:
+            backend: Embedding backend to batch calls to
+            max_batch_size: Queries per backend call (capped at the backend's maximum)
+            max_wait_ms: How long the first query of a batch waits for others
+        """
+        self.backend = backend
+        self.max_batch_size = max(1, min(max_batch_size, backend.max_batch_size))
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self._queue_wait = 0.0
+        self._embed_time = 0.0
+        self._pending = 0
+        self._concurrency = 0.0
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed one query, batched with concurrent calls"""
+        future = Future()
+        now = time.perf_counter()
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="query-embedding-batcher", daemon=True)
+                self._worker.start()
+            self._concurrency = 0.8 * self._concurrency + 0.2 * self._pending
+            self._pending += 1
+        self._queue.put((text, future, now))
+        try:
+            return future.result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            # Only wait for more queries while callers are concurrent
+            deadline = first[2] + self.max_wait_ms / 1000 if self._concurrency >= 0.5 else 0.0
+            stop = False
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._embed_batch(batch)
+            if stop:
+                return
+
+    def _embed_batch(self, batch):
+        started = time.perf_counter()
+        try:
+            vectors = self.backend.embed_array([text for text, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        finished = time.perf_counter()
+        with self._lock:
+            self.requests += len(batch)
+            self.batches += 1
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self._queue_wait += sum(started - enqueued for _, _, enqueued in batch)
+            self._embed_time += finished - started
+
+        for row, (_, future, _) in enumerate(batch):
+            future.set_result(vectors[row])
+
+    def stats(self) -> Dict[str, Any]:
+        """Batching configuration, batch sizes and mean queue wait / embed time"""
+        with self._lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait_ms,
+                'requests': self.requests,
+                'batches': self.batches,
+                'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+                'largest_batch': self.largest_batch,
+                'mean_queue_wait_ms': 1000 * self._queue_wait / self.requests if self.requests else 0.0,
+                'mean_embed_ms': 1000 * self._embed_time / self.batches if self.batches else 0.0,
+                'concurrency': self._concurrency,
+            }
+
+    def close(self):
+        """Stop the worker thread after the queued requests"""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                self._queue.put(None)
+                self._worker = None
+
+
+def create_embedding_backend(backend: str = DEFAULT_EMBEDDING_BACKEND, model: str = None, **kwargs) -> EmbeddingBackend:
+    """
+    Create an embedding backend by name
+
+    Args:
+        backend: "ollama" (served embedding model), "local" (in-process ONNX
+            on CPU) or "hash" (deterministic fake for tests)
+        model: Ollama model name or local model directory (ignored by "hash")
+        **kwargs: Backend-specific options
+
+    Returns:
+        EmbeddingBackend instance
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    if backend == 'ollama':
+        return OllamaEmbeddingBackend(model or DEFAULT_OLLAMA_EMBEDDING_MODEL, **kwargs)
+    if backend == 'local':
+        return LocalOnnxEmbeddingBackend(model or DEFAULT_LOCAL_EMBEDDING_MODEL, **kwargs)
+    return EMBEDDING_BACKENDS[backend](**kwargs)
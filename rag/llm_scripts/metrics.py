@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Instrumentation for the RAG system
+A minimal hook API (timed / observe / count) that the pipeline stages call
+and that costs one list check when no hook is registered or request traced
+(timed stages also become spans of the current trace), plus a hook that
+aggregates events into Prometheus histograms and counters and renders the
+text exposition format (no client library needed).
+"""
+
+import logging
+import threading
+import time
+from contextlib import nullcontext
+from typing import List, Dict, Any, Callable, Tuple
+
+from llm_scripts import tracing
+
+logger = logging.getLogger(__name__)
+
+# Hooks receive (kind, name, value, labels) with kind "timing" (seconds) or "count"
+Hook = Callable[[str, str, float, Dict[str, str]], None]
+
+_hooks: List[Hook] = []
+_NULL_TIMER = nullcontext()
+
+
+def add_hook(hook: Hook):
+    """Register a hook for instrumentation events"""
+    if hook not in _hooks:
+        _hooks.append(hook)
+
+
+def remove_hook(hook: Hook):
+    """Unregister a hook"""
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+def _emit(kind: str, name: str, value: float, labels: Dict[str, str]):
+    for hook in list(_hooks):
+        try:
+            hook(kind, name, value, labels)
+        except Exception as e:
+            logger.warning(f"Metrics hook failed: {e}")
+
+
+def observe(stage: str, seconds: float, **labels):
+    """Record the duration of a stage"""
+    if _hooks:
+        _emit("timing", stage, seconds, labels)
+
+
+def count(name: str, value: float = 1, **labels):
+    """Increment a counter"""
+    if _hooks:
+        _emit("count", name, value, labels)
+
+
+class _Timer:
+    __slots__ = ('stage', 'labels', 'trace', 'span', 'start')
+
+    def __init__(self, stage: str, labels: Dict[str, str], trace):
+        self.stage = stage
+        self.labels = labels
+        self.trace = trace
+        self.span = None
+
+    def __enter__(self):
+        if self.trace is not None:
+            self.span = self.trace.start_span(self.stage, self.labels)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        if self.span is not None:
+            if exc is not None:
+                self.span.attributes['error'] = repr(exc)
+            self.trace.end_span(self.span)
+        observe(self.stage, elapsed, **self.labels)
+
+
+def timed(stage: str, **labels):
+    """
+    Context manager timing a stage
+
+    A shared no-op when no hook is registered and the request is not traced.
+    """
+    trace = tracing.current_trace()
+    if not _hooks and trace is None:
+        return _NULL_TIMER
+    return _Timer(stage, labels, trace)
+
+
+# Latency buckets in seconds, from sub-millisecond lookups to slow generations
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+COUNTER_HELP = {
+    'requests': "Requests handled, by endpoint",
+    'answers': "Answers returned, by path (catalog, llm, busy)",
+    'coalesced': "Requests served from an identical in-flight request, by operation",
+    'llm_tokens': "LLM tokens, by direction (prompt, completion)",
+    'errors': "Errors, by stage",
+    'ingested_chunks': "Chunks embedded and stored",
+}
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Tuple[Tuple[str, Any], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class PrometheusMetrics:
+    """
+    Hook that aggregates instrumentation events for a /metrics endpoint
+
+    Timings go into the rag_stage_duration_seconds histogram (labelled by
+    stage), counts into rag_<name>_total counters. Gauges are read from
+    callables at render time. Thread-safe.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, namespace: str = "rag"):
+        """
+        Args:
+            buckets: Histogram bucket upper bounds in seconds
+            namespace: Prefix of the metric names
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple, List] = {}
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+    def __call__(self, kind: str, name: str, value: float, labels: Dict[str, str]):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            if kind == "timing":
+                key = (('stage', name),) + key
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+                for i, bound in enumerate(self.buckets):
+                    if value <= bound:
+                        histogram[0][i] += 1
+                histogram[1] += value
+                histogram[2] += 1
+            else:
+                series = self._counters.setdefault(name, {})
+                series[key] = series.get(key, 0.0) + value
+
+    def add_gauge(self, name: str, help_text: str, read: Callable[[], float]):
+        """Expose a value read at scrape time as <namespace>_<name>"""
+        self._gauges[name] = (help_text, read)
+
+    def render(self) -> str:
+        """Metrics in the Prometheus text exposition format (version 0.0.4)"""
+        ns = self.namespace
+        lines = []
+        with self._lock:
+            if self._histograms:
+                name = f"{ns}_stage_duration_seconds"
+                lines.append(f"# HELP {name} Time spent in each RAG pipeline stage")
+                lines.append(f"# TYPE {name} histogram")
+                for key in sorted(self._histograms):
+                    buckets, total, observations = self._histograms[key]
+                    for bound, bucket_count in zip(self.buckets, buckets):
+                        lines.append(f"{name}_bucket{_format_labels(key + (('le', repr(bound)),))} {bucket_count}")
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', '+Inf'),))} {observations}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(total)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {observations}")
+
+            for counter in sorted(self._counters):
+                name = f"{ns}_{counter}_total"
+                lines.append(f"# HELP {name} {COUNTER_HELP.get(counter, counter.replace('_', ' ').capitalize())}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(self._counters[counter].items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+        for gauge, (help_text, read) in sorted(self._gauges.items()):
+            try:
+                value = read()
+            except Exception as e:
+                logger.warning(f"Gauge {gauge} failed: {e}")
+                continue
+            name = f"{ns}_{gauge}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Re-embed the knowledge base after changing the embedding backend or model
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+parent_dir = Path(__file__).parent.parent
+sys.path.append(str(parent_dir))
+
+from llm_scripts.rag_system import WineRAGSystem
+from llm_scripts.embeddings import DEFAULT_EMBEDDING_BACKEND
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed the wine knowledge base")
+    parser.add_argument("--db-path", default="./qdrant_db", help="Qdrant database path")
+    parser.add_argument("--qdrant-url", default=None, help="Qdrant server URL (defaults to QDRANT_URL)")
+    parser.add_argument("--backend", default=DEFAULT_EMBEDDING_BACKEND, choices=["ollama", "local", "hash"],
+                        help="Embedding backend")
+    parser.add_argument("--model", default=None, help="Embedding model name or local model directory")
+    args = parser.parse_args()
+
+    print(f"🔢 Re-embedding knowledge base with {args.backend} embeddings...")
+    rag = WineRAGSystem(db_path=args.db_path, qdrant_url=args.qdrant_url, embedding_backend=args.backend, embedding_model=args.model)
+    count = rag.migrate_embeddings()
+    print(f"✅ Re-embedded {count} chunks with {rag.embedder_info}")
+
+
+if __name__ == "__main__":
+    main()
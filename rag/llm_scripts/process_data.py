@@ -14,6 +14,7 @@ parent_dir = Path(__file__).parent.parent
 sys.path.append(str(parent_dir))
 
 from llm_scripts.rag_system import WineRAGSystem
+from llm_scripts.email_cleaning import clean_email_bodies
 
 def load_existing_emails(data_dir: str = "data") -> List[Dict[str, Any]]:
     """
@@ -45,11 +46,14 @@ def load_existing_emails(data_dir: str = "data") -> List[Dict[str, Any]]:
                 with open(file_path, 'r') as f:
                     emails = json.load(f)
                 
+                # Strip HTML, quoted replies and signatures before chunking
+                bodies = clean_email_bodies([email.get('full_body', email.get('snippet', '')) for email in emails])
+                
                 # Convert to our document format
-                for email in emails:
+                for email, body in zip(emails, bodies):
                     doc = {
                         'id': f"existing_{email_file}_{email.get('id', 'unknown')}",
-                        'content': f"Subject: {email.get('subject', 'No Subject')}\nFrom: {email.get('from', 'Unknown')}\nDate: {email.get('date', 'Unknown')}\n\n{email.get('full_body', email.get('snippet', ''))}",
+                        'content': f"Subject: {email.get('subject', 'No Subject')}\nFrom: {email.get('from', 'Unknown')}\nDate: {email.get('date', 'Unknown')}\n\n{body}",
                         'metadata': {
                             'type': 'email',
                             'source_file': email_file,
@@ -71,12 +75,13 @@ def load_existing_emails(data_dir: str = "data") -> List[Dict[str, Any]]:
     print(f"📊 Total emails loaded: {len(all_emails)}")
     return all_emails
 
-def process_pdf_directory(pdf_dir: str = "pdfs") -> List[Dict[str, Any]]:
+def process_pdf_directory(pdf_dir: str = "pdfs", rag: WineRAGSystem = None) -> List[Dict[str, Any]]:
     """
     Process all PDF files in a directory
     
     Args:
         pdf_dir: Directory containing PDF files
+        rag: RAG system used to read the PDFs (created once if not given)
         
     Returns:
         List of PDF documents
@@ -95,11 +100,11 @@ def process_pdf_directory(pdf_dir: str = "pdfs") -> List[Dict[str, Any]]:
         return []
     
     all_pdfs = []
+    rag = rag or WineRAGSystem()
     
     for pdf_file in pdf_files:
         try:
             # Use the RAG system to process the PDF
-            rag = WineRAGSystem()
             pdf_docs = rag.process_pdf(str(pdf_file))
             all_pdfs.extend(pdf_docs)
             print(f"  ✅ Processed {pdf_file.name}: {len(pdf_docs)} pages")
@@ -124,7 +129,7 @@ def build_knowledge_base():
     email_docs = load_existing_emails()
     
     # Process PDFs (if any)
-    pdf_docs = process_pdf_directory()
+    pdf_docs = process_pdf_directory(rag=rag)
     
     # Combine all documents
     all_documents = email_docs + pdf_docs
@@ -148,15 +153,21 @@ def build_knowledge_base():
         )
         langchain_docs.append(langchain_doc)
     
-    # Chunk documents
-    chunked_docs = rag.chunk_documents(all_documents)
-    
-    # Create embeddings and store in vector database
-    print(f"\n🔢 Creating embeddings for {len(chunked_docs)} chunks...")
-    rag.create_embeddings_and_store(chunked_docs)
+    # Chunk, embed and load into a new collection version, swapped in when complete
+    print("\n🔢 Rebuilding the vector database (the live collection keeps serving)...")
+    result = rag.rebuild_collection(all_documents)
     
+    stats = result['dedup']
     print("\n✅ Knowledge base built successfully!")
-    print(f"📊 Stored {len(chunked_docs)} document chunks in vector database")
+    print(f"📊 Stored {result['points']} document chunks in {result['collection']}")
+    timings = result['timings']
+    print(f"⏱️  {timings['total']:.1f}s total ({result['chunks_per_second']:.0f} chunks/s): "
+          f"chunk {timings['chunk']:.1f}s, embed {timings['embed']:.1f}s, "
+          f"upload {timings['upload']:.1f}s, index {timings['index']:.1f}s")
+    if result['removed']:
+        print(f"🗑️  Removed old versions: {', '.join(result['removed'])}")
+    print(f"🧹 Skipped {stats['exact_duplicates']} exact and {stats['near_duplicates']} near-duplicate chunks "
+          f"({stats['saved_ratio']:.0%} of chunks, {stats['chars_saved']:,} characters not embedded)")
     
     # Test the knowledge base
     print("\n🧪 Testing knowledge base...")
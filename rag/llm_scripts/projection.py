@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Dimensionality reduction for stored vectors
+Projects embeddings to a smaller dimension before they are stored and
+searched, with PCA fitted in NumPy on a sample of our chunks, or plain
+truncation for Matryoshka-trained embedding models
+"""
+
+import base64
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def _encode_array(array: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(array, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def _decode_array(data: str, shape) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=np.float32).reshape(shape)
+
+
+class VectorProjection:
+    """
+    Linear projection from the embedder's dimension to a smaller one
+
+    Projected vectors are L2-normalised again, so cosine distance in the
+    collection keeps its meaning.
+    """
+
+    def __init__(self, method: str, input_dim: int, output_dim: int,
+                 mean: Optional[np.ndarray] = None, components: Optional[np.ndarray] = None,
+                 explained_variance: Optional[float] = None):
+        """
+        Args:
+            method: "pca" or "truncate"
+            input_dim: Dimension of the embedder's vectors
+            output_dim: Dimension of the stored vectors
+            mean: Centering vector (PCA only)
+            components: (input_dim, output_dim) projection matrix (PCA only)
+            explained_variance: Share of the sample variance kept (PCA only)
+        """
+        if output_dim > input_dim:
+            raise ValueError(f"Cannot project {input_dim} dimensions to {output_dim}")
+        self.method = method
+        self.input_dim = input_dim
+        self.output_dim = output_dim
+        self.mean = mean
+        self.components = components
+        self.explained_variance = explained_variance
+
+    @classmethod
+    def fit_pca(cls, vectors: np.ndarray, output_dim: int) -> "VectorProjection":
+        """
+        Fit a PCA projection on a sample of embeddings
+
+        Args:
+            vectors: (n, input_dim) sample of embeddings, n >= output_dim
+            output_dim: Number of principal components to keep
+
+        Returns:
+            Fitted projection
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors) < output_dim:
+            raise ValueError(f"PCA to {output_dim} dimensions needs at least {output_dim} sample vectors, got {len(vectors)}")
+        mean = vectors.mean(axis=0)
+        _, singular_values, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+        variance = singular_values ** 2
+        explained = float(variance[:output_dim].sum() / variance.sum()) if variance.sum() else 1.0
+        return cls("pca", vectors.shape[1], output_dim, mean=mean, components=vt[:output_dim].T.copy(),
+                   explained_variance=explained)
+
+    @classmethod
+    def truncate(cls, input_dim: int, output_dim: int) -> "VectorProjection":
+        """Keep the first output_dim dimensions (Matryoshka-trained models)"""
+        return cls("truncate", input_dim, output_dim)
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """Project (n, input_dim) vectors to normalised (n, output_dim) vectors"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.method == "truncate":
+            return _normalize(vectors[:, :self.output_dim])
+        return _normalize((vectors - self.mean) @ self.components)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serialisable form, stored with the collection metadata"""
+        data = {'method': self.method, 'input_dim': self.input_dim, 'output_dim': self.output_dim,
+                'explained_variance': self.explained_variance}
+        if self.method == "pca":
+            data['mean'] = _encode_array(self.mean)
+            data['components'] = _encode_array(self.components)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "VectorProjection":
+        """Rebuild a projection saved with to_dict"""
+        mean = components = None
+        if data['method'] == "pca":
+            mean = _decode_array(data['mean'], (data['input_dim'],))
+            components = _decode_array(data['components'], (data['input_dim'], data['output_dim']))
+        return cls(data['method'], data['input_dim'], data['output_dim'], mean=mean, components=components,
+                   explained_variance=data.get('explained_variance'))
+
+
+def measure_recall_loss(vectors: np.ndarray, projection: VectorProjection, queries: Optional[np.ndarray] = None,
+                        k: int = 10) -> Dict[str, Any]:
+    """
+    Recall@k of exact search on projected vectors against full vectors
+
+    Pass held-out queries (not in the sample a PCA projection was fitted
+    on) for an unbiased figure. Without queries, up to 200 corpus vectors
+    are used and each one's match with itself is excluded, since it would
+    be the top hit in both spaces.
+
+    Args:
+        vectors: (n, input_dim) corpus embeddings
+        projection: Projection to evaluate
+        queries: (q, input_dim) query embeddings not in the corpus
+        k: Neighbours compared per query
+
+    Returns:
+        Dictionary with recall_at_k, k and the projection dimensions
+    """
+    vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+    self_index = None
+    if queries is None:
+        self_index = np.linspace(0, len(vectors) - 1, num=min(200, len(vectors)), dtype=int)
+        queries = vectors[self_index]
+    queries = _normalize(np.asarray(queries, dtype=np.float32))
+    k = min(k, len(vectors) - (1 if self_index is not None else 0))
+
+    def top_k(corpus, query_vectors):
+        scores = query_vectors @ corpus.T
+        if self_index is not None:
+            scores[np.arange(len(self_index)), self_index] = -np.inf
+        return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+    full = top_k(vectors, queries)
+    reduced = top_k(projection.transform(vectors), projection.transform(queries))
+    recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(full, reduced)])
+
+    return {
+        'recall_at_k': float(recall),
+        'k': k,
+        'input_dim': projection.input_dim,
+        'output_dim': projection.output_dim,
+        'method': projection.method,
+        'explained_variance': projection.explained_variance,
+    }
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Prompt templates for the RAG system
+Static instructions come first as a stable prefix that Ollama's prompt
+cache can reuse across requests (the saving is model and server dependent;
+see benchmarks/benchmark_prompt_prefix.py); per-request context and the
+question go last. Also turns Ollama's generation timings into
+prefill/decode stats.
+"""
+
+import os
+from typing import Dict, Any, Optional
+
+# How long Ollama keeps the model (and its prompt cache) loaded between requests
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Identical for every request: keep any variable text out of it
+SYSTEM_PROMPT = """You are a wine store customer service assistant. Answer the user's question concisely and directly, using the context provided after these instructions.
+
+INSTRUCTIONS:
+- If asking about specific wines, focus on the wine products listed in the context
+- Keep responses concise and to the point
+- If we have the wines they're asking about, say so directly
+- Don't include irrelevant information about return policies or wine clubs unless specifically asked
+- If you don't have specific information, say so clearly"""
+
+
+def build_prompt(context: str, question: str, system_prompt: str = SYSTEM_PROMPT, history: str = None) -> str:
+    """
+    Assemble the prompt: static prefix, then history, context and question
+
+    Args:
+        context: Retrieved context for this request
+        question: User question
+        system_prompt: Static instructions shared by all requests
+        history: Earlier turns of the conversation, if any
+
+    Returns:
+        Prompt text
+    """
+    conversation = f"\n\nCONVERSATION SO FAR:\n{history}" if history else ""
+    return f"""{system_prompt}{conversation}
+
+CONTEXT:
+{context}
+
+USER QUESTION: {question}
+
+RESPONSE:"""
+
+
+def generation_timings(generation_info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Prefill and decode timings of an Ollama generation
+
+    Ollama reports durations in nanoseconds; prompt_eval_count only counts
+    prompt tokens that were not served from the cache, so a reused prefix
+    shows up as fewer prefill tokens and a shorter prefill.
+
+    Args:
+        generation_info: Final generation_info of an Ollama response
+
+    Returns:
+        Dictionary with load_ms, prefill_ms, decode_ms, total_ms,
+        prefill_tokens, decode_tokens and decode_tokens_per_second
+        (empty when the backend reported no timings)
+    """
+    info = generation_info or {}
+    if 'eval_duration' not in info and 'prompt_eval_duration' not in info:
+        return {}
+
+    def ms(key):
+        return (info.get(key) or 0) / 1e6
+
+    decode_tokens = info.get('eval_count') or 0
+    decode_ms = ms('eval_duration')
+    return {
+        'load_ms': ms('load_duration'),
+        'prefill_ms': ms('prompt_eval_duration'),
+        'decode_ms': decode_ms,
+        'total_ms': ms('total_duration'),
+        'prefill_tokens': info.get('prompt_eval_count') or 0,
+        'decode_tokens': decode_tokens,
+        'decode_tokens_per_second': decode_tokens / (decode_ms / 1000) if decode_ms else 0.0,
+    }
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Qdrant connection factory for the RAG system
+Connects to a Qdrant server (gRPC preferred, pooled keep-alive connections,
+timeouts) when QDRANT_URL is set, falling back to the embedded local mode.
+Clients are shared per process, so every WineRAGSystem in a process reuses
+one connection pool (and the local mode's file lock is only taken once).
+"""
+
+import os
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+import httpx
+from qdrant_client import QdrantClient
+
+# Defaults, overridable with environment variables
+QDRANT_URL = os.getenv("QDRANT_URL")
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "true").lower() in ("1", "true", "yes")
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", "30"))
+QDRANT_POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", "20"))
+
+_clients: Dict[Tuple, QdrantClient] = {}
+_clients_lock = threading.Lock()
+
+
+def _grpc_options(pool_size: int) -> Dict[str, Any]:
+    return {
+        # Keep the HTTP/2 channel alive between requests instead of reconnecting
+        "grpc.keepalive_time_ms": 30_000,
+        "grpc.keepalive_timeout_ms": 10_000,
+        "grpc.keepalive_permit_without_calls": 1,
+        "grpc.http2.max_pings_without_data": 0,
+        "grpc.max_concurrent_streams": pool_size * 5,
+        # Batched upserts and vector retrieval exceed the 4 MB default
+        "grpc.max_send_message_length": 64 * 1024 * 1024,
+        "grpc.max_receive_message_length": 64 * 1024 * 1024,
+    }
+
+
+def create_qdrant_client(url: Optional[str] = None, path: Optional[str] = None, api_key: Optional[str] = None,
+                         prefer_grpc: Optional[bool] = None, timeout: Optional[int] = None,
+                         pool_size: Optional[int] = None) -> QdrantClient:
+    """
+    Create a new Qdrant client
+
+    Args:
+        url: Qdrant server URL, e.g. http://localhost:6333 (defaults to QDRANT_URL)
+        path: Local database directory, used when no URL is configured
+        api_key: Server API key (defaults to QDRANT_API_KEY)
+        prefer_grpc: Use gRPC (port 6334) for data operations (defaults to QDRANT_PREFER_GRPC)
+        timeout: Request timeout in seconds (defaults to QDRANT_TIMEOUT)
+        pool_size: Pooled keep-alive REST connections (defaults to QDRANT_POOL_SIZE)
+
+    Returns:
+        QdrantClient in server mode, or in embedded local mode at path
+    """
+    url = url or QDRANT_URL
+    if not url:
+        return QdrantClient(path=path or "./qdrant_db")
+
+    pool_size = pool_size or QDRANT_POOL_SIZE
+    return QdrantClient(
+        url=url,
+        api_key=api_key or QDRANT_API_KEY,
+        prefer_grpc=QDRANT_PREFER_GRPC if prefer_grpc is None else prefer_grpc,
+        timeout=timeout or QDRANT_TIMEOUT,
+        grpc_options=_grpc_options(pool_size),
+        # qdrant-client disables REST keep-alive by default; pool the connections instead
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+    )
+
+
+def get_qdrant_client(url: Optional[str] = None, path: Optional[str] = None, **kwargs) -> QdrantClient:
+    """
+    Get the process-wide shared client for a server URL or local path
+
+    Takes the same arguments as create_qdrant_client; the client is created on
+    first use and reused afterwards (and recreated if it was closed).
+    """
+    url = url or QDRANT_URL
+    key = ("url", url) if url else ("path", os.path.abspath(path or "./qdrant_db"))
+    with _clients_lock:
+        client = _clients.get(key)
+        # A caller may have closed the shared client; reconnect
+        if client is None or getattr(client._client, "_closed", False):
+            client = create_qdrant_client(url=url, path=path, **kwargs)
+            _clients[key] = client
+        return client
+
+
+def close_qdrant_clients():
+    """Close every shared client (e.g. on application shutdown)"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def describe_qdrant_client(client: QdrantClient) -> Dict[str, Any]:
+    """Connection mode of a client, for status endpoints"""
+    remote = getattr(client, "_client", None)
+    if remote is not None and hasattr(remote, "rest_uri"):
+        return {'mode': 'server', 'url': remote.rest_uri, 'grpc': bool(getattr(remote, "_prefer_grpc", False))}
+    return {'mode': 'local', 'path': getattr(remote, "location", None)}
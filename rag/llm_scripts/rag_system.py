@@ -7,10 +7,13 @@ Processes emails and PDFs, creates embeddings, enables semantic search
 import os
 import sys
 import json
+import time
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union, Optional, Tuple
 import logging
 
+import numpy as np
+
 # Add parent directory to path
 parent_dir = Path(__file__).parent.parent
 sys.path.append(str(parent_dir))
@@ -18,13 +21,10 @@ sys.path.append(str(parent_dir / "scripts"))
 
 # LangChain imports
 from langchain_ollama import OllamaLLM
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import OllamaEmbeddings
-from langchain.schema import Document
 
 # Qdrant imports
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import PointStruct
+from llm_scripts.qdrant_connection import get_qdrant_client
 
 # PDF processing
 from pypdf import PdfReader
@@ -35,76 +35,603 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent / "scripts"))
 from simple_gmail_reader import get_gmail_service, extract_email_body
 
+# Ingestion stages
+from llm_scripts.dedup import MinHashDeduplicator, deduplicate_chunks
+from llm_scripts.email_cleaning import clean_email_bodies
+from llm_scripts.chunking import Chunk, FastRecursiveSplitter, chunk_documents
+
+# Embedding and collection bookkeeping
+from llm_scripts.embeddings import (
+    DEFAULT_EMBEDDING_BACKEND, QUERY_BATCH_SIZE, QUERY_BATCH_WAIT_MS, EmbeddingBackend, QueryBatcher,
+    create_embedding_backend
+)
+from llm_scripts.collection_metadata import (
+    read_collection_metadata, write_collection_metadata, update_collection_metadata,
+    delete_collection_metadata, resolve_collection_name
+)
+from llm_scripts.collection_profiles import DEFAULT_COLLECTION_PROFILE, CollectionProfile, get_collection_profile
+from llm_scripts.collection_versions import (
+    new_version_name, collection_or_alias_exists, swap_alias, garbage_collect_versions, wait_until_indexed
+)
+from llm_scripts.projection import VectorProjection, measure_recall_loss
+from llm_scripts import metrics, tracing
+from llm_scripts.tracing import TRACE_FILE, FileSpanExporter
+
+# Retrieval stages
+from llm_scripts.diversity import mmr_select, collapse_by_source
+from llm_scripts.reranking import DEFAULT_RERANKER, Reranker, create_reranker
+from llm_scripts.context_builder import DEFAULT_CONTEXT_TOKENS, DEFAULT_DOC_TOKENS, build_context, estimate_tokens
+from llm_scripts.prompts import OLLAMA_KEEP_ALIVE, build_prompt, generation_timings
+from llm_scripts.answer_planner import CATALOG_ANSWER_ITEMS, plan_query, select_catalog_matches, render_catalog_answer
+from llm_scripts.conversation import ConversationSession
+from llm_scripts.coalescing import SingleFlight, normalize_query
+from llm_scripts.scheduler import (
+    LLM_CONCURRENCY, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE,
+    GenerationScheduler, SchedulerBusy
+)
+
+# Chunks embedded to fit a PCA projection
+PROJECTION_SAMPLE_SIZE = 2000
+
+# Vector-search hits considered before diversification and reranking
+SEARCH_CANDIDATES = 50
+
+# Bulk loads of collection versions: points per request and parallel uploaders
+UPLOAD_BATCH_SIZE = int(os.getenv("RAG_UPLOAD_BATCH_SIZE", "256"))
+UPLOAD_WORKERS = int(os.getenv("RAG_UPLOAD_WORKERS", "4"))
+
+# Answer returned when a generation is shed by the scheduler
+BUSY_MESSAGE = ("We're helping a lot of customers right now and couldn't answer in time. "
+                "Please try again in a moment.")
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class WineRAGSystem:
-    def __init__(self, db_path: str = "./qdrant_db", model_name: str = "llama3.2:latest"):
+    def __init__(self, db_path: str = "./qdrant_db", model_name: str = "llama3.2:latest",
+                 qdrant_url: str = None, collection_name: str = "wine_knowledge",
+                 embedding_backend: Union[str, EmbeddingBackend] = DEFAULT_EMBEDDING_BACKEND, embedding_model: str = None,
+                 reembed_on_change: bool = False,
+                 collection_profile: Union[str, CollectionProfile] = DEFAULT_COLLECTION_PROFILE,
+                 projection_dim: int = None, projection_method: str = "pca",
+                 reranker: Union[str, Reranker] = DEFAULT_RERANKER, rerank_candidates: int = 20,
+                 rerank_budget_ms: float = 150.0, mmr_lambda: Optional[float] = 0.7,
+                 max_chunks_per_source: Optional[int] = 1, context_tokens: int = DEFAULT_CONTEXT_TOKENS,
+                 context_doc_tokens: int = DEFAULT_DOC_TOKENS, keep_alive: Union[int, str] = OLLAMA_KEEP_ALIVE,
+                 answer_fast_path: bool = True, coalesce_requests: bool = True,
+                 query_batch_size: int = QUERY_BATCH_SIZE, query_batch_wait_ms: Optional[float] = QUERY_BATCH_WAIT_MS,
+                 llm_concurrency: int = LLM_CONCURRENCY, llm_max_queue: int = LLM_MAX_QUEUE,
+                 llm_queue_timeout: float = LLM_QUEUE_TIMEOUT, trace_file: Optional[str] = TRACE_FILE):
         """
         Initialize the RAG system
         
         Args:
-            db_path: Path to Qdrant database
-            model_name: Ollama model to use for embeddings and generation
+            db_path: Path to the embedded Qdrant database, used when no server URL is configured
+            model_name: Ollama model to use for generation
+            qdrant_url: Qdrant server URL (defaults to QDRANT_URL); in server
+                mode several processes can read and write the collection at once
+            collection_name: Qdrant collection holding the knowledge base
+            embedding_backend: EmbeddingBackend instance, or a backend name:
+                "ollama" (dedicated embedding model served by Ollama), "local"
+                (in-process ONNX model on CPU) or "hash" (deterministic fake)
+            embedding_model: Embedding model name (Ollama) or model directory
+                (local); defaults depend on the backend
+            reembed_on_change: Re-embed the collection when it was built by a
+                different embedder (otherwise only a warning is logged)
+            collection_profile: Storage profile used when creating the
+                collection (quantization, on-disk storage, HNSW settings);
+                see llm_scripts/collection_profiles.py
+            projection_dim: Store vectors reduced to this many dimensions
+                (None stores the embedder's full vectors)
+            projection_method: "pca" (fitted on a sample of the stored
+                chunks) or "truncate" (for Matryoshka-trained embedders)
+            reranker: Reranker instance, or "none", "features" (feature-based
+                scorer) or "cross_encoder" (ONNX cross-encoder on CPU)
+            rerank_candidates: Vector-search candidates passed to the reranker
+            rerank_budget_ms: Time budget of the cross-encoder per search
+            mmr_lambda: Relevance/diversity trade-off of the maximal marginal
+                relevance ordering (1.0 = relevance only, None disables MMR)
+            max_chunks_per_source: Chunks of the same source document kept
+                per search (None keeps all)
+            context_tokens: Token budget of the retrieved context in the prompt
+            context_doc_tokens: Token budget of a single document in the
+                context (longer ones keep their most query-relevant sentences)
+            keep_alive: How long Ollama keeps the generation model loaded
+                between requests (e.g. "30m", -1 for always)
+            answer_fast_path: Answer pure catalog lookups ("red wines under
+                $50") from the matching products' fields without the LLM
+            coalesce_requests: Let concurrent identical searches and questions
+                share one in-flight computation
+            query_batch_size: Concurrent query embeddings sent in one call
+            query_batch_wait_ms: How long a query embedding waits for others
+                to batch with (None embeds every query on its own)
+            llm_concurrency: Generations sent to Ollama at once (match
+                OLLAMA_NUM_PARALLEL)
+            llm_max_queue: Generations waiting for a slot beyond which new
+                ones get the busy answer
+            llm_queue_timeout: Default seconds a generation may wait for a slot
+            trace_file: Append a trace of every query to this file as
+                OpenTelemetry JSON lines (None records traces only on request)
         """
         self.db_path = db_path
         self.model_name = model_name
         
-        # Initialize Qdrant client
-        self.client = QdrantClient(path=db_path)
-        self.collection_name = "wine_knowledge"
+        # Shared Qdrant client: server mode (gRPC, pooled connections) when a
+        # URL is configured, embedded local mode otherwise
+        self.client = get_qdrant_client(url=qdrant_url, path=db_path)
+        self.collection_name = collection_name
+        self.collection_profile = get_collection_profile(collection_profile)
+        
+        # Initialize Ollama generation model, kept loaded so the static
+        # prompt prefix stays cached between requests
+        self.llm = OllamaLLM(model=model_name, keep_alive=keep_alive)
         
-        # Initialize Ollama components
-        self.llm = OllamaLLM(model=model_name)
-        self.embeddings = OllamaEmbeddings(model=model_name)
+        # Admission control: bounded concurrency, priorities and deadlines
+        self.scheduler = GenerationScheduler(llm_concurrency, llm_max_queue, llm_queue_timeout)
         
-        # Text splitter for chunking documents
-        self.text_splitter = RecursiveCharacterTextSplitter(
+        # Embeddings are configured independently of the generation model
+        if isinstance(embedding_backend, EmbeddingBackend):
+            self.embeddings = embedding_backend
+        else:
+            self.embeddings = create_embedding_backend(embedding_backend, embedding_model)
+        
+        # Query embeddings of concurrent searches share backend calls
+        self.query_batcher = None
+        if query_batch_wait_ms is not None:
+            self.query_batcher = QueryBatcher(self.embeddings, query_batch_size, query_batch_wait_ms)
+        
+        # Text splitter for chunking documents (same chunks as
+        # RecursiveCharacterTextSplitter(1000, 200), without per-Document overhead)
+        self.text_splitter = FastRecursiveSplitter(
             chunk_size=1000,
             chunk_overlap=200,
-            length_function=len,
         )
         
+        # Optional reranking of the top vector-search candidates
+        self.reranker = reranker if isinstance(reranker, Reranker) or reranker is None else create_reranker(reranker)
+        self.rerank_candidates = rerank_candidates
+        self.rerank_budget_ms = rerank_budget_ms
+        
+        # Diversity of search results
+        self.mmr_lambda = mmr_lambda
+        self.max_chunks_per_source = max_chunks_per_source
+        
+        # Prompt context budget, keeps prompt size and prefill time bounded
+        self.context_tokens = context_tokens
+        self.context_doc_tokens = context_doc_tokens
+        self.last_context_stats = None
+        self.last_generation_stats = None
+        self.answer_fast_path = answer_fast_path
+        
+        # Single-flight coalescing of identical concurrent requests
+        self.coalesce_requests = coalesce_requests
+        self.search_flight = SingleFlight('search')
+        self.query_flight = SingleFlight('query')
+        
+        # Per-request traces, exported to a local file when configured
+        self.trace_exporter = FileSpanExporter(trace_file) if trace_file else None
+        
+        # Near-duplicate detection applied before embedding
+        self.deduplicator = MinHashDeduplicator()
+        self.last_dedup_stats = None
+        
         # Get embedding dimensions dynamically
         self.embedding_dim = self._get_embedding_dimensions()
+        self.embedder_info = {
+            'backend': self.embeddings.name,
+            'model': self.embeddings.model,
+            'dimension': self.embedding_dim
+        }
+        
+        # Optional projection applied to vectors before storage and search
+        if projection_method not in ("pca", "truncate"):
+            raise ValueError(f"Unknown projection method: {projection_method}")
+        self.projection_dim = projection_dim
+        self.projection_method = projection_method
+        self.projection = None
+        self.projection_report = None
         
         # Initialize collection if it doesn't exist
-        self._initialize_collection()
+        self._initialize_collection(reembed_on_change)
         
-        logger.info(f"RAG System initialized with model: {model_name}")
+        logger.info(f"RAG System initialized with model: {model_name}, "
+                    f"embeddings: {self.embeddings.name}/{self.embeddings.model} ({self.embedding_dim} dims)")
     
     def _get_embedding_dimensions(self) -> int:
         """Get the embedding dimensions for the current model"""
         try:
-            # Test embedding to get dimensions
-            test_embedding = self.embeddings.embed_query("test")
-            return len(test_embedding)
+            # Backends declare their dimension (Ollama probes the model once)
+            return self.embeddings.dimension
         except Exception as e:
             logger.warning(f"Could not determine embedding dimensions, using default 384: {e}")
             return 384
     
-    def _initialize_collection(self):
+    def _initialize_collection(self, reembed_on_change: bool = False):
         """Initialize Qdrant collection if it doesn't exist"""
         try:
-            # Check if collection exists
-            collections = self.client.get_collections()
-            collection_names = [col.name for col in collections.collections]
-            
-            if self.collection_name not in collection_names:
+            # collection_name is an alias over versioned collections (a plain
+            # collection of that name, built before versioning, also works)
+            if not collection_or_alias_exists(self.client, self.collection_name):
+                # Truncation needs no sample, so it applies from the start;
+                # PCA is fitted when the first chunks are stored
+                if self.projection_dim and self.projection_method == "truncate":
+                    self.projection = VectorProjection.truncate(self.embedding_dim, self.projection_dim)
                 # Create collection with correct embedding dimensions
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=self.embedding_dim, distance=Distance.COSINE)
-                )
-                logger.info(f"Created collection: {self.collection_name}")
+                version = new_version_name(self.collection_name)
+                self._create_collection(version, self.projection, self.projection_report)
+                swap_alias(self.client, self.collection_name, version)
+                logger.info(f"Created collection: {version} (profile: {self.collection_profile.name})")
             else:
                 logger.info(f"Collection {self.collection_name} already exists")
+                self._load_profile()
+                self._load_projection()
+                self._check_embedder(reembed_on_change)
                 
         except Exception as e:
             logger.error(f"Error initializing collection: {e}")
             raise
     
+    def _create_collection(self, collection_name: str, projection: VectorProjection = None,
+                           projection_report: Dict[str, Any] = None, bulk_load: bool = False):
+        """Create a collection version with the current embedder and storage profile"""
+        dimension = projection.output_dim if projection else self.embedding_dim
+        self.client.create_collection(
+            collection_name=collection_name,
+            **self.collection_profile.collection_config(dimension, bulk_load=bulk_load)
+        )
+        metadata = {
+            'embedder': self.embedder_info,
+            'profile': self.collection_profile.describe()
+        }
+        if projection:
+            metadata['projection'] = projection.to_dict()
+            metadata['projection_report'] = projection_report
+        write_collection_metadata(self.client, collection_name, metadata)
+    
+    @property
+    def vector_dim(self) -> int:
+        """Dimension of the vectors stored in the collection"""
+        return self.projection.output_dim if self.projection else self.embedding_dim
+    
+    def _load_profile(self):
+        """Restore the storage profile the existing collection was built with"""
+        metadata = read_collection_metadata(self.client, self.collection_name) or {}
+        if not metadata.get('profile'):
+            return
+        stored = CollectionProfile.from_dict(metadata['profile'])
+        if stored.describe() != self.collection_profile.describe():
+            logger.warning(
+                f"Collection {self.collection_name} was built with profile {stored.name}, not "
+                f"{self.collection_profile.name}; searching with {stored.name} "
+                f"(call apply_collection_profile({self.collection_profile.name!r}) to switch)"
+            )
+        self.collection_profile = stored
+    
+    def _load_projection(self):
+        """Restore the projection the existing collection was built with"""
+        metadata = read_collection_metadata(self.client, self.collection_name) or {}
+        if metadata.get('projection'):
+            self.projection = VectorProjection.from_dict(metadata['projection'])
+            self.projection_report = metadata.get('projection_report')
+            if self.projection_dim and self.projection_dim != self.projection.output_dim:
+                logger.warning(
+                    f"Collection {self.collection_name} stores {self.projection.output_dim}-dim projected vectors; "
+                    f"call fit_projection({self.projection_dim}) to rebuild it with {self.projection_dim} dims"
+                )
+    
+    def _project(self, vectors: np.ndarray) -> np.ndarray:
+        """Apply the collection's projection (if any) to embedder vectors"""
+        return self.projection.transform(vectors) if self.projection else vectors
+    
+    def _fit_projection(self, sample_vectors: np.ndarray, output_dim: int,
+                        method: str) -> Optional[Tuple[VectorProjection, Optional[Dict[str, Any]]]]:
+        """
+        Create a projection from a sample of embeddings and measure its recall
+        
+        Returns:
+            (projection, recall report), or None when the sample is too small
+            to fit PCA (vectors stay full size)
+        """
+        if len(sample_vectors) > PROJECTION_SAMPLE_SIZE:
+            rng = np.random.default_rng(0)
+            sample_vectors = sample_vectors[np.sort(rng.choice(len(sample_vectors), PROJECTION_SAMPLE_SIZE, replace=False))]
+        
+        held_out = None
+        if method == "truncate":
+            projection = VectorProjection.truncate(self.embedding_dim, output_dim)
+        elif len(sample_vectors) < output_dim:
+            logger.warning(f"Only {len(sample_vectors)} chunks to fit a {output_dim}-dim PCA projection; "
+                           f"storing full {self.embedding_dim}-dim vectors for now")
+            return None
+        else:
+            # Hold out up to a tenth of the sample as recall queries the PCA never saw
+            holdout = min(200, len(sample_vectors) // 10, len(sample_vectors) - output_dim)
+            if holdout > 0:
+                order = np.random.default_rng(1).permutation(len(sample_vectors))
+                held_out = sample_vectors[order[:holdout]]
+                sample_vectors = sample_vectors[np.sort(order[holdout:])]
+            projection = VectorProjection.fit_pca(sample_vectors, output_dim)
+        
+        report = measure_recall_loss(sample_vectors, projection, queries=held_out) if len(sample_vectors) > 1 else None
+        if report:
+            logger.info(f"Projection {projection.input_dim} -> {projection.output_dim} dims ({method}): "
+                        f"recall@{report['k']} {report['recall_at_k']:.3f}")
+        return projection, report
+    
+    def _read_stored_payloads(self) -> List[Dict[str, Any]]:
+        """Read the payloads of every chunk in the live collection"""
+        payloads = []
+        offset = None
+        while True:
+            batch, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=256,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
+            )
+            payloads.extend(record.payload for record in batch)
+            if offset is None:
+                break
+        return payloads
+    
+    def fit_projection(self, output_dim: int, method: str = "pca", sample_texts: List[str] = None,
+                       sample_size: int = PROJECTION_SAMPLE_SIZE) -> Dict[str, Any]:
+        """
+        Fit a projection and rebuild the collection with reduced vectors
+        
+        Args:
+            output_dim: Dimension of the stored vectors
+            method: "pca" or "truncate" (Matryoshka-trained embedders)
+            sample_texts: Texts to fit PCA on (defaults to a sample of the stored chunks)
+            sample_size: Stored chunks sampled when sample_texts is not given
+            
+        Returns:
+            Recall report of the projection on the sample (see measure_recall_loss)
+        """
+        payloads = self._read_stored_payloads()
+        if sample_texts is None:
+            sample_texts = [payload['content'] for payload in payloads]
+            if len(sample_texts) > sample_size:
+                rng = np.random.default_rng(0)
+                sample_texts = [sample_texts[i] for i in sorted(rng.choice(len(sample_texts), sample_size, replace=False))]
+        
+        self.projection_dim = output_dim
+        self.projection_method = method
+        fitted = self._fit_projection(self.embeddings.embed_array(sample_texts), output_dim, method)
+        if fitted is None:
+            raise ValueError(f"Need at least {output_dim} sample texts to fit PCA, got {len(sample_texts)}")
+        
+        # Stored vectors cannot be projected from their old form, so re-embed
+        self._publish_version(payloads, self._embed_texts([p['content'] for p in payloads]), *fitted)
+        return self.projection_report
+    
+    def apply_collection_profile(self, profile: Union[str, CollectionProfile]):
+        """
+        Switch the existing collection to another storage profile in place
+        
+        Qdrant rebuilds quantized vectors and the HNSW graph in the background;
+        searches keep working meanwhile.
+        
+        Args:
+            profile: Profile name or CollectionProfile
+        """
+        self.collection_profile = get_collection_profile(profile)
+        self.client.update_collection(
+            collection_name=resolve_collection_name(self.client, self.collection_name),
+            **self.collection_profile.update_config()
+        )
+        update_collection_metadata(self.client, self.collection_name, profile=self.collection_profile.describe())
+        logger.info(f"Applied collection profile {self.collection_profile.name} to {self.collection_name}")
+    
+    def _check_embedder(self, reembed_on_change: bool):
+        """Compare the embedder that built the collection with the current one"""
+        metadata = read_collection_metadata(self.client, self.collection_name) or {}
+        built_with = metadata.get('embedder')
+        
+        if built_with is None:
+            # Collections built before embedders were recorded: only the size can be checked
+            physical_name = resolve_collection_name(self.client, self.collection_name)
+            vectors = self.client.get_collection(physical_name).config.params.vectors
+            built_with = {'backend': 'unknown', 'model': 'unknown', 'dimension': vectors.size}
+        
+        if built_with == self.embedder_info:
+            return
+        
+        if reembed_on_change:
+            logger.warning(f"Collection was built with {built_with}, re-embedding with {self.embedder_info}")
+            self.migrate_embeddings()
+        elif built_with['dimension'] != self.embedding_dim or built_with['backend'] != 'unknown':
+            logger.warning(
+                f"Collection {self.collection_name} was built with {built_with} but the current embedder is "
+                f"{self.embedder_info}; search results will be wrong until it is re-embedded "
+                f"(WineRAGSystem(reembed_on_change=True) or python llm_scripts/migrate_embeddings.py)"
+            )
+        else:
+            write_collection_metadata(self.client, self.collection_name, {**metadata, 'embedder': self.embedder_info})
+    
+    def migrate_embeddings(self, batch_size: int = None) -> int:
+        """
+        Re-embed every stored chunk with the current embedder
+        
+        The chunks are re-embedded into a new collection version that replaces
+        the live one only once complete, so a failing embedder leaves the old
+        collection intact and searches keep working meanwhile.
+        
+        Args:
+            batch_size: Texts embedded per call (defaults to the backend's maximum)
+            
+        Returns:
+            Number of re-embedded points
+        """
+        logger.info(f"Re-embedding collection {self.collection_name} with {self.embedder_info}")
+        
+        payloads = self._read_stored_payloads()
+        vectors = self._embed_texts([payload['content'] for payload in payloads], batch_size)
+        
+        # A projection fitted for another embedder no longer applies
+        fitted = None
+        if self.projection and self.projection.input_dim == self.embedding_dim:
+            fitted = (self.projection, self.projection_report)
+        elif self.projection_dim:
+            fitted = self._fit_projection(vectors, self.projection_dim, self.projection_method)
+        
+        self._publish_version(payloads, vectors, *(fitted or (None, None)))
+        
+        logger.info(f"Re-embedded {len(payloads)} chunks")
+        return len(payloads)
+    
+    def _embed_texts(self, texts: List[str], batch_size: int = None) -> np.ndarray:
+        """Embed texts in backend-sized batches into an (n, embedding_dim) array"""
+        batch_size = batch_size or self.embeddings.max_batch_size
+        vectors = []
+        for start in range(0, len(texts), batch_size):
+            # Create embeddings for the whole batch in one backend call
+            vectors.append(self.embeddings.embed_array(texts[start:start + batch_size]))
+            logger.info(f"Created embeddings for {min(start + batch_size, len(texts))}/{len(texts)} documents")
+        return np.vstack(vectors) if vectors else np.zeros((0, self.embedding_dim), dtype=np.float32)
+    
+    def _publish_version(self, payloads: List[Dict[str, Any]], vectors: np.ndarray,
+                         projection: VectorProjection = None, projection_report: Dict[str, Any] = None,
+                         verify_queries: List[str] = None, keep_versions: int = 1,
+                         upload_batch_size: int = UPLOAD_BATCH_SIZE, upload_workers: int = UPLOAD_WORKERS) -> Dict[str, Any]:
+        """
+        Bulk-load chunks into a new collection version and swap it in atomically
+        
+        The version is created without an HNSW graph or indexing, filled with
+        parallel batched uploads, verified, indexed once and only then
+        published by pointing the alias at it; on any failure it is dropped
+        and the live collection is untouched.
+        
+        Args:
+            payloads: Point payloads ({'content', 'metadata'})
+            vectors: Full-size embeddings of the payloads
+            projection: Projection for the new version (None stores full vectors)
+            projection_report: Recall report of the projection
+            verify_queries: Queries that must return results before the swap
+            keep_versions: Previous versions kept for rollback
+            upload_batch_size: Points per upload request
+            upload_workers: Parallel upload processes (server mode only)
+            
+        Returns:
+            Dictionary with the new and previous collection, point count,
+            garbage-collected versions and per-stage timings in seconds
+        """
+        version = new_version_name(self.collection_name)
+        self._create_collection(version, projection, projection_report, bulk_load=True)
+        timings = {}
+        try:
+            start = time.perf_counter()
+            stored = projection.transform(vectors) if projection else vectors
+            if len(payloads):
+                self.client.upload_collection(
+                    collection_name=version,
+                    vectors=stored,
+                    payload=payloads,
+                    ids=range(1, len(payloads) + 1),
+                    batch_size=upload_batch_size,
+                    parallel=upload_workers,
+                    wait=True
+                )
+            timings['upload'] = time.perf_counter() - start
+            
+            self._verify_version(version, stored, projection, verify_queries)
+            
+            start = time.perf_counter()
+            self.client.update_collection(collection_name=version, **self.collection_profile.indexing_config())
+            if not wait_until_indexed(self.client, version):
+                logger.warning(f"Index of {version} still building; publishing it anyway")
+            timings['index'] = time.perf_counter() - start
+        except Exception:
+            metrics.count('errors', stage='ingest')
+            logger.error(f"Rebuild of {self.collection_name} failed, dropping {version}")
+            self.client.delete_collection(version)
+            delete_collection_metadata(self.client, version)
+            raise
+        
+        previous = swap_alias(self.client, self.collection_name, version)
+        self.projection, self.projection_report = projection, projection_report
+        removed = garbage_collect_versions(self.client, self.collection_name, keep=keep_versions)
+        
+        metrics.observe('ingest_upload', timings['upload'])
+        metrics.observe('ingest_index', timings['index'])
+        if payloads:
+            logger.info(f"Uploaded {len(payloads)} points in {timings['upload']:.1f}s "
+                        f"({len(payloads) / max(timings['upload'], 1e-9):.0f} points/s), indexed in {timings['index']:.1f}s")
+        return {'collection': version, 'previous': previous, 'points': len(payloads), 'removed': removed,
+                'timings': timings}
+    
+    def _verify_version(self, version: str, stored: np.ndarray, projection: VectorProjection = None,
+                        verify_queries: List[str] = None):
+        """Check a loaded collection version before it is published"""
+        count = self.client.count(version, exact=True).count
+        if count != len(stored):
+            raise RuntimeError(f"{version} holds {count} points, expected {len(stored)}")
+        
+        probes = [stored[0]] if len(stored) else []
+        if verify_queries:
+            query_vectors = self.embeddings.embed_array(verify_queries)
+            probes.extend(projection.transform(query_vectors) if projection else query_vectors)
+        for probe in probes:
+            if not self.client.query_points(collection_name=version, query=probe.tolist(), limit=1).points:
+                raise RuntimeError(f"Verification search on {version} returned no results")
+    
+    def rebuild_collection(self, documents: List[Dict[str, Any]], deduplicate: bool = True,
+                           verify_queries: List[str] = None, keep_versions: int = 1,
+                           upload_batch_size: int = UPLOAD_BATCH_SIZE, upload_workers: int = UPLOAD_WORKERS) -> Dict[str, Any]:
+        """
+        Rebuild the knowledge base from scratch without disturbing readers
+        
+        Documents are chunked, embedded and bulk-loaded into a new collection
+        version, which replaces the live one in a single alias swap. Readers
+        see either the old or the new collection, never a partial one.
+        
+        Args:
+            documents: Documents with 'id', 'content' and 'metadata'
+            deduplicate: Drop duplicate chunks before embedding
+            verify_queries: Queries that must return results before the swap
+            keep_versions: Previous versions kept for rollback
+            upload_batch_size: Points per upload request
+            upload_workers: Parallel upload processes (server mode only)
+            
+        Returns:
+            Dictionary with the new and previous collection, point count,
+            garbage-collected versions, deduplication stats, per-stage timings
+            in seconds and throughput in chunks per second
+        """
+        total_start = time.perf_counter()
+        chunks = self.chunk_documents(documents)
+        if deduplicate:
+            chunks = self.deduplicate_chunks(chunks)
+        chunk_time = time.perf_counter() - total_start
+        
+        logger.info(f"Rebuilding {self.collection_name} from {len(chunks)} chunks...")
+        start = time.perf_counter()
+        vectors = self._embed_texts([chunk.page_content for chunk in chunks])
+        embed_time = time.perf_counter() - start
+        
+        fitted = None
+        if self.projection_dim:
+            fitted = self._fit_projection(vectors, self.projection_dim, self.projection_method)
+        
+        result = self._publish_version(
+            [{'content': chunk.page_content, 'metadata': chunk.metadata} for chunk in chunks],
+            vectors, *(fitted or (None, None)),
+            verify_queries=verify_queries, keep_versions=keep_versions,
+            upload_batch_size=upload_batch_size, upload_workers=upload_workers
+        )
+        total_time = time.perf_counter() - total_start
+        metrics.observe('ingest_embed', embed_time)
+        metrics.observe('ingest', total_time)
+        metrics.count('ingested_chunks', result['points'])
+        result['dedup'] = self.last_dedup_stats if deduplicate else None
+        result['timings'] = {'chunk': chunk_time, 'embed': embed_time, **result['timings'], 'total': total_time}
+        result['chunks_per_second'] = len(chunks) / total_time if total_time else 0.0
+        logger.info(f"Rebuilt {self.collection_name}: {result['points']} chunks in {result['collection']} "
+                    f"({total_time:.1f}s, {result['chunks_per_second']:.0f} chunks/s)")
+        return result
+    
     def process_emails(self, max_emails: int = 50) -> List[Dict[str, Any]]:
         """
         Process Gmail emails and extract content
@@ -128,6 +655,7 @@ class WineRAGSystem:
             
             messages = results.get('messages', [])
             processed_emails = []
+            raw_bodies = []
             
             for i, msg in enumerate(messages):
                 try:
@@ -146,10 +674,10 @@ class WineRAGSystem:
                     # Extract full email body
                     full_body = extract_email_body(email['payload'])
                     
-                    # Create document
+                    # Create document (body is filled in after cleaning)
                     email_doc = {
                         'id': f"email_{msg['id']}",
-                        'content': f"Subject: {subject}\nFrom: {sender}\nDate: {date}\n\n{full_body}",
+                        'content': f"Subject: {subject}\nFrom: {sender}\nDate: {date}\n\n",
                         'metadata': {
                             'type': 'email',
                             'subject': subject,
@@ -161,12 +689,17 @@ class WineRAGSystem:
                     }
                     
                     processed_emails.append(email_doc)
+                    raw_bodies.append(full_body)
                     logger.info(f"Processed email {i+1}/{len(messages)}: {subject[:50]}...")
                     
                 except Exception as e:
                     logger.error(f"Error processing email {msg['id']}: {e}")
                     continue
             
+            # Strip HTML, quoted replies and signatures from all bodies in one batch
+            for email_doc, body in zip(processed_emails, clean_email_bodies(raw_bodies)):
+                email_doc['content'] += body
+            
             logger.info(f"Successfully processed {len(processed_emails)} emails")
             return processed_emails
             
@@ -213,56 +746,79 @@ class WineRAGSystem:
             logger.error(f"Error processing PDF {pdf_path}: {e}")
             raise
     
-    def chunk_documents(self, documents: List[Dict[str, Any]]) -> List[Document]:
+    def chunk_documents(self, documents: List[Dict[str, Any]], workers: int = None) -> List[Chunk]:
         """
         Split documents into chunks for better retrieval
         
         Args:
             documents: List of document dictionaries
+            workers: Worker processes used for large batches (defaults to the CPU count)
             
         Returns:
-            List of LangChain Document objects
+            List of Chunk objects (page_content + metadata, like LangChain Documents)
         """
         logger.info(f"Chunking {len(documents)} documents...")
         
-        chunked_docs = []
-        
-        for doc in documents:
-            # Create LangChain Document
-            langchain_doc = Document(
-                page_content=doc['content'],
-                metadata=doc['metadata']
-            )
-            
-            # Split into chunks
-            chunks = self.text_splitter.split_documents([langchain_doc])
-            
-            # Add original document ID to each chunk
-            for i, chunk in enumerate(chunks):
-                chunk.metadata['chunk_id'] = f"{doc['id']}_chunk_{i}"
-                chunk.metadata['original_id'] = doc['id']
-            
-            chunked_docs.extend(chunks)
+        chunked_docs = chunk_documents(
+            documents,
+            chunk_size=self.text_splitter.chunk_size,
+            chunk_overlap=self.text_splitter.chunk_overlap,
+            workers=workers
+        )
         
         logger.info(f"Created {len(chunked_docs)} chunks from {len(documents)} documents")
         return chunked_docs
     
-    def create_embeddings_and_store(self, documents: List[Document]):
+    def deduplicate_chunks(self, documents: List[Chunk]) -> List[Chunk]:
+        """
+        Drop exact and near-duplicate chunks before they reach the embedder
+        
+        Args:
+            documents: List of chunks (Chunk or LangChain Document objects)
+            
+        Returns:
+            Unique documents; ids of dropped duplicates are recorded in the
+            survivor's 'duplicate_ids' metadata
+        """
+        unique_docs, stats = deduplicate_chunks(documents, self.deduplicator)
+        self.last_dedup_stats = stats
+        
+        logger.info(
+            f"Deduplication kept {stats['unique_chunks']}/{stats['input_chunks']} chunks "
+            f"({stats['exact_duplicates']} exact, {stats['near_duplicates']} near duplicates, "
+            f"{stats['chars_saved']} characters not embedded)"
+        )
+        return unique_docs
+    
+    def create_embeddings_and_store(self, documents: List[Chunk], deduplicate: bool = True) -> int:
         """
         Create embeddings for documents and store in Qdrant
         
+        Adds to the live collection; use rebuild_collection to replace the
+        whole knowledge base without readers seeing a partial index.
+        
         Args:
-            documents: List of LangChain Document objects
+            documents: List of chunks (Chunk or LangChain Document objects)
+            deduplicate: Drop duplicate chunks before embedding
+            
+        Returns:
+            Number of stored chunks
         """
+        if deduplicate:
+            documents = self.deduplicate_chunks(documents)
+        
         logger.info(f"Creating embeddings for {len(documents)} documents...")
         
         try:
-            points = []
+            start = time.perf_counter()
+            vectors = self._embed_texts([doc.page_content for doc in documents])
+            metrics.observe('ingest_embed', time.perf_counter() - start)
             
-            for i, doc in enumerate(documents):
-                # Create embedding
-                embedding = self.embeddings.embed_query(doc.page_content)
-                
+            if self.projection_dim and self.projection is None:
+                self._fit_projection_on_ingest(vectors)
+            
+            points = []
+            for i, (doc, embedding) in enumerate(zip(documents, self._project(vectors).tolist())):
                 # Create point for Qdrant
                 point = PointStruct(
                     id=i + 1,  # Simple incremental ID
@@ -273,9 +829,6 @@ class WineRAGSystem:
                     }
                 )
                 points.append(point)
-                
-                if (i + 1) % 10 == 0:
-                    logger.info(f"Created embeddings for {i + 1}/{len(documents)} documents")
             
             # Store in Qdrant
             self.client.upsert(
@@ -283,16 +836,35 @@ class WineRAGSystem:
                 points=points
             )
             
+            metrics.observe('ingest', time.perf_counter() - start)
+            metrics.count('ingested_chunks', len(points))
             logger.info(f"Successfully stored {len(points)} embeddings in Qdrant")
+            return len(points)
             
         except Exception as e:
+            metrics.count('errors', stage='ingest')
             logger.error(f"Error creating embeddings: {e}")
             raise
     
+    def _fit_projection_on_ingest(self, vectors: np.ndarray):
+        """Fit the configured projection on the first chunks stored in the collection"""
+        if self.client.count(self.collection_name).count > 0:
+            # Existing points were stored full size: fit on them and re-embed
+            self.fit_projection(self.projection_dim, self.projection_method)
+            return
+        
+        fitted = self._fit_projection(vectors, self.projection_dim, self.projection_method)
+        if fitted:
+            # The collection is still empty, so swapping in a reduced one is free
+            self._publish_version([], vectors[:0], *fitted)
+    
     def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
         Search for relevant documents using semantic similarity
         
+        Concurrent identical searches (after normalising case, whitespace
+        and trailing punctuation) share one embedding and Qdrant query.
+        
         Args:
             query: Search query
             limit: Maximum number of results
@@ -300,31 +872,75 @@ class WineRAGSystem:
         Returns:
             List of relevant documents with scores
         """
+        with metrics.timed('search'):
+            if not self.coalesce_requests:
+                return self._search(query, limit)
+            return list(self.search_flight.do(('search', normalize_query(query), limit), self._search, query, limit))
+    
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Embed a search query, micro-batched with concurrent searches"""
+        with metrics.timed('embed'):
+            if self.query_batcher is None:
+                return self.embeddings.embed_array([query])[0]
+            return self.query_batcher.embed(query)
+    
+    def _search(self, query: str, limit: int) -> List[Dict[str, Any]]:
         logger.info(f"Searching for: {query}")
         
         try:
             # Create embedding for query
-            query_embedding = self.embeddings.embed_query(query)
+            query_vector = self._project(self._embed_query(query)[None, :])[0]
+            diversify = self.mmr_lambda is not None
             
             # Search in Qdrant with much higher limit to ensure we get wine products
-            search_results = self.client.query_points(
-                collection_name=self.collection_name,
-                query=query_embedding,
-                limit=50  # Get enough results to find wine products
-            )
+            with metrics.timed('vector_search'):
+                search_results = self.client.query_points(
+                    collection_name=self.collection_name,
+                    query=query_vector.tolist(),
+                    limit=max(SEARCH_CANDIDATES, limit),
+                    search_params=self.collection_profile.search_params(),
+                    with_vectors=diversify
+                )
+                points = search_results.points
+                tracing.set_attributes(candidates=len(points))
+            
+            # Drop extra chunks of the same source, then order the rest by MMR
+            with metrics.timed('diversify'):
+                candidates = [
+                    {'content': p.payload['content'], 'metadata': p.payload['metadata'], 'score': p.score}
+                    for p in points
+                ]
+                if self.max_chunks_per_source:
+                    kept = collapse_by_source(candidates, self.max_chunks_per_source)
+                    candidates = [candidates[i] for i in kept]
+                    points = [points[i] for i in kept]
+                if diversify and candidates:
+                    order = mmr_select(
+                        query_vector,
+                        np.asarray([p.vector for p in points], dtype=np.float32),
+                        limit=len(candidates),
+                        lambda_mult=self.mmr_lambda,
+                        relevance=np.asarray([p.score for p in points], dtype=np.float32)
+                    )
+                    candidates = [candidates[i] for i in order]
+                tracing.set_attributes(candidates=len(candidates))
+            
+            if self.reranker:
+                candidates = candidates[:max(limit, self.rerank_candidates)]
+                start = time.perf_counter()
+                with metrics.timed('rerank', reranker=self.reranker.name):
+                    results = self.reranker.rerank(query, candidates, limit, self.rerank_budget_ms)
+                    tracing.set_attributes(candidates=len(candidates), results=len(results))
+                logger.info(f"Reranked {len(candidates)} candidates with {self.reranker.name} "
+                            f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+                return results
             
             # Format and filter results
             results = []
             wine_products = []
             other_docs = []
             
-            for result in search_results.points:
-                doc = {
-                    'content': result.payload['content'],
-                    'metadata': result.payload['metadata'],
-                    'score': result.score
-                }
-                
+            for doc in candidates:
                 # Prioritize wine products
                 if doc['metadata'].get('type') == 'wine_product':
                     wine_products.append(doc)
@@ -343,93 +959,233 @@ class WineRAGSystem:
             return results
             
         except Exception as e:
+            metrics.count('errors', stage='search')
             logger.error(f"Error searching: {e}")
             raise
     
-    def generate_response(self, query: str, context_docs: List[Dict[str, Any]]) -> str:
+    def generate_response(self, query: str, context_docs: List[Dict[str, Any]], history: str = None,
+                          priority: int = PRIORITY_INTERACTIVE, deadline: float = None) -> str:
         """
         Generate a response using the LLM with retrieved context
         
         Args:
             query: User query
             context_docs: Retrieved relevant documents
+            history: Summary and recent turns of the conversation, if any
+            priority: Scheduling priority (PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND)
+            deadline: time.monotonic() by which generation must have started
             
         Returns:
             Generated response
+            
+        Raises:
+            SchedulerBusy: When the generation was shed (queue full or deadline passed)
         """
         logger.info(f"Generating response for: {query}")
         
         try:
-            # Separate wine products from other documents
-            wine_products = [doc for doc in context_docs if doc['metadata'].get('type') == 'wine_product']
-            other_docs = [doc for doc in context_docs if doc['metadata'].get('type') != 'wine_product']
-            
-            # Prepare focused context
-            context_parts = []
-            
-            # Add wine products first (most important)
-            if wine_products:
-                context_parts.append("WINE PRODUCTS:")
-                for doc in wine_products:
-                    context_parts.append(f"- {doc['content']}")
-            
-            # Add other relevant info (limited)
-            if other_docs and len(wine_products) < 3:  # Only if we don't have enough wine products
-                context_parts.append("\nADDITIONAL INFORMATION:")
-                for doc in other_docs[:2]:  # Limit to 2 other documents
-                    context_parts.append(f"- {doc['content']}")
-            
-            context = "\n".join(context_parts)
-            
-            # Create focused prompt
-            prompt = f"""You are a wine store customer service assistant. Answer the user's question concisely and directly.
-
-CONTEXT:
-{context}
-
-USER QUESTION: {query}
-
-INSTRUCTIONS:
-- If asking about specific wines, focus on the wine products listed above
-- Keep responses concise and to the point
-- If we have the wines they're asking about, say so directly
-- Don't include irrelevant information about return policies or wine clubs unless specifically asked
-- If you don't have specific information, say so clearly
-
-RESPONSE:"""
+            with metrics.timed('prompt_build'):
+                # Compress and pack the retrieved documents into the token budget
+                context, stats = build_context(query, context_docs, max_tokens=self.context_tokens,
+                                               max_doc_tokens=self.context_doc_tokens)
+                self.last_context_stats = stats
+                logger.info(
+                    f"Context: {stats['documents']} documents ({stats['compressed']} compressed, "
+                    f"{stats['dropped']} dropped), ~{stats['tokens']}/{stats['budget']} tokens"
+                )
+                
+                # Static instructions first (cacheable prefix), then context and question
+                prompt = build_prompt(context, query, history=history)
+                tracing.set_attributes(
+                    context_documents=stats['documents'], context_compressed=stats['compressed'],
+                    context_dropped=stats['dropped'], context_tokens=stats['tokens'],
+                    prompt_chars=len(prompt), prompt_tokens=estimate_tokens(prompt)
+                )
 
-            # Generate response
-            response = self.llm.invoke(prompt)
+            # Generate response once the scheduler admits it
+            with metrics.timed('llm_queue'):
+                self.scheduler.acquire(priority, deadline)
+            try:
+                with metrics.timed('llm_generation'):
+                    generation = self.llm.generate([prompt]).generations[0][0]
+                    timings = generation_timings(generation.generation_info)
+                    self._trace_generation(timings)
+            finally:
+                self.scheduler.release()
+            response = generation.text
+            
+            self.last_generation_stats = timings
+            if timings:
+                # Time to first token: model load plus prompt prefill
+                metrics.observe('llm_ttft', (timings['load_ms'] + timings['prefill_ms']) / 1000)
+                metrics.count('llm_tokens', timings['prefill_tokens'], direction='prompt')
+                metrics.count('llm_tokens', timings['decode_tokens'], direction='completion')
+                logger.info(
+                    f"Prefill {timings['prefill_ms']:.0f}ms ({timings['prefill_tokens']} tokens), "
+                    f"decode {timings['decode_ms']:.0f}ms ({timings['decode_tokens']} tokens, "
+                    f"{timings['decode_tokens_per_second']:.1f} tokens/s)"
+                )
             
             logger.info("Generated response successfully")
             return response
             
+        except SchedulerBusy as e:
+            metrics.count('errors', stage='scheduler', reason=e.reason)
+            logger.warning(f"Generation shed: {e.reason}")
+            raise
         except Exception as e:
+            metrics.count('errors', stage='generation')
             logger.error(f"Error generating response: {e}")
             return f"I apologize, but I encountered an error while generating a response: {str(e)}"
     
-    def query(self, question: str, limit: int = 3) -> Dict[str, Any]:
+    def _trace_generation(self, timings: Dict[str, Any]):
+        """Record Ollama's reported timings on the generation span, with load/prefill/decode children"""
+        trace = tracing.current_trace()
+        if trace is None:
+            return
+        tracing.set_attributes(model=self.model_name, **timings)
+        if not timings:
+            return
+        # Ollama reports durations only: lay the phases out back to back,
+        # ending when the generation returned
+        start = max(tracing.current_span().start_ns, trace.now_ns() - int(timings['total_ms'] * 1e6))
+        for phase, ms, tokens in (('llm_load', timings['load_ms'], None),
+                                  ('llm_prefill', timings['prefill_ms'], timings['prefill_tokens']),
+                                  ('llm_decode', timings['decode_ms'], timings['decode_tokens'])):
+            end = start + int(ms * 1e6)
+            tracing.add_span(phase, start, end, tokens=tokens)
+            start = end
+    
+    def query(self, question: str, limit: int = 3, session: ConversationSession = None,
+              priority: int = PRIORITY_INTERACTIVE, deadline: float = None, trace: bool = False) -> Dict[str, Any]:
         """
         Complete RAG pipeline: search + generate response
         
+        Concurrent identical questions outside a conversation (or at its
+        first turn) share one search and one generation.
+        
         Args:
             question: User question
             limit: Number of documents to retrieve
+            session: Conversation the question belongs to; follow-ups are
+                rewritten with its topic and its history goes into the prompt.
+                The turn is recorded on the session (save it in its store).
+            priority: Generation priority (PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND)
+            deadline: time.monotonic() by which generation must have started;
+                later requests get BUSY_MESSAGE instead of waiting
+            trace: Include the request's trace (spans per stage) in the result
             
         Returns:
-            Dictionary with response and retrieved documents
+            Dictionary with response, retrieved documents, answer_path
+            ("catalog" for templated catalog answers, "llm" for generated
+            ones, "busy" when generation was shed, with retry_after seconds),
+            search_query (the rewritten question used for retrieval) and,
+            when requested, trace (see Trace.to_dict)
         """
+        if not (trace or self.trace_exporter):
+            return self._query(question, limit, session, priority, deadline)
+        
+        with tracing.start_trace('rag.query', question=question, limit=limit,
+                                 conversation_id=session.conversation_id if session else None) as request_trace:
+            result = self._query(question, limit, session, priority, deadline)
+            tracing.set_attributes(answer_path=result['answer_path'], search_query=result['search_query'])
+        if self.trace_exporter:
+            self.trace_exporter.export(request_trace)
+        if trace:
+            result['trace'] = request_trace.to_dict()
+        return result
+    
+    def _query(self, question: str, limit: int, session: Optional[ConversationSession],
+               priority: int, deadline: Optional[float]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        search_query = session.rewrite_query(question) if session else question
+        if search_query != question:
+            logger.info(f"Follow-up rewritten as: {search_query}")
+        history = session.prompt_history() if session else ""
+        
+        # Identical questions without conversation history share one answer
+        if self.coalesce_requests and not history:
+            # Fixed once, so retries keep the caller's budget
+            if deadline is None:
+                deadline = time.monotonic() + self.scheduler.queue_timeout
+            key = ('query', normalize_query(search_query), limit, priority)
+            result, shared = self.query_flight.execute(
+                key, self._answer, question, search_query, limit, None, priority, deadline
+            )
+            # The leader's deadline applied to the shared answer; followers
+            # whose own deadline has not passed try again, coalescing behind
+            # whichever of them leads the next attempt
+            while shared and result['answer_path'] == 'busy' and time.monotonic() < deadline:
+                result, shared = self.query_flight.execute(
+                    key, self._answer, question, search_query, limit, None, priority, deadline
+                )
+        else:
+            result = self._answer(question, search_query, limit, history, priority, deadline)
+        
+        # Shed requests are not part of the conversation
+        if session and result['answer_path'] != 'busy':
+            session.add_turn(question, result['response'], search_query)
+        
+        metrics.observe('query', time.perf_counter() - start, answer_path=result['answer_path'])
+        metrics.count('answers', path=result['answer_path'])
+        return {**result, 'query': question}
+    
+    def _answer(self, question: str, search_query: str, limit: int, history: Optional[str],
+                priority: int = PRIORITY_INTERACTIVE, deadline: float = None) -> Dict[str, Any]:
+        """Search and answer (templated or generated) without touching the session"""
+        # Pure catalog filters are answered from the products' fields
+        constraints = plan_query(search_query) if self.answer_fast_path else None
+        
         # Search for relevant documents
-        relevant_docs = self.search(question, limit=limit)
+        relevant_docs = self.search(search_query, limit=max(limit, CATALOG_ANSWER_ITEMS) if constraints else limit)
         
-        # Generate response
-        response = self.generate_response(question, relevant_docs)
+        answer_path = 'llm'
+        retry_after = None
+        matches = select_catalog_matches(constraints, relevant_docs) if constraints else []
+        if matches:
+            logger.info(f"Catalog lookup answered without the LLM ({len(matches)} wines)")
+            answer_path = 'catalog'
+            relevant_docs = matches
+            response = render_catalog_answer(constraints, matches)
+        else:
+            # Generate response
+            relevant_docs = relevant_docs[:limit]
+            try:
+                response = self.generate_response(question, relevant_docs, history=history,
+                                                  priority=priority, deadline=deadline)
+            except SchedulerBusy as e:
+                answer_path = 'busy'
+                retry_after = e.retry_after
+                response = BUSY_MESSAGE
         
-        return {
+        result = {
             'response': response,
             'relevant_documents': relevant_docs,
-            'query': question
+            'query': question,
+            'search_query': search_query,
+            'answer_path': answer_path
         }
+        if retry_after is not None:
+            result['retry_after'] = retry_after
+        return result
+    
+    def warm_up(self) -> bool:
+        """
+        Load the generation model and cache the static prompt prefix
+        
+        Runs at background priority, so it never delays customer requests.
+        
+        Returns:
+            True when the model answered
+        """
+        try:
+            with self.scheduler.slot(PRIORITY_BACKGROUND):
+                self.llm.generate([build_prompt("", "Hello")], options={'num_predict': 1})
+            logger.info(f"Warmed up {self.model_name}")
+            return True
+        except Exception as e:
+            logger.warning(f"Warm-up failed: {e}")
+            return False
 
 def main():
     """Test the RAG system"""
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Reranking stage for the RAG system
+Rescores the top vector-search candidates so fewer, more relevant documents
+reach the LLM: a feature-based scorer (lexical overlap, price/type/country
+constraints parsed from the query, rating, featured) and an optional CPU
+cross-encoder run in batches within a time budget
+"""
+
+import math
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+# Defaults, overridable with environment variables
+DEFAULT_RERANKER = os.getenv("RAG_RERANKER", "none")
+DEFAULT_CROSS_ENCODER_MODEL = os.getenv(
+    "RAG_CROSS_ENCODER_MODEL",
+    str(Path(__file__).parent.parent / "models" / "ms-marco-MiniLM-L-6-v2")
+)
+
+_TOKEN_RE = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are about any as at be can could do does for from have how i in is it me my of on or our "
+    "please some tell that the their there these this to us was what when where which who why will with "
+    "would you your wine wines".split()
+)
+
+_PRICE_UNDER_RE = re.compile(r"(?:under|below|less than|cheaper than|max(?:imum)?|up to)\s*\$?\s*(\d+(?:\.\d+)?)")
+_PRICE_OVER_RE = re.compile(r"(?:over|above|more than|at least|min(?:imum)?)\s*\$?\s*(\d+(?:\.\d+)?)")
+_PRICE_BETWEEN_RE = re.compile(r"between\s*\$?\s*(\d+(?:\.\d+)?)\s*(?:and|-|to)\s*\$?\s*(\d+(?:\.\d+)?)")
+
+WINE_TYPES = {
+    'red': ('red',), 'white': ('white',), 'rose': ('rose', 'rosé'),
+    'sparkling': ('sparkling', 'champagne', 'prosecco', 'cava'), 'dessert': ('dessert', 'sweet', 'port'),
+}
+COUNTRIES = {
+    'italy': ('italy', 'italian'), 'france': ('france', 'french'), 'spain': ('spain', 'spanish'),
+    'portugal': ('portugal', 'portuguese'), 'germany': ('germany', 'german'), 'usa': ('usa', 'american', 'california'),
+    'australia': ('australia', 'australian'), 'argentina': ('argentina', 'argentinian', 'argentine'),
+    'chile': ('chile', 'chilean'), 'new zealand': ('new zealand',), 'south africa': ('south africa', 'south african'),
+}
+_RATING_WORDS = ("best", "top", "highest", "rated", "rating", "popular", "favorite", "favourite")
+_FEATURED_WORDS = ("recommend", "featured", "suggest", "pick", "special")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords"""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def parse_query_constraints(query: str) -> Dict[str, Any]:
+    """
+    Extract catalog constraints from a question
+
+    Args:
+        query: User question
+
+    Returns:
+        Dictionary with max_price, min_price, wine_types, countries and
+        the wants_rating / wants_featured flags (only keys that were found)
+    """
+    text = query.lower()
+    constraints: Dict[str, Any] = {}
+
+    between = _PRICE_BETWEEN_RE.search(text)
+    if between:
+        low, high = sorted(float(v) for v in between.groups())
+        constraints['min_price'], constraints['max_price'] = low, high
+    else:
+        under = _PRICE_UNDER_RE.search(text)
+        over = _PRICE_OVER_RE.search(text)
+        if under:
+            constraints['max_price'] = float(under.group(1))
+        if over:
+            constraints['min_price'] = float(over.group(1))
+
+    words = set(_TOKEN_RE.findall(text))
+    types = [t for t, synonyms in WINE_TYPES.items() if any(s in words for s in synonyms)]
+    if types:
+        constraints['wine_types'] = types
+    countries = [c for c, names in COUNTRIES.items() if any(re.search(rf"\b{n}\b", text) for n in names)]
+    if countries:
+        constraints['countries'] = countries
+    if any(w in words for w in _RATING_WORDS):
+        constraints['wants_rating'] = True
+    if any(w in words for w in _FEATURED_WORDS):
+        constraints['wants_featured'] = True
+    return constraints
+
+
+def price_in_dollars(metadata: Dict[str, Any]) -> Optional[float]:
+    """Product price in dollars (metadata stores the catalog price in cents), None when unknown"""
+    price = metadata.get('price')
+    return float(price) / 100 if price is not None else None
+
+
+def _constraint_match(metadata: Dict[str, Any], constraints: Dict[str, Any]) -> float:
+    """+1 per satisfied and -1 per violated constraint, for wine products"""
+    score = 0.0
+    price = price_in_dollars(metadata)
+    if price is not None:
+        if 'max_price' in constraints:
+            score += 1.0 if price <= constraints['max_price'] else -1.0
+        if 'min_price' in constraints:
+            score += 1.0 if price >= constraints['min_price'] else -1.0
+    wine_type = str(metadata.get('wine_type') or "").lower()
+    if wine_type and 'wine_types' in constraints:
+        matches = any(s in wine_type for t in constraints['wine_types'] for s in WINE_TYPES[t])
+        score += 1.0 if matches else -1.0
+    country = str(metadata.get('country') or "").lower()
+    if country and country != "unknown" and 'countries' in constraints:
+        matches = any(n in country or c in country for c in constraints['countries'] for n in COUNTRIES[c])
+        score += 1.0 if matches else -1.0
+    return score
+
+
+class Reranker(ABC):
+    """
+    Base class for rerankers
+
+    rerank receives candidates in vector-search order ({content, metadata,
+    score}) and returns the best `limit` of them, each with a rerank_score.
+    """
+
+    name: str = "base"
+
+    @abstractmethod
+    def rerank(self, query: str, candidates: List[Dict[str, Any]], limit: int,
+               time_budget_ms: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Rescore candidates and return the top `limit`"""
+
+
+class FeatureReranker(Reranker):
+    """
+    Linear scorer over cheap features
+
+    Combines the vector score with query-term overlap, catalog constraints
+    parsed from the question (price, type, country), rating and featured
+    flags, and a prior for wine products when the question is about wines.
+    Costs well under a millisecond per candidate.
+    """
+
+    name = "features"
+
+    DEFAULT_WEIGHTS = {
+        'vector': 1.0,
+        'lexical': 0.5,
+        'constraints': 0.3,
+        'rating': 0.15,
+        'featured': 0.1,
+        'wine_product': 0.15,
+    }
+
+    def __init__(self, weights: Dict[str, float] = None):
+        """
+        Args:
+            weights: Feature weights, merged over DEFAULT_WEIGHTS
+        """
+        self.weights = {**self.DEFAULT_WEIGHTS, **(weights or {})}
+
+    def score(self, query: str, candidates: List[Dict[str, Any]]) -> np.ndarray:
+        """Feature score of every candidate"""
+        constraints = parse_query_constraints(query)
+        query_terms = set(tokenize(query))
+        wine_intent = bool(constraints) or "wine" in query.lower()
+        w = self.weights
+
+        scores = np.zeros(len(candidates), dtype=np.float32)
+        for i, doc in enumerate(candidates):
+            metadata = doc.get('metadata') or {}
+            is_wine = metadata.get('type') == 'wine_product'
+            score = w['vector'] * float(doc.get('score') or 0.0)
+            if query_terms:
+                doc_terms = set(tokenize(doc['content']))
+                score += w['lexical'] * len(query_terms & doc_terms) / len(query_terms)
+            # Catalog features only count for questions about wines
+            if is_wine and wine_intent:
+                score += w['constraints'] * _constraint_match(metadata, constraints)
+                rating = float(metadata.get('average_rating') or 0.0) / 5.0
+                score += w['rating'] * rating * (2.0 if constraints.get('wants_rating') else 1.0)
+                if metadata.get('featured'):
+                    score += w['featured'] * (2.0 if constraints.get('wants_featured') else 1.0)
+                score += w['wine_product']
+            scores[i] = score
+        return scores
+
+    def rerank(self, query: str, candidates: List[Dict[str, Any]], limit: int,
+               time_budget_ms: Optional[float] = None) -> List[Dict[str, Any]]:
+        scores = self.score(query, candidates)
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [{**candidates[i], 'rerank_score': float(scores[i])} for i in order]
+
+
+class CrossEncoderReranker(Reranker):
+    """
+    CPU cross-encoder reranker
+
+    Runs a sentence-transformers cross-encoder exported to ONNX (a directory
+    with model.onnx and tokenizer.json, e.g. ms-marco-MiniLM-L-6-v2) on
+    (query, passage) pairs in batches. Candidates are first ordered by the
+    feature scorer and cross-encoded in that order until the time budget is
+    spent; the rest keep their feature order below the scored ones.
+    """
+
+    name = "cross_encoder"
+
+    def __init__(self, model_dir: str = DEFAULT_CROSS_ENCODER_MODEL, max_length: int = 256,
+                 batch_size: int = 8, threads: int = None, fallback: FeatureReranker = None):
+        """
+        Args:
+            model_dir: Directory containing model.onnx and tokenizer.json
+            max_length: Maximum tokens per (query, passage) pair
+            batch_size: Pairs per inference call
+            threads: Intra-op threads for onnxruntime (defaults to all cores)
+            fallback: Feature scorer used for the pre-ordering
+        """
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError(
+                "The cross-encoder reranker needs onnxruntime and tokenizers: "
+                "pip install onnxruntime tokenizers"
+            ) from e
+
+        model_path = Path(model_dir)
+        onnx_file = model_path / "model.onnx"
+        if not onnx_file.exists():
+            onnx_file = model_path / "onnx" / "model.onnx"
+
+        self.batch_size = batch_size
+        self.fallback = fallback or FeatureReranker()
+
+        self.tokenizer = Tokenizer.from_file(str(model_path / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(str(onnx_file), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _score_batch(self, query: str, passages: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch([(query, passage) for passage in passages])
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+        }
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        logits = self.session.run(None, inputs)[0]
+        return logits.reshape(len(passages), -1)[:, 0]
+
+    def rerank(self, query: str, candidates: List[Dict[str, Any]], limit: int,
+               time_budget_ms: Optional[float] = None) -> List[Dict[str, Any]]:
+        deadline = time.perf_counter() + time_budget_ms / 1000 if time_budget_ms else math.inf
+        feature_scores = self.fallback.score(query, candidates)
+        order = list(np.argsort(-feature_scores, kind="stable"))
+
+        scored = []
+        position = 0
+        while position < len(order) and time.perf_counter() < deadline:
+            batch = order[position:position + self.batch_size]
+            logits = self._score_batch(query, [candidates[i]['content'] for i in batch])
+            scored.extend(zip(batch, logits))
+            position += len(batch)
+
+        # Cross-encoded candidates first (sigmoid of the logit), then the rest in feature order
+        scored.sort(key=lambda item: -item[1])
+        results = [{**candidates[i], 'rerank_score': float(1.0 / (1.0 + math.exp(-logit)))} for i, logit in scored]
+        results.extend({**candidates[i], 'rerank_score': float(feature_scores[i])} for i in order[position:])
+        return results[:limit]
+
+
+RERANKERS = {
+    'features': FeatureReranker,
+    'cross_encoder': CrossEncoderReranker,
+}
+
+
+def create_reranker(reranker: str = DEFAULT_RERANKER, **kwargs) -> Optional[Reranker]:
+    """
+    Create a reranker by name
+
+    Args:
+        reranker: "none", "features" (feature-based scorer) or
+            "cross_encoder" (ONNX cross-encoder on CPU)
+        **kwargs: Reranker-specific options
+
+    Returns:
+        Reranker instance, or None for "none"
+    """
+    if reranker in (None, "none"):
+        return None
+    if reranker not in RERANKERS:
+        raise ValueError(f"Unknown reranker: {reranker}")
+    return RERANKERS[reranker](**kwargs)
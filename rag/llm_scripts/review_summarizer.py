@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Review summarisation for the RAG system
+Aggregates customer reviews per wine (and vintage) into a bounded number of
+representative documents instead of indexing one vector per review
+"""
+
+import math
+import re
+from collections import Counter
+from typing import List, Dict, Any, Tuple
+
+# Reviews are bucketed by sentiment so positive and critical opinions each get
+# their own representative document
+SENTIMENT_BUCKETS = [
+    ('positive', lambda rating: rating >= 4),
+    ('mixed', lambda rating: 3 <= rating < 4),
+    ('critical', lambda rating: rating < 3),
+]
+
+_WORD_RE = re.compile(r"[a-z']+")
+_STOPWORDS = frozenset("""
+a an and are as at be but by for from has have i in is it its my of on or so
+that the this to was were with very wine we you our me they them just really
+""".split())
+
+
+def _tokenize(text: str) -> Counter:
+    """Bag of words for a review comment, without stopwords"""
+    return Counter(w for w in _WORD_RE.findall((text or '').lower()) if w not in _STOPWORDS)
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    dot = sum(count * b[word] for word, count in a.items() if word in b)
+    norm = math.sqrt(sum(c * c for c in a.values())) * math.sqrt(sum(c * c for c in b.values()))
+    return dot / norm if norm else 0.0
+
+
+def select_representative_reviews(reviews: List[Dict[str, Any]], max_quotes: int = 3) -> List[Dict[str, Any]]:
+    """
+    Pick the reviews that best represent a group, extractively
+
+    Each comment is scored by its similarity to the group centroid, so the
+    quotes chosen are the ones closest to what most reviewers said. Once a
+    review is picked, near-identical comments are skipped to keep the quotes
+    diverse.
+
+    Args:
+        reviews: Reviews in the group (must have 'comment' and 'rating')
+        max_quotes: Maximum number of reviews to return
+
+    Returns:
+        Selected reviews, most representative first
+    """
+    vectors = [_tokenize(r.get('comment')) for r in reviews]
+    centroid = Counter()
+    for vector in vectors:
+        centroid.update(vector)
+
+    ranked = sorted(
+        range(len(reviews)),
+        key=lambda i: (_cosine(vectors[i], centroid), len(reviews[i].get('comment') or '')),
+        reverse=True
+    )
+
+    selected = []
+    for i in ranked:
+        if len(selected) >= max_quotes:
+            break
+        if not (reviews[i].get('comment') or '').strip():
+            continue
+        if any(_cosine(vectors[i], vectors[j]) > 0.8 for j in selected):
+            continue
+        selected.append(i)
+
+    return [reviews[i] for i in selected]
+
+
+def _group_key(review: Dict[str, Any]) -> Tuple[Any, Any]:
+    return review['wine_id'], review.get('vintage')
+
+
+def summarize_reviews(reviews: List[Dict[str, Any]], max_quotes_per_doc: int = 3) -> List[Dict[str, Any]]:
+    """
+    Aggregate reviews into per-wine, per-vintage summary documents
+
+    Every (wine, vintage) group yields at most one document per sentiment
+    bucket, so the document count is bounded by the catalogue rather than by
+    review volume. The raw reviews are kept in the metadata for drill-down.
+
+    Args:
+        reviews: Review dictionaries with wine_id, wine_name, rating, comment,
+            author, vintage, date and the wine details (wine_type, region,
+            country, price)
+        max_quotes_per_doc: Number of verbatim quotes in each summary
+
+    Returns:
+        List of RAG document dictionaries
+    """
+    groups: Dict[Tuple[Any, Any], List[Dict[str, Any]]] = {}
+    for review in reviews:
+        groups.setdefault(_group_key(review), []).append(review)
+
+    documents = []
+    for (wine_id, vintage), group in groups.items():
+        wine = group[0]
+        vintage_label = vintage or 'Not specified'
+        avg_rating = sum(r['rating'] for r in group) / len(group)
+        distribution = Counter(int(r['rating']) for r in group)
+
+        for bucket, matches in SENTIMENT_BUCKETS:
+            bucket_reviews = [r for r in group if matches(r['rating'])]
+            if not bucket_reviews:
+                continue
+
+            quotes = select_representative_reviews(bucket_reviews, max_quotes=max_quotes_per_doc)
+            bucket_avg = sum(r['rating'] for r in bucket_reviews) / len(bucket_reviews)
+
+            content = f"""
+Customer Reviews for {wine['wine_name']} (Vintage: {vintage_label}):
+Overall: {len(group)} reviews, average rating {avg_rating:.1f}/5 stars
+Rating breakdown: {', '.join(f"{stars} stars: {distribution[stars]}" for stars in sorted(distribution, reverse=True))}
+{bucket.capitalize()} reviews ({len(bucket_reviews)}, average {bucket_avg:.1f}/5):
+"""
+            for review in quotes:
+                content += f"- {review['author']}: {review['rating']}/5 - {review['comment']}\n"
+
+            content += f"""
+Wine Details:
+- Type: {wine['wine_type']}
+- Region: {wine['region'] or 'Unknown'}
+- Country: {wine['country'] or 'Unknown'}
+- Price: ${wine['price'] / 100:.2f}
+"""
+
+            documents.append({
+                'id': f"reviews_{wine_id}_{vintage or 'nv'}_{bucket}",
+                'content': content,
+                'metadata': {
+                    'type': 'customer_review',
+                    'wine_id': wine_id,
+                    'wine_name': wine['wine_name'],
+                    'vintage': vintage,
+                    'sentiment': bucket,
+                    'rating': round(bucket_avg, 2),
+                    'average_rating': round(avg_rating, 2),
+                    'review_count': len(bucket_reviews),
+                    'total_review_count': len(group),
+                    'review_ids': [r['id'] for r in bucket_reviews],
+                    'reviews': bucket_reviews
+                }
+            })
+
+    return documents
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Generation scheduler for the RAG system
+Admission control in front of the LLM: at most max_concurrency generations
+run at once, waiting requests are served by priority (interactive chat before
+background warm-up) and requests that cannot start before their deadline, or
+find the queue full, are shed immediately with SchedulerBusy.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+# Defaults, overridable with environment variables
+LLM_CONCURRENCY = int(os.getenv("RAG_LLM_CONCURRENCY", "2"))
+LLM_MAX_QUEUE = int(os.getenv("RAG_LLM_MAX_QUEUE", "32"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("RAG_LLM_QUEUE_TIMEOUT", "15"))
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: 'interactive', PRIORITY_BACKGROUND: 'background'}
+
+
+class SchedulerBusy(Exception):
+    """A generation was shed: the queue was full or its deadline passed while waiting"""
+
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        super().__init__(f"LLM busy ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ('priority', 'event', 'granted', 'cancelled')
+
+    def __init__(self, priority: int):
+        self.priority = priority
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class GenerationScheduler:
+    """
+    Bounded-concurrency priority scheduler for LLM calls
+
+    Use `with scheduler.slot(priority, deadline): ...` around a generation.
+    A freed slot is handed directly to the highest-priority waiter (FIFO
+    within a priority), so a steady stream of background work cannot delay
+    interactive requests beyond the generations already running.
+    Thread-safe.
+    """
+
+    def __init__(self, max_concurrency: int = LLM_CONCURRENCY, max_queue: int = LLM_MAX_QUEUE,
+                 queue_timeout: float = LLM_QUEUE_TIMEOUT):
+        """
+        Args:
+            max_concurrency: Generations running at once (match OLLAMA_NUM_PARALLEL)
+            max_queue: Waiting requests beyond which new ones are shed
+            queue_timeout: Default seconds a request may wait for a slot
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._heap = []
+        self._sequence = itertools.count()
+        self._running = 0
+        self._waiting = 0
+        self._admitted: Dict[str, int] = {}
+        self._shed: Dict[str, int] = {}
+        self._wait_total: Dict[str, float] = {}
+        self._wait_max: Dict[str, float] = {}
+
+    def _record_admission(self, priority: int, waited: float):
+        name = PRIORITY_NAMES.get(priority, str(priority))
+        self._admitted[name] = self._admitted.get(name, 0) + 1
+        self._wait_total[name] = self._wait_total.get(name, 0.0) + waited
+        self._wait_max[name] = max(self._wait_max.get(name, 0.0), waited)
+
+    def _shed_request(self, reason: str) -> SchedulerBusy:
+        self._shed[reason] = self._shed.get(reason, 0) + 1
+        return SchedulerBusy(reason, retry_after=max(1.0, self.queue_timeout / 4))
+
+    def acquire(self, priority: int = PRIORITY_INTERACTIVE, deadline: Optional[float] = None):
+        """
+        Wait for a generation slot
+
+        Args:
+            priority: PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND (lower runs first)
+            deadline: time.monotonic() by which the generation must have
+                started (defaults to now + queue_timeout)
+
+        Raises:
+            SchedulerBusy: When the queue is full or the deadline passes
+        """
+        start = time.monotonic()
+        deadline = deadline if deadline is not None else start + self.queue_timeout
+        with self._lock:
+            if self._running < self.max_concurrency and not self._waiting:
+                self._running += 1
+                self._record_admission(priority, 0.0)
+                return
+            if deadline <= start:
+                raise self._shed_request('deadline')
+            if self._waiting >= self.max_queue:
+                raise self._shed_request('queue_full')
+            waiter = _Waiter(priority)
+            heapq.heappush(self._heap, (priority, next(self._sequence), waiter))
+            self._waiting += 1
+
+        waiter.event.wait(max(0.0, deadline - time.monotonic()))
+        with self._lock:
+            if not waiter.granted:
+                waiter.cancelled = True
+                self._waiting -= 1
+                raise self._shed_request('deadline')
+            self._record_admission(priority, time.monotonic() - start)
+
+    def release(self):
+        """Free a slot, handing it to the next waiter if there is one"""
+        with self._lock:
+            while self._heap:
+                _, _, waiter = heapq.heappop(self._heap)
+                if not waiter.cancelled:
+                    waiter.granted = True
+                    self._waiting -= 1
+                    waiter.event.set()
+                    return
+            self._running -= 1
+
+    @contextmanager
+    def slot(self, priority: int = PRIORITY_INTERACTIVE, deadline: Optional[float] = None):
+        """Context manager around acquire/release"""
+        self.acquire(priority, deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Running and queued generations, admissions, sheds and wait times per priority"""
+        with self._lock:
+            return {
+                'max_concurrency': self.max_concurrency,
+                'max_queue': self.max_queue,
+                'running': self._running,
+                'queue_depth': self._waiting,
+                'admitted': dict(self._admitted),
+                'shed': dict(self._shed),
+                'mean_wait_ms': {name: 1000 * total / self._admitted[name] for name, total in self._wait_total.items()},
+                'max_wait_ms': {name: 1000 * value for name, value in self._wait_max.items()},
+            }
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Per-request tracing for the RAG system
+A trace holds one span per pipeline stage with its attributes (candidate
+counts, prompt size, Ollama's prefill/decode timings). The current trace and
+span live in context variables, so stages anywhere in the call stack add to
+the request's trace without passing it around. Traces can be returned to the
+caller and exported as OpenTelemetry (OTLP/JSON) lines to a local file.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Defaults, overridable with environment variables
+TRACE_FILE = os.getenv("RAG_TRACE_FILE") or None
+SERVICE_NAME = os.getenv("RAG_SERVICE_NAME", "wine-rag")
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("rag_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("rag_span", default=None)
+
+
+class Span:
+    """One timed stage of a trace"""
+
+    __slots__ = ('name', 'span_id', 'parent_id', 'start_ns', 'end_ns', 'attributes', '_token')
+
+    def __init__(self, name: str, parent_id: Optional[str], start_ns: int, attributes: Dict[str, Any] = None):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start_ns = start_ns
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self._token = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or self.start_ns) - self.start_ns) / 1e6
+
+
+class Trace:
+    """
+    Spans of one request
+
+    Span times are Unix nanoseconds derived from a monotonic clock, so
+    durations are unaffected by wall-clock adjustments.
+    """
+
+    def __init__(self, name: str, attributes: Dict[str, Any] = None):
+        self.trace_id = uuid.uuid4().hex
+        self._unix_start_ns = time.time_ns()
+        self._perf_start_ns = time.perf_counter_ns()
+        self.spans: List[Span] = []
+        self.root = Span(name, None, self.now_ns(), attributes)
+        self.spans.append(self.root)
+
+    def now_ns(self) -> int:
+        return self._unix_start_ns + time.perf_counter_ns() - self._perf_start_ns
+
+    def start_span(self, name: str, attributes: Dict[str, Any] = None) -> Span:
+        """Open a span as a child of the current one and make it current"""
+        parent = _current_span.get()
+        span = Span(name, parent.span_id if parent else self.root.span_id, self.now_ns(), attributes)
+        self.spans.append(span)
+        span._token = _current_span.set(span)
+        return span
+
+    def end_span(self, span: Span):
+        span.end_ns = self.now_ns()
+        if span._token is not None:
+            _current_span.reset(span._token)
+            span._token = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact form for API responses: span offsets and durations in milliseconds"""
+        return {
+            'trace_id': self.trace_id,
+            'duration_ms': self.root.duration_ms,
+            'spans': [
+                {
+                    'name': span.name,
+                    'span_id': span.span_id,
+                    'parent_id': span.parent_id,
+                    'start_ms': (span.start_ns - self.root.start_ns) / 1e6,
+                    'duration_ms': span.duration_ms,
+                    'attributes': span.attributes,
+                }
+                for span in self.spans
+            ],
+        }
+
+    def to_otlp(self, service_name: str = SERVICE_NAME) -> Dict[str, Any]:
+        """OTLP/JSON ExportTraceServiceRequest holding this trace"""
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': _otlp_attributes({'service.name': service_name})},
+                'scopeSpans': [{
+                    'scope': {'name': __name__},
+                    'spans': [
+                        {
+                            'traceId': self.trace_id,
+                            'spanId': span.span_id,
+                            'parentSpanId': span.parent_id or "",
+                            'name': span.name,
+                            'kind': 1 if span.parent_id else 2,  # INTERNAL, root is SERVER
+                            'startTimeUnixNano': str(span.start_ns),
+                            'endTimeUnixNano': str(span.end_ns or span.start_ns),
+                            'attributes': _otlp_attributes(span.attributes),
+                        }
+                        for span in self.spans
+                    ],
+                }],
+            }]
+        }
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def current_trace() -> Optional[Trace]:
+    """Trace of the request being handled, if it is traced"""
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(name: str, **attributes):
+    """
+    Trace the enclosed block as one request
+
+    Yields:
+        The Trace, finished when the block exits
+    """
+    trace = Trace(name, attributes)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    try:
+        yield trace
+    finally:
+        trace.root.end_ns = trace.now_ns()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+def current_span() -> Optional[Span]:
+    """Innermost open span of the current trace"""
+    return _current_span.get()
+
+
+def set_attributes(**attributes):
+    """Add attributes to the current span (no-op outside a trace)"""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+
+def add_span(name: str, start_ns: int, end_ns: int, **attributes):
+    """Record an already finished child of the current span (e.g. from backend-reported timings)"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    parent = _current_span.get() or trace.root
+    span = Span(name, parent.span_id, start_ns, attributes)
+    span.end_ns = end_ns
+    trace.spans.append(span)
+
+
+class FileSpanExporter:
+    """
+    Appends traces to a file, one OTLP/JSON request per line
+
+    The lines can be replayed into any OTLP/HTTP collector
+    (POST /v1/traces) or inspected with jq; no collector is needed to record them.
+    """
+
+    def __init__(self, path: str, service_name: str = SERVICE_NAME):
+        """
+        Args:
+            path: File the traces are appended to
+            service_name: service.name resource attribute
+        """
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        line = json.dumps(trace.to_otlp(self.service_name), default=str)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write trace to {self.path}: {e}")
@@ -8,6 +8,8 @@ const RAG_API_BASE = "http://localhost:8000/api";
 export class WineChatbotAPI {
   constructor(baseURL = RAG_API_BASE) {
     this.baseURL = baseURL;
+    // Returned by the first reply; sent back so follow-ups keep their context
+    this.conversationId = null;
   }
 
   // Send a message to the chatbot
@@ -21,6 +23,7 @@ export class WineChatbotAPI {
         body: JSON.stringify({
           message,
           limit,
+          conversation_id: this.conversationId,
         }),
       });
 
@@ -28,7 +31,9 @@ export class WineChatbotAPI {
         throw new Error(`HTTP error! status: ${response.status}`);
       }
 
-      return await response.json();
+      const data = await response.json();
+      this.conversationId = data.conversation_id;
+      return data;
     } catch (error) {
       console.error("Error sending message to chatbot:", error);
       throw error;
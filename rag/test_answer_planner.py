@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for the catalog answer fast path
+Runs offline with the hash embedding backend, no LLM needed
+"""
+
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from llm_scripts.answer_planner import plan_query, select_catalog_matches, render_catalog_answer
+
+WINES = [
+    {'content': "Wine: Barolo Riserva\nType: Red\nPrice: $89.00\nCountry: Italy", 'score': 0.62,
+     'metadata': {'type': 'wine_product', 'wine_id': 1, 'name': 'Barolo Riserva', 'wine_type': 'Red',
+                  'price': 8900, 'region': 'Piedmont', 'country': 'Italy', 'average_rating': 4.8, 'review_count': 12}},
+    {'content': "Wine: Chianti Classico\nType: Red\nPrice: $24.00\nCountry: Italy", 'score': 0.58,
+     'metadata': {'type': 'wine_product', 'wine_id': 2, 'name': 'Chianti Classico', 'wine_type': 'Red',
+                  'price': 2400, 'region': 'Tuscany', 'country': 'Italy', 'average_rating': 4.2, 'review_count': 3}},
+    {'content': "Wine: Sancerre\nType: White\nPrice: $32.00\nCountry: France", 'score': 0.60,
+     'metadata': {'type': 'wine_product', 'wine_id': 3, 'name': 'Sancerre', 'wine_type': 'White',
+                  'price': 3200, 'region': 'Loire', 'country': 'France', 'average_rating': 4.5}},
+    {'content': "Returns are accepted within 30 days of delivery for unopened bottles.", 'score': 0.64,
+     'metadata': {'type': 'faq'}},
+]
+
+
+def test_plan_query():
+    """Only pure catalog filters take the fast path"""
+    assert plan_query("Do you have any Italian wines?") == {'countries': ['italy']}
+    assert plan_query("What red wines under $50?") == {'max_price': 50.0, 'wine_types': ['red']}
+    assert plan_query("What wine pairs with salmon under $30?") is None
+    assert plan_query("Recommend a red for a dinner party") is None
+    assert plan_query("What is your return policy?") is None
+    print("✅ Catalog lookups recognised")
+
+
+def test_render_catalog_answer():
+    """Matching products are listed from their payload fields"""
+    constraints = plan_query("What red wines under $50?")
+    matches = select_catalog_matches(constraints, WINES)
+    assert [doc['metadata']['name'] for doc in matches] == ['Chianti Classico']
+    answer = render_catalog_answer(constraints, matches)
+    assert answer.startswith("Yes, we carry red wines under $50. Here are some of them:")
+    assert "isn't our full range" in answer
+    assert "- Chianti Classico (Red, Tuscany, Italy) - $24.00, rated 4.2/5 (3 reviews)" in answer
+
+    constraints = plan_query("Which Italian wines are best rated?")
+    matches = select_catalog_matches(constraints, WINES[1:2] + WINES[:1])
+    assert [doc['metadata']['name'] for doc in matches] == ['Barolo Riserva', 'Chianti Classico']
+    assert render_catalog_answer(constraints, matches).startswith("Here are some highly rated Italian wines from our selection:")
+    assert select_catalog_matches(plan_query("Any Spanish wines?"), WINES) == []
+    expensive = select_catalog_matches(plan_query("Any wines over $50?"), WINES)
+    assert [doc['metadata']['name'] for doc in expensive] == ['Barolo Riserva']
+    print("✅ Catalog answers rendered")
+
+
+def test_rag_fast_path():
+    """WineRAGSystem.query answers catalog lookups without calling the LLM"""
+    from llm_scripts.embeddings import HashEmbeddingBackend
+    from llm_scripts.rag_system import WineRAGSystem
+
+    class FailingLLM:
+        def generate(self, prompts):
+            raise AssertionError("LLM called for a catalog lookup")
+
+    db_path = tempfile.mkdtemp()
+    try:
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=64))
+        rag.llm = FailingLLM()
+        documents = [
+            {'id': f"wine_{i}", 'content': doc['content'], 'metadata': doc['metadata']} for i, doc in enumerate(WINES)
+        ]
+        rag.create_embeddings_and_store(rag.chunk_documents(documents))
+
+        result = rag.query("Do you have any Italian wines?")
+        assert result['answer_path'] == 'catalog'
+        assert "Barolo Riserva" in result['response'] and "Chianti Classico" in result['response']
+        assert "Sancerre" not in result['response']
+
+        # No matching product: falls back to generation
+        result = rag.query("Do you have any Spanish wines?")
+        assert result['answer_path'] == 'llm' and "error" in result['response']
+        rag.client.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+    print("✅ RAG query uses the catalog fast path")
+
+
+def main():
+    print("🧪 Testing Answer Planner...")
+    print("=" * 50)
+
+    tests = [
+        ("Plan Query", test_plan_query),
+        ("Render Catalog Answer", test_render_catalog_answer),
+        ("RAG Fast Path", test_rag_fast_path),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
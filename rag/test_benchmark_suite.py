@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for the offline RAG benchmark suite
+Runs the suite on a small slice of the fixture corpus
+"""
+
+import sys
+from pathlib import Path
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+sys.path.append(str(current_dir / "benchmarks"))
+
+from benchmark_rag_suite import (
+    StubLLM, compare_results, latency_summary, load_labelled_queries, retrieval_quality, run_suite
+)
+
+
+def test_retrieval_quality():
+    """Recall@k and MRR over labelled rankings"""
+    quality = retrieval_quality(
+        [["a", "x", "b"], ["y", "z", "c"], ["q"]],
+        [["a", "b"], ["c"], ["missing"]],
+        k_values=(1, 3)
+    )
+    assert quality['recall@1'] == round((0.5 + 0 + 0) / 3, 4)
+    assert quality['recall@3'] == round((1 + 1 + 0) / 3, 4)
+    assert quality['mrr@3'] == round((1 + 1 / 3 + 0) / 3, 4)
+    assert quality['hit_rate@3'] == round(2 / 3, 4)
+    print("✅ Recall and MRR computed")
+
+
+def test_latency_summary():
+    summary = latency_summary([0.001 * i for i in range(1, 101)])
+    assert summary['samples'] == 100
+    assert summary['p50_ms'] == 50.5 and summary['max_ms'] == 100.0
+    assert summary['p50_ms'] <= summary['p95_ms'] <= summary['p99_ms']
+    print("✅ Latency percentiles computed")
+
+
+def test_labelled_queries():
+    """Queries are limited to documents in the corpus"""
+    queries = load_labelled_queries()
+    assert len(queries) >= 20 and all(q['query'] and q['relevant'] for q in queries)
+    limited = load_labelled_queries(document_ids={"knowledge_002"})
+    assert [q['relevant'] for q in limited] == [["knowledge_002"]]
+    print("✅ Labelled queries loaded")
+
+
+def test_stub_llm():
+    """The stub LLM answers deterministically with Ollama-style timings"""
+    llm = StubLLM(answer_tokens=10)
+    first = llm.generate(["CONTEXT: x\n\nUSER QUESTION: Red wine?\n\nRESPONSE:"]).generations[0][0]
+    second = llm.generate(["CONTEXT: x\n\nUSER QUESTION: Red wine?\n\nRESPONSE:"]).generations[0][0]
+    assert first.text == second.text and "Red wine?" in first.text
+    assert first.generation_info['eval_count'] == len(first.text.split())
+    assert first.generation_info['prompt_eval_count'] > 0
+    print("✅ Stub LLM is deterministic")
+
+
+def test_suite_run():
+    """A small suite run is reproducible and compares cleanly with itself"""
+    first = run_suite(max_pdfs=3, dimension=64, repeats=1, chat_repeats=1)
+    second = run_suite(max_pdfs=3, dimension=64, repeats=1, chat_repeats=1)
+
+    assert first['ingestion']['documents'] > 30 and first['ingestion']['chunks'] > 0
+    assert first['config']['queries'] == len(first['per_query']) > 10
+    assert first['quality'] == second['quality'] and first['per_query'] == second['per_query']
+    assert first['latency']['chat']['samples'] == first['config']['queries']
+    assert compare_results(first, first) == []
+
+    worse = {**first, 'quality': {**first['quality'], 'mrr@10': first['quality']['mrr@10'] - 0.1}}
+    assert any("mrr@10" in r for r in compare_results(first, worse))
+    slower = {**first, 'latency': {**first['latency'],
+                                   'search': {**first['latency']['search'],
+                                              'p95_ms': first['latency']['search']['p95_ms'] * 3 + 1}}}
+    assert any("search p95_ms" in r for r in compare_results(first, slower))
+    print("✅ Suite run reproducible")
+
+
+def main():
+    print("🧪 Testing RAG Benchmark Suite...")
+    print("=" * 50)
+
+    tests = [
+        ("Retrieval Quality", test_retrieval_quality),
+        ("Latency Summary", test_latency_summary),
+        ("Labelled Queries", test_labelled_queries),
+        ("Stub LLM", test_stub_llm),
+        ("Suite Run", test_suite_run),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
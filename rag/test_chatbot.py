@@ -29,7 +29,7 @@ def test_chat_functionality():
         
         # Test simple chat
         history = []
-        history, _ = bot.chat("Hello, what wines do you recommend?", history)
+        history, _, _ = bot.chat("Hello, what wines do you recommend?", history)
         
         if history and len(history) > 0:
             print(f"✅ Chat functionality working: {history[0][1][:50]}...")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test script for the fast chunker
+Checks that it produces exactly the same chunks as LangChain's splitter
+"""
+
+import json
+import random
+import sys
+from pathlib import Path
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.schema import Document
+
+from llm_scripts.chunking import FastRecursiveSplitter, chunk_documents
+
+
+def random_texts(count: int = 60, seed: int = 7):
+    """Random texts mixing paragraphs, lines, words and very long tokens"""
+    rng = random.Random(seed)
+    words = ["wine", "Bordeaux", "tannins", "shipping", "order", "cellar", "vintage", "a" * 1200, ""]
+    texts = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(0, 400)):
+            parts.append(rng.choice(words))
+            parts.append(rng.choice([" ", " ", " ", "\n", "\n\n", "  ", "\n\n\n", ""]))
+        texts.append("".join(parts))
+    return texts
+
+
+def sample_texts():
+    """Documents from the bundled sample data"""
+    texts = []
+    for path in (current_dir / "data").glob("*.json"):
+        with open(path) as f:
+            texts.append(json.dumps(json.load(f), indent=2))
+    return texts
+
+
+def test_split_text_parity():
+    """Fast splitter must match RecursiveCharacterTextSplitter chunk for chunk"""
+    texts = sample_texts() + random_texts()
+    for chunk_size, chunk_overlap in [(1000, 200), (100, 20), (50, 0), (300, 150)]:
+        reference = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=len,
+        )
+        fast = FastRecursiveSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        for text in texts:
+            assert fast.split_text(text) == reference.split_text(text), (chunk_size, chunk_overlap, text[:80])
+    print("✅ Fast splitter matches RecursiveCharacterTextSplitter")
+
+
+def test_chunk_documents_parity():
+    """Chunk metadata must match what split_documents produced"""
+    reference = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, length_function=len)
+    documents = [
+        {'id': f"doc_{i}", 'content': text, 'metadata': {'type': 'note', 'tags': ['a', 'b']}}
+        for i, text in enumerate(sample_texts() + random_texts(20))
+    ]
+
+    expected = []
+    for doc in documents:
+        chunks = reference.split_documents([Document(page_content=doc['content'], metadata=doc['metadata'])])
+        for i, chunk in enumerate(chunks):
+            chunk.metadata['chunk_id'] = f"{doc['id']}_chunk_{i}"
+            chunk.metadata['original_id'] = doc['id']
+        expected.extend(chunks)
+
+    actual = chunk_documents(documents)
+    assert [c.page_content for c in actual] == [c.page_content for c in expected]
+    assert [c.metadata for c in actual] == [c.metadata for c in expected]
+    assert all('chunk_id' not in doc['metadata'] for doc in documents)
+    print(f"✅ chunk_documents matches split_documents ({len(actual)} chunks)")
+
+
+def test_wine_product_is_atomic():
+    """A wine product must come back as one chunk with its key fields intact"""
+    wine = (
+        "Wine: Barolo Riserva\nType: Red\nGrapes: Nebbiolo\n"
+        f"Description: {'Deep cherry fruit and firm tannins. ' * 60}\n"
+        "Food Pairing: Beef, lamb\nPrice: $85.00\nRegion: Piedmont\nCountry: Italy\n"
+        "\nCustomer Reviews (2 reviews):\nAverage Rating: 4.5/5 stars\n- A: 5/5 - great\n- B: 4/5 - good\n"
+    )
+    chunks = chunk_documents([{'id': 'wine_1', 'content': wine, 'metadata': {'type': 'wine_product'}}])
+    assert len(chunks) == 1
+    assert len(chunks[0].page_content) <= 1000
+    for field in ("Wine: Barolo Riserva", "Price: $85.00", "Country: Italy", "Food Pairing: Beef, lamb"):
+        assert field in chunks[0].page_content
+    assert chunks[0].page_content.count("Description:") == 1
+    print("✅ Wine product kept as a single chunk")
+
+
+def test_email_splits_on_replies():
+    """Quoted history must not share a chunk with the new message"""
+    email = "Hi,\n\nDo you ship to Canada?\n\nThanks\nOn Mon, Jan 15, 2024 Store wrote:\n> We ship worldwide"
+    chunks = chunk_documents([{'id': 'email_1', 'content': email, 'metadata': {'type': 'email'}}])
+    assert [c.page_content for c in chunks] == [
+        "Hi,\n\nDo you ship to Canada?\n\nThanks",
+        "On Mon, Jan 15, 2024 Store wrote:\n> We ship worldwide",
+    ]
+    print("✅ Email split on reply boundary")
+
+
+def main():
+    print("🧪 Testing Fast Chunker...")
+    print("=" * 50)
+
+    tests = [
+        ("Split Text Parity", test_split_text_parity),
+        ("Chunk Documents Parity", test_chunk_documents_parity),
+        ("Wine Product Strategy", test_wine_product_is_atomic),
+        ("Email Strategy", test_email_splits_on_replies),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
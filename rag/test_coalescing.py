@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Test script for request coalescing
+Runs offline with the hash embedding backend and a fake LLM
+"""
+
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from llm_scripts.coalescing import SingleFlight, normalize_query
+
+
+def test_single_flight():
+    """Concurrent calls with one key run once and share the result"""
+    flight = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def slow(value):
+        runs.append(value)
+        release.wait(5)
+        return value * 2
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(flight.do, 'key', slow, 21) for _ in range(8)]
+        while flight.stats()['requests'] < 8:
+            time.sleep(0.01)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert results == [42] * 8 and len(runs) == 1
+    stats = flight.stats()
+    assert stats['executions'] == 1 and stats['coalesced'] == 7 and stats['in_flight'] == 0
+    assert stats['coalescing_rate'] == 7 / 8
+
+    # Completed calls are not cached
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.execute('key', lambda: 1) == (1, False)
+    print("✅ Concurrent calls coalesced")
+
+
+def test_single_flight_errors():
+    """Errors reach every waiting caller and do not stick"""
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(flight.do, 'key', failing) for _ in range(3)]
+        while flight.stats()['requests'] < 3:
+            time.sleep(0.01)
+        release.set()
+        errors = [f.exception() for f in futures]
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert flight.do('key', lambda: "ok") == "ok"
+    print("✅ Errors shared with waiting callers")
+
+
+def test_normalize_query():
+    assert normalize_query("  What is your  RETURN policy?? ") == "what is your return policy"
+    assert normalize_query("What is your return policy") == normalize_query("what is your return policy?")
+    print("✅ Queries normalised")
+
+
+def test_rag_query_coalescing():
+    """A burst of identical questions triggers one generation"""
+    from langchain_core.language_models.fake import FakeListLLM
+    from llm_scripts.embeddings import HashEmbeddingBackend
+    from llm_scripts.rag_system import WineRAGSystem
+
+    class SlowLLM(FakeListLLM):
+        calls: list = []
+
+        def _call(self, prompt, *args, **kwargs):
+            self.calls.append(prompt)
+            time.sleep(0.5)
+            return super()._call(prompt, *args, **kwargs)
+
+    db_path = tempfile.mkdtemp()
+    try:
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=64))
+        rag.llm = SlowLLM(responses=["Returns are accepted within 30 days."])
+        rag.create_embeddings_and_store(rag.chunk_documents([
+            {'id': 'faq', 'content': "Returns are accepted within 30 days.", 'metadata': {'type': 'faq'}},
+        ]))
+
+        questions = ["What is your return policy?", "what is your return policy", "What is your return policy?!"] * 3
+        with ThreadPoolExecutor(max_workers=len(questions)) as pool:
+            results = list(pool.map(rag.query, questions))
+
+        assert len(rag.llm.calls) == 1
+        assert all(r['response'] == "Returns are accepted within 30 days." for r in results)
+        assert [r['query'] for r in results] == questions
+        stats = rag.query_flight.stats()
+        assert stats['requests'] == len(questions) and stats['coalesced'] == len(questions) - 1
+        rag.client.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+    print("✅ RAG questions coalesced")
+
+
+def test_rag_busy_leader():
+    """A follower whose own deadline has not passed does not inherit the leader's busy answer"""
+    from langchain_core.language_models.fake import FakeListLLM
+    from llm_scripts.embeddings import HashEmbeddingBackend
+    from llm_scripts.rag_system import WineRAGSystem
+    from llm_scripts.scheduler import PRIORITY_BACKGROUND
+
+    db_path = tempfile.mkdtemp()
+    try:
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=64), llm_concurrency=1)
+        rag.llm = FakeListLLM(responses=["Returns are accepted within 30 days."])
+        rag.create_embeddings_and_store(rag.chunk_documents([
+            {'id': 'faq', 'content': "Returns are accepted within 30 days.", 'metadata': {'type': 'faq'}},
+        ]))
+        question = "What is your return policy?"
+
+        rag.scheduler.acquire()
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            leader = pool.submit(rag.query, question, deadline=time.monotonic() + 0.3)
+            while rag.query_flight.stats()['in_flight'] < 1:
+                time.sleep(0.01)
+            follower = pool.submit(rag.query, question)
+            # Background requests never share an interactive answer
+            background = pool.submit(rag.query, question, priority=PRIORITY_BACKGROUND,
+                                     deadline=time.monotonic() + 0.3)
+            while rag.query_flight.stats()['requests'] < 3:
+                time.sleep(0.01)
+
+            assert leader.result(5)['answer_path'] == 'busy'
+            assert background.result(5)['answer_path'] == 'busy'
+            rag.scheduler.release()
+            assert follower.result(5)['answer_path'] == 'llm'
+
+        # The leader, the background request and the follower's retry
+        stats = rag.query_flight.stats()
+        assert stats['executions'] == 3 and stats['coalesced'] == 1
+        rag.client.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+    print("✅ Followers retry a busy leader's answer with their own deadline")
+
+
+def test_rag_busy_leader_followers():
+    """Followers of a busy leader retry as one generation, within their original deadline"""
+    from langchain_core.language_models.fake import FakeListLLM
+    from llm_scripts.embeddings import HashEmbeddingBackend
+    from llm_scripts.rag_system import WineRAGSystem
+
+    class CountingLLM(FakeListLLM):
+        calls: list = []
+
+        def _call(self, prompt, *args, **kwargs):
+            self.calls.append(prompt)
+            return super()._call(prompt, *args, **kwargs)
+
+    db_path = tempfile.mkdtemp()
+    try:
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=64),
+                            llm_concurrency=1, llm_queue_timeout=0.6)
+        rag.llm = CountingLLM(responses=["Returns are accepted within 30 days."])
+        rag.create_embeddings_and_store(rag.chunk_documents([
+            {'id': 'faq', 'content': "Returns are accepted within 30 days.", 'metadata': {'type': 'faq'}},
+        ]))
+        question = "What is your return policy?"
+        followers = 4
+
+        rag.scheduler.acquire()
+        with ThreadPoolExecutor(max_workers=followers + 1) as pool:
+            leader = pool.submit(rag.query, question, deadline=time.monotonic() + 0.2)
+            while rag.query_flight.stats()['in_flight'] < 1:
+                time.sleep(0.01)
+            started = [pool.submit(rag.query, question, deadline=time.monotonic() + 5) for _ in range(followers)]
+            # Every follower joins the leader, then the retry led by one of them
+            waited = time.monotonic() + 3
+            while rag.query_flight.stats()['requests'] < 1 + 2 * followers and time.monotonic() < waited:
+                time.sleep(0.01)
+            assert leader.result(5)['answer_path'] == 'busy'
+            rag.scheduler.release()
+            assert [f.result(5)['answer_path'] for f in started] == ['llm'] * followers
+
+        assert len(rag.llm.calls) == 1
+        stats = rag.query_flight.stats()
+        assert stats['executions'] == 2 and stats['coalesced'] == 2 * followers - 1
+
+        # Without a deadline a follower gets one queue_timeout in total, not a fresh one per retry
+        rag.scheduler.acquire()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(rag.query, "Do you ship abroad?", deadline=time.monotonic() + 0.4)
+            while rag.query_flight.stats()['in_flight'] < 1:
+                time.sleep(0.01)
+            start = time.monotonic()
+            follower = pool.submit(rag.query, "Do you ship abroad?")
+            assert leader.result(5)['answer_path'] == 'busy'
+            assert follower.result(5)['answer_path'] == 'busy'
+            assert time.monotonic() - start < 0.85
+        rag.scheduler.release()
+        rag.client.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+    print("✅ Busy followers retry together within their deadline")
+
+
+def main():
+    print("🧪 Testing Request Coalescing...")
+    print("=" * 50)
+
+    tests = [
+        ("Single Flight", test_single_flight),
+        ("Single Flight Errors", test_single_flight_errors),
+        ("Normalize Query", test_normalize_query),
+        ("RAG Query Coalescing", test_rag_query_coalescing),
+        ("RAG Busy Leader", test_rag_busy_leader),
+        ("RAG Busy Leader Followers", test_rag_busy_leader_followers),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for prompt context budgeting
+Runs offline, no LLM needed
+"""
+
+import sys
+from pathlib import Path
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from llm_scripts.context_builder import build_context, compress_text, estimate_tokens
+from llm_scripts.reranking import tokenize
+
+FILLER = "Our family has been making wine in the valley for four generations. " * 20
+POLICY = FILLER + "Unopened bottles can be returned within 30 days for a full refund. " + FILLER
+
+
+def test_compress_text():
+    """Long documents keep their query-relevant sentences within the budget"""
+    terms = set(tokenize("Can I return unopened bottles?"))
+    compressed = compress_text(POLICY, terms, max_tokens=40)
+    assert estimate_tokens(compressed) <= 40
+    assert "returned within 30 days" in compressed
+    assert compress_text("Short text.", terms, max_tokens=40) == "Short text."
+    print("✅ Documents compressed to relevant sentences")
+
+
+def test_build_context_budget():
+    """Context stays within budget and packs by relevance per token"""
+    docs = [
+        {'content': POLICY, 'score': 0.9, 'metadata': {'type': 'pdf'}},
+        {'content': "Wine: Chianti Classico\nType: Red\nPrice: $24.00", 'score': 0.6,
+         'metadata': {'type': 'wine_product'}},
+        {'content': FILLER * 3, 'score': 0.5, 'metadata': {'type': 'email'}},
+    ]
+    context, stats = build_context("Can I return unopened bottles?", docs, max_tokens=150, max_doc_tokens=100)
+    assert stats['tokens'] <= 150 and estimate_tokens(context) == stats['tokens']
+    assert context.startswith("WINE PRODUCTS:\n- Wine: Chianti Classico")
+    assert "returned within 30 days" in context
+    assert stats['documents'] + stats['dropped'] == 3 and stats['compressed'] >= 1
+
+    # The most relevant document is kept even when it alone exceeds the budget
+    context, stats = build_context("return policy", docs[:1], max_tokens=30, max_doc_tokens=1000)
+    assert stats['documents'] == 1 and stats['tokens'] <= 40
+    assert build_context("anything", [])[0] == ""
+    print("✅ Context packed within the token budget")
+
+
+def main():
+    print("🧪 Testing Context Builder...")
+    print("=" * 50)
+
+    tests = [
+        ("Compress Text", test_compress_text),
+        ("Context Budget", test_build_context_budget),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Test script for conversation memory
+Runs offline, no LLM needed
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from llm_scripts.context_builder import estimate_tokens
+from llm_scripts.conversation import ConversationSession, SessionStore
+
+
+def test_follow_up_rewriting():
+    """Follow-ups are searched together with the conversation topic"""
+    session = ConversationSession("c1")
+    assert session.rewrite_query("What red wines do you have under $50?") == "What red wines do you have under $50?"
+    session.add_turn("What red wines do you have under $50?", "We have Chianti Classico for $24.")
+
+    assert session.rewrite_query("What about a cheaper one?") == \
+        "What red wines do you have under $50? What about a cheaper one?"
+    session.add_turn("What about a cheaper one?", "Try our house red for $12.")
+    assert session.topic == "What red wines do you have under $50?"
+
+    assert session.rewrite_query("What is your return policy?") == "What is your return policy?"
+    print("✅ Follow-up questions rewritten")
+
+
+def test_standalone_questions():
+    """Common words like "that", "this", "one" or "more" don't make a follow-up"""
+    session = ConversationSession("c3", topic="What red wines do you have under $50?")
+    for question in ["What white wines do you have that are cheap?", "More info about shipping",
+                     "Do you have other sparkling wines?", "Tell me more about this Barolo",
+                     "One more question about delivery times"]:
+        assert not session.is_follow_up(question), question
+    for question in ["Do you have a cheaper one?", "Cheaper?", "Is it organic?", "What food goes with it?",
+                     "Those look nice, any in magnum?"]:
+        assert session.is_follow_up(question), question
+
+    session.add_turn("What white wines do you have that are cheap?", "Try our Muscadet.")
+    assert session.topic == "What white wines do you have that are cheap?"
+    print("✅ Standalone questions not rewritten")
+
+
+def test_rolling_summary():
+    """Old turns are folded into a bounded summary"""
+    session = ConversationSession("c2", max_turns=2, summary_tokens=60)
+    for i in range(10):
+        session.add_turn(f"Question number {i} about Barolo?", f"Answer {i}. " + "Barolo is a red wine. " * 50)
+    assert len(session.turns) == 2 and session.turns[-1]['question'] == "Question number 9 about Barolo?"
+    assert session.summary and estimate_tokens(session.summary) <= 60
+    assert "Question number 7" in session.summary and "Question number 0" not in session.summary
+
+    history = session.prompt_history()
+    assert history.startswith("Earlier in this conversation:")
+    assert "Customer: Question number 9 about Barolo?" in history
+    assert estimate_tokens(history) < 300
+    print("✅ History bounded by a rolling summary")
+
+
+def test_session_store_lru_ttl():
+    """In-memory sessions are capped by LRU eviction and expire after the TTL"""
+    store = SessionStore(max_sessions=2, ttl_seconds=60, db_path=None)
+    first = store.get()
+    first.add_turn("Do you sell Italian wines?", "Yes.")
+    store.save(first)
+    assert store.get(first.conversation_id) is first
+
+    for _ in range(2):
+        store.save(store.get())
+    assert len(store) == 2
+    assert store.get(first.conversation_id).turns == []  # evicted, starts over
+
+    session = store.get("abc")
+    session.add_turn("Hi", "Hello!")
+    session.last_active = time.time() - 120
+    assert store.get("abc").turns == []
+    print("✅ Sessions evicted and expired")
+
+
+def test_session_store_sqlite():
+    """Sessions persist in SQLite across evictions and restarts"""
+    db_dir = tempfile.mkdtemp()
+    db_path = os.path.join(db_dir, "sessions.db")
+    try:
+        store = SessionStore(max_sessions=1, db_path=db_path)
+        session = store.get("conv")
+        session.add_turn("Do you have any Italian wines?", "Yes, Barolo and Chianti.")
+        store.save(session)
+        store.save(store.get("other"))  # evicts "conv" from memory
+        assert store.get("conv").topic == "Do you have any Italian wines?"
+        store.close()
+
+        store = SessionStore(db_path=db_path, ttl_seconds=60)
+        assert store.get("conv").turns[0]['answer'] == "Yes, Barolo and Chianti."
+        store.delete("conv")
+        assert store.get("conv").turns == []
+        store.close()
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+    print("✅ Sessions persisted in SQLite")
+
+
+def test_session_store_purge_on_save():
+    """Expired sessions are purged every purge_every saves"""
+    store = SessionStore(ttl_seconds=60, db_path=None, purge_every=3)
+    stale = store.get("stale")
+    store.save(stale)
+    stale.last_active = time.time() - 120
+    store.save(store.get("a"))
+    assert len(store) == 2
+    store.save(store.get("b"))  # third save purges
+    assert len(store) == 2 and "stale" not in store._sessions
+    print("✅ Expired sessions purged on save")
+
+
+def test_session_store_turn_lock():
+    """Concurrent messages of one conversation don't lose turns"""
+    store = SessionStore(db_path=None, max_turns=100)
+
+    def message(i):
+        with store.turn("shared") as session:
+            turns = list(session.turns)
+            time.sleep(0.01)  # the query
+            session.turns = turns
+            session.add_turn(f"Question {i}?", f"Answer {i}.")
+
+    threads = [threading.Thread(target=message, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store.get("shared").turns) == 8
+    assert store._turn_locks == {}
+
+    with store.turn() as session:
+        session.add_turn("Hi", "Hello!")
+    assert store.get(session.conversation_id).turns[0]['question'] == "Hi"
+    print("✅ Turns of one conversation serialised")
+
+
+def test_rag_query_with_session():
+    """WineRAGSystem.query rewrites follow-ups and puts the history in the prompt"""
+    from langchain_core.language_models.fake import FakeListLLM
+    from llm_scripts.embeddings import HashEmbeddingBackend
+    from llm_scripts.rag_system import WineRAGSystem
+
+    class RecordingLLM(FakeListLLM):
+        prompts: list = []
+
+        def _call(self, prompt, *args, **kwargs):
+            self.prompts.append(prompt)
+            return super()._call(prompt, *args, **kwargs)
+
+    db_path = tempfile.mkdtemp()
+    try:
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=64))
+        rag.llm = RecordingLLM(responses=["Our Barolo pairs well with roast lamb.", "The Chianti is cheaper."])
+        rag.create_embeddings_and_store(rag.chunk_documents([
+            {'id': 'barolo', 'content': "Barolo is a structured red from Piedmont.", 'metadata': {'type': 'pdf'}},
+        ]))
+
+        session = SessionStore(db_path=None).get()
+        result = rag.query("Which wine goes with lamb?", session=session)
+        assert result['response'] == "Our Barolo pairs well with roast lamb."
+        assert "CONVERSATION SO FAR" not in rag.llm.prompts[0]
+
+        result = rag.query("What about a cheaper one?", session=session)
+        assert result['search_query'] == "Which wine goes with lamb? What about a cheaper one?"
+        assert "Customer: Which wine goes with lamb?" in rag.llm.prompts[1]
+        assert len(session.turns) == 2
+        rag.client.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+    print("✅ RAG query uses conversation memory")
+
+
+def main():
+    print("🧪 Testing Conversation Memory...")
+    print("=" * 50)
+
+    tests = [
+        ("Follow-up Rewriting", test_follow_up_rewriting),
+        ("Standalone Questions", test_standalone_questions),
+        ("Rolling Summary", test_rolling_summary),
+        ("Session Store LRU/TTL", test_session_store_lru_ttl),
+        ("Session Store SQLite", test_session_store_sqlite),
+        ("Purge on Save", test_session_store_purge_on_save),
+        ("Turn Lock", test_session_store_turn_lock),
+        ("RAG Query With Session", test_rag_query_with_session),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script for chunk deduplication
+Checks exact and near-duplicate detection and which chunk types are merged
+"""
+
+import sys
+from pathlib import Path
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from llm_scripts.chunking import Chunk
+from llm_scripts.dedup import MinHashDeduplicator, deduplicate_chunks, normalize_text
+
+EMAIL = (
+    "Hello, I ordered a case of the 2018 Barolo last week and the delivery is still showing as pending. "
+    "Could you let me know when it will ship and whether I can change the delivery address to my office? "
+    "I will be travelling from the end of next week, so an earlier delivery or a pickup from your shop in town "
+    "would also work for me. Please keep the gift wrapping I asked for and include the tasting notes card. "
+    "Thank you very much for your help with this order."
+)
+DESCRIPTION = (
+    "A classic expression of the estate with ripe cherry, dried rose and leather on the nose, firm tannins, "
+    "bright acidity and a long savoury finish that rewards patient cellaring and pairs beautifully with "
+    "braised meats, truffle risotto and aged cheeses. The grapes are hand harvested from old vines on "
+    "south facing limestone slopes, fermented in concrete and aged for three years in large Slavonian oak "
+    "casks before bottling without fining or filtration, so a gentle decant is recommended before serving."
+)
+
+
+def chunk(chunk_id, text, doc_type='email'):
+    return Chunk(text, {'type': doc_type, 'chunk_id': chunk_id, 'original_id': chunk_id.split('_chunk')[0]})
+
+
+def test_find_duplicates():
+    """Exact copies (after normalisation) and near copies map to the first text"""
+    texts = [
+        EMAIL,
+        "  " + EMAIL.upper().replace(" ", "\n") + "  ",
+        "> " + EMAIL + " Regards",
+        "What are your opening hours on public holidays?",
+    ]
+    assert normalize_text("> Hello\n  World ") == "hello world"
+    assert MinHashDeduplicator().find_duplicates(texts) == [0, 0, 0, 3]
+    print("✅ Exact and near duplicates found")
+
+
+def shingles(text, size=5):
+    words = normalize_text(text).split()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def test_jaccard_estimate():
+    """Signature agreement estimates the exact shingle Jaccard similarity"""
+    deduplicator = MinHashDeduplicator(num_perm=256, bands=64)
+    words = [f"word{i}" for i in range(400)]
+    base = " ".join(words[:200])
+    for shift in (0, 10, 40, 80, 150, 200):
+        other = " ".join(words[shift:200 + shift])
+        exact = len(shingles(base) & shingles(other)) / len(shingles(base) | shingles(other))
+        estimate = float((deduplicator.signature(normalize_text(base)) ==
+                          deduplicator.signature(normalize_text(other))).mean())
+        assert abs(estimate - exact) < 0.1, (shift, exact, estimate)
+
+    # The vectorised hashes match exact (a * x + b) mod p arithmetic, without uint64 wraparound
+    text = normalize_text(EMAIL)
+    hashes = [int(x) for x in deduplicator._shingles(text)]
+    prime, mask = (1 << 61) - 1, (1 << 32) - 1
+    expected = [min(((int(a) * x + int(b)) % prime) & mask for x in hashes)
+                for a, b in zip(deduplicator._a, deduplicator._b)]
+    assert deduplicator.signature(text).tolist() == expected
+    print("✅ Jaccard similarity estimated")
+
+
+def test_unrelated_texts_kept():
+    """Different texts are never merged"""
+    texts = [f"Order {i} for customer {i * 7} contains {i % 5 + 1} bottles of wine number {i * 3}" for i in range(50)]
+    assert MinHashDeduplicator().find_duplicates(texts) == list(range(50))
+    print("✅ Unrelated texts kept")
+
+
+def test_deduplicate_chunks():
+    """Duplicates are dropped and their ids recorded on the survivor"""
+    chunks = [
+        chunk("email_1_chunk_0", EMAIL),
+        chunk("email_2_chunk_0", EMAIL),
+        chunk("email_3_chunk_0", EMAIL + " Regards"),
+        chunk("email_4_chunk_0", "Do you ship to Canada?"),
+    ]
+    unique, stats = deduplicate_chunks(chunks)
+
+    assert [c.metadata['chunk_id'] for c in unique] == ["email_1_chunk_0", "email_4_chunk_0"]
+    assert unique[0].metadata['duplicate_ids'] == ["email_2_chunk_0", "email_3_chunk_0"]
+    assert stats['input_chunks'] == 4 and stats['unique_chunks'] == 2
+    assert stats['exact_duplicates'] == 1 and stats['near_duplicates'] == 1
+    assert stats['saved_ratio'] == 0.5
+    assert deduplicate_chunks([])[1]['saved_ratio'] == 0.0
+    print("✅ Duplicate chunks dropped")
+
+
+def test_structured_types_kept():
+    """Products sharing a description are distinct records and are never merged"""
+    chunks = [
+        chunk("wine_1_chunk_0", f"Wine: Barolo 2016\nPrice: $89.00\nCode: BR16\n{DESCRIPTION}", 'wine_product'),
+        chunk("wine_2_chunk_0", f"Wine: Barolo 2017\nPrice: $79.00\nCode: BR17\n{DESCRIPTION}", 'wine_product'),
+        chunk("pdf_1_chunk_0", DESCRIPTION, 'pdf'),
+        chunk("pdf_2_chunk_0", DESCRIPTION, 'pdf'),
+    ]
+    unique, stats = deduplicate_chunks(chunks)
+    assert [c.metadata['chunk_id'] for c in unique] == ["wine_1_chunk_0", "wine_2_chunk_0", "pdf_1_chunk_0"]
+    assert 'duplicate_ids' not in unique[0].metadata
+    assert stats['exact_duplicates'] == 1
+
+    # Every chunk is compared when no type filter is given
+    vintages = [chunk(f"wine_{year}_chunk_0", f"Wine: Barolo {year}\n{DESCRIPTION}", 'wine_product')
+                for year in (2016, 2017)]
+    assert len(deduplicate_chunks(vintages)[0]) == 2
+    assert len(deduplicate_chunks(vintages, types=None)[0]) == 1
+    print("✅ Product records kept")
+
+
+def main():
+    print("🧪 Testing Deduplication...")
+    print("=" * 50)
+
+    tests = [
+        ("Find Duplicates", test_find_duplicates),
+        ("Jaccard Estimate", test_jaccard_estimate),
+        ("Unrelated Texts", test_unrelated_texts_kept),
+        ("Deduplicate Chunks", test_deduplicate_chunks),
+        ("Structured Types", test_structured_types_kept),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
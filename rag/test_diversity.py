@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for search result diversification
+Runs offline with the hash embedding backend
+"""
+
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from llm_scripts.diversity import mmr_select, collapse_by_source
+
+
+def test_mmr_select():
+    """MMR skips near-duplicates of what it already picked"""
+    query = np.array([1.0, 0.0, 0.0])
+    candidates = np.array([
+        [0.95, 0.31, 0.0],   # most relevant
+        [0.94, 0.34, 0.0],   # near-duplicate of the first
+        [0.80, 0.0, 0.60],   # less relevant, different direction
+    ])
+    assert mmr_select(query, candidates, limit=2, lambda_mult=1.0) == [0, 1]
+    assert mmr_select(query, candidates, limit=2, lambda_mult=0.5) == [0, 2]
+    assert sorted(mmr_select(query, candidates, limit=10)) == [0, 1, 2]
+    assert mmr_select(query, candidates[:0], limit=3) == []
+    print("✅ MMR picks diverse candidates")
+
+
+def test_collapse_by_source():
+    """Only the best chunks of each source document are kept"""
+    docs = [
+        {'metadata': {'original_id': 'a'}}, {'metadata': {'original_id': 'b'}},
+        {'metadata': {'original_id': 'a'}}, {'metadata': {}}, {'metadata': {'original_id': 'a'}},
+    ]
+    assert collapse_by_source(docs, 1) == [0, 1, 3]
+    assert collapse_by_source(docs, 2) == [0, 1, 2, 3]
+    print("✅ Chunks collapsed per source")
+
+
+def test_rag_search_is_diverse():
+    """Search returns one chunk per source document by default"""
+    from llm_scripts.embeddings import HashEmbeddingBackend
+    from llm_scripts.rag_system import WineRAGSystem
+
+    db_path = tempfile.mkdtemp()
+    try:
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=128))
+        paragraph = "Our Tuscan red wines are aged in oak barrels and pair well with grilled meats. "
+        documents = [
+            {'id': 'guide', 'content': (paragraph * 12 + "\n\n") * 4, 'metadata': {'type': 'pdf'}},
+            {'id': 'faq', 'content': "Tuscan reds ship within two days.", 'metadata': {'type': 'faq'}},
+        ]
+        chunks = rag.chunk_documents(documents)
+        assert sum(c.metadata['original_id'] == 'guide' for c in chunks) > 1
+        rag.create_embeddings_and_store(chunks, deduplicate=False)
+
+        results = rag.search("Tuscan red wines aged in oak", limit=3)
+        sources = [doc['metadata']['original_id'] for doc in results]
+        assert sorted(sources) == ['faq', 'guide']
+        rag.client.close()
+
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=128),
+                            mmr_lambda=None, max_chunks_per_source=None)
+        assert len(rag.search("Tuscan red wines aged in oak", limit=3)) == 3
+        rag.client.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+    print("✅ RAG search results are diverse")
+
+
+def main():
+    print("🧪 Testing Search Diversity...")
+    print("=" * 50)
+
+    tests = [
+        ("MMR Selection", test_mmr_select),
+        ("Collapse By Source", test_collapse_by_source),
+        ("Diverse RAG Search", test_rag_search_is_diverse),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
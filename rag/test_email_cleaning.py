@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for email normalisation
+Checks HTML conversion and removal of quoted history, signatures and
+boilerplate, without cutting message content
+"""
+
+import sys
+from pathlib import Path
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from llm_scripts.email_cleaning import clean_email_bodies, clean_email_body
+
+
+def test_signatures_stripped():
+    """Sign-offs followed by name and contact lines end the message"""
+    body = (
+        "Hi team,\n\nCould you hold two cases of the 2019 Chianti for me?\n\n"
+        "Best regards,\nJane Doe\nCellar Club Member\n+1 555 0100\njane@example.com\n\n"
+        "Sent from my iPhone"
+    )
+    assert clean_email_body(body) == "Hi team,\n\nCould you hold two cases of the 2019 Chianti for me?"
+    assert clean_email_body("Is the Barolo back in stock?\n\nThanks,\nSam") == "Is the Barolo back in stock?"
+    assert clean_email_body("Please call me back.\n--\nAcme Wines Ltd.\nwww.acme.example") == "Please call me back."
+    print("✅ Signatures stripped")
+
+
+def test_early_sign_off_kept():
+    """A sign-off word near the top is not a signature when prose follows"""
+    body = "Hi team,\n\nThanks\n\nI'd like to order 6 bottles of the Sancerre for Friday. Can you deliver?"
+    assert clean_email_body(body) == body
+
+    body = "Order update:\nBest\nwines are in stock now."
+    assert clean_email_body(body) == body
+
+    # Only the trailing sign-off is cut
+    body = "Thanks\n\nI'd like to order 6 bottles of the Sancerre for Friday.\n\nThanks,\nKim"
+    assert clean_email_body(body) == "Thanks\n\nI'd like to order 6 bottles of the Sancerre for Friday."
+    print("✅ Early sign-offs kept")
+
+
+def test_quoted_history_stripped():
+    """Reply headers and quoted lines are removed"""
+    body = (
+        "Yes, Friday works.\n\n"
+        "On Mon, 3 Jun 2024 at 10:00, Wine Shop <shop@example.com> wrote:\n"
+        "> When would you like the delivery?\n"
+    )
+    assert clean_email_body(body) == "Yes, Friday works."
+    assert clean_email_body("Sounds good.\n> old text\nSee you then.") == "Sounds good.\nSee you then."
+    print("✅ Quoted history stripped")
+
+
+def test_html_and_boilerplate():
+    """HTML is converted to text and footers are dropped in a batch"""
+    bodies = clean_email_bodies([
+        "<html><body><p>Do you ship&nbsp;to Canada?</p><blockquote>old</blockquote></body></html>",
+        "Plain   text  message\n\n\n\nwith gaps\nClick here to unsubscribe from our newsletter",
+        None,
+    ])
+    assert bodies == ["Do you ship to Canada?", "Plain text message\n\nwith gaps", ""]
+    assert clean_email_bodies([]) == []
+    print("✅ HTML and boilerplate cleaned")
+
+
+def main():
+    print("🧪 Testing Email Cleaning...")
+    print("=" * 50)
+
+    tests = [
+        ("Signatures", test_signatures_stripped),
+        ("Early Sign-offs", test_early_sign_off_kept),
+        ("Quoted History", test_quoted_history_stripped),
+        ("HTML and Boilerplate", test_html_and_boilerplate),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
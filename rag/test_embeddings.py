@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Test script for the embedding backends
+Runs offline with the deterministic hash backend
+"""
+
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from llm_scripts.embeddings import HashEmbeddingBackend, QueryBatcher, create_embedding_backend
+
+
+def test_hash_backend():
+    """Hash embeddings must be deterministic, normalised and batch-independent"""
+    backend = create_embedding_backend("hash", dimension=64)
+    texts = [f"Red wine number {i} from Tuscany" for i in range(300)]
+
+    vectors = backend.embed_documents(texts)
+    assert len(vectors) == 300 and all(len(v) == 64 for v in vectors)
+    assert backend.embed_query(texts[7]) == vectors[7]
+    assert HashEmbeddingBackend(dimension=64, max_batch_size=7).embed_documents(texts) == vectors
+    assert backend.describe() == {'backend': 'hash', 'model': 'hash-64', 'dimension': 64}
+    print("✅ Hash backend is deterministic")
+
+
+def test_rag_with_hash_backend():
+    """Ingest and search end to end, then re-embed after changing the embedder"""
+    from llm_scripts.rag_system import WineRAGSystem
+    from llm_scripts.collection_metadata import read_collection_metadata
+
+    db_path = tempfile.mkdtemp()
+    try:
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=64))
+        documents = [
+            {'id': 'wine_1', 'content': 'Wine: Chianti Classico\nType: Red\nCountry: Italy', 'metadata': {'type': 'wine_product'}},
+            {'id': 'wine_2', 'content': 'Wine: Sancerre\nType: White\nCountry: France', 'metadata': {'type': 'wine_product'}},
+            {'id': 'faq_1', 'content': 'Returns are accepted within 30 days of delivery.', 'metadata': {'type': 'faq'}},
+        ]
+        rag.create_embeddings_and_store(rag.chunk_documents(documents))
+        best = max(rag.search("returns within 30 days", limit=3), key=lambda doc: doc['score'])
+        assert best['metadata']['original_id'] == 'faq_1'
+        rag.client.close()
+
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=128), reembed_on_change=True)
+        assert read_collection_metadata(rag.client, rag.collection_name)['embedder']['dimension'] == 128
+        assert rag.search("Italian Chianti", limit=1)[0]['metadata']['original_id'] == 'wine_1'
+        rag.client.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+    print("✅ RAG system works with the hash backend and re-embeds on change")
+
+
+def test_projection():
+    """PCA projection round-trips through metadata and is applied on ingest and search"""
+    import numpy as np
+    from llm_scripts.projection import VectorProjection, measure_recall_loss
+    from llm_scripts.rag_system import WineRAGSystem
+
+    backend = HashEmbeddingBackend(dimension=128)
+    texts = [f"{color} wine {i} from {region}" for i in range(200)
+             for color, region in [(("Red", "White", "Rose")[i % 3], ("Tuscany", "Loire", "Rioja", "Napa")[i % 4])]]
+    vectors = backend.embed_array(texts)
+
+    projection = VectorProjection.fit_pca(vectors, 32)
+    restored = VectorProjection.from_dict(projection.to_dict())
+    assert np.allclose(projection.transform(vectors), restored.transform(vectors), atol=1e-6)
+    assert measure_recall_loss(vectors, projection, k=5)['recall_at_k'] > 0.3
+    random_vectors = np.random.default_rng(0).normal(size=(300, 128)).astype(np.float32)
+    assert measure_recall_loss(random_vectors, VectorProjection.truncate(128, 128), k=5)['recall_at_k'] == 1.0
+
+    # A query's match with itself must not count: it is the top hit in any space
+    noise = np.random.default_rng(0).normal(size=(600, 128)).astype(np.float32)
+    fitted = VectorProjection.fit_pca(noise[:500], 8)
+    in_sample = measure_recall_loss(noise[:500], fitted, k=5)['recall_at_k']
+    held_out = measure_recall_loss(noise[:500], fitted, queries=noise[500:], k=5)['recall_at_k']
+    with_self = measure_recall_loss(noise[:500], fitted, queries=noise[:200], k=5)['recall_at_k']
+    assert in_sample < 0.15 and held_out < 0.15 and with_self > 0.2
+
+    db_path = tempfile.mkdtemp()
+    try:
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=backend, projection_dim=16)
+        documents = [{'id': f'note_{i}', 'content': text, 'metadata': {'type': 'note'}} for i, text in enumerate(texts)]
+        rag.create_embeddings_and_store(rag.chunk_documents(documents), deduplicate=False)
+        assert rag.client.get_collection(rag.collection_name).config.params.vectors.size == 16
+        assert rag.search(texts[5], limit=1)[0]['content'] == texts[5]
+        rag.client.close()
+
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=backend)
+        assert rag.projection is not None and rag.vector_dim == 16
+        assert rag.search(texts[5], limit=1)[0]['content'] == texts[5]
+        rag.client.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+    print("✅ Projection is fitted, persisted and applied to queries")
+
+
+def test_collection_profile_restored():
+    """Reopening a collection searches with the profile it was built with"""
+    from llm_scripts.collection_profiles import COLLECTION_PROFILES, CollectionProfile
+    from llm_scripts.rag_system import WineRAGSystem
+
+    custom = CollectionProfile('custom', quantization="binary", oversampling=3.0, search_ef=32)
+    assert CollectionProfile.from_dict(custom.describe()).describe() == custom.describe()
+    assert CollectionProfile.from_dict(COLLECTION_PROFILES['binary'].describe()) is COLLECTION_PROFILES['binary']
+
+    db_path = tempfile.mkdtemp()
+    try:
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=64),
+                            collection_profile='scalar_int8')
+        rag.client.close()
+
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=64))
+        assert rag.collection_profile is COLLECTION_PROFILES['scalar_int8']
+        assert rag.collection_profile.search_params().quantization.oversampling == 2.0
+
+        # Every recorded setting is part of the in-place update
+        assert COLLECTION_PROFILES['on_disk'].update_config()['collection_params'].on_disk_payload
+        rag.apply_collection_profile('on_disk')
+        rag.client.close()
+
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=64))
+        assert rag.collection_profile is COLLECTION_PROFILES['on_disk']
+        rag.client.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+    print("✅ Collection profile restored on reopen")
+
+
+def test_query_batcher():
+    """Concurrent query embeddings are sent in shared batches"""
+    import time
+    import numpy as np
+    from concurrent.futures import ThreadPoolExecutor
+
+    class SlowHashBackend(HashEmbeddingBackend):
+        calls = []
+
+        def _embed_batch(self, texts):
+            self.calls.append(len(texts))
+            time.sleep(0.02)
+            return super()._embed_batch(texts)
+
+    backend = SlowHashBackend(dimension=32)
+    batcher = QueryBatcher(backend, max_batch_size=8, max_wait_ms=5)
+    queries = [f"red wine number {i}" for i in range(32)]
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        vectors = list(pool.map(batcher.embed, queries))
+
+    expected = HashEmbeddingBackend(dimension=32).embed_array(queries)
+    assert np.allclose(np.vstack(vectors), expected)
+    assert sum(backend.calls) == 32 and len(backend.calls) < 32 and max(backend.calls) <= 8
+    stats = batcher.stats()
+    assert stats['requests'] == 32 and stats['batches'] == len(backend.calls)
+    assert stats['mean_batch_size'] > 1
+
+    # A lone query is embedded on its own after the wait window
+    assert np.allclose(batcher.embed("lone query"), HashEmbeddingBackend(dimension=32).embed_array(["lone query"])[0])
+    assert backend.calls[-1] == 1
+    batcher.close()
+    print("✅ Query embeddings micro-batched")
+
+
+def main():
+    print("🧪 Testing Embedding Backends...")
+    print("=" * 50)
+
+    tests = [
+        ("Hash Backend", test_hash_backend),
+        ("RAG With Hash Backend", test_rag_with_hash_backend),
+        ("Projection", test_projection),
+        ("Collection Profile", test_collection_profile_restored),
+        ("Query Batcher", test_query_batcher),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
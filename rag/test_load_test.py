@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test script for the load-testing harness
+Checks the simulated Ollama server and runs a short load test against
+api_server.py started on top of it
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+sys.path.append(str(current_dir / "benchmarks"))
+
+from langchain_ollama import OllamaLLM
+
+from llm_scripts.embeddings import OllamaEmbeddingBackend
+from llm_scripts.prompts import generation_timings
+from load_test import LoadGenerator, local_stack, parse_mix, run_level, summarize
+from stub_ollama import StubOllamaServer
+
+
+def test_stub_generation():
+    """The stub streams an answer after the TTFT with Ollama timings"""
+    with StubOllamaServer(ttft_ms=100, tokens_per_second=200, answer_tokens=10) as stub:
+        llm = OllamaLLM(model="stub", base_url=stub.url)
+        start = time.perf_counter()
+        result = llm.generate(["Which wine goes with fish?"])
+        elapsed = time.perf_counter() - start
+
+        assert len(result.generations[0][0].text.split()) == 10
+        assert elapsed >= 0.1
+        timings = generation_timings(result.generations[0][0].generation_info)
+        assert timings['prefill_ms'] >= 100 and timings['decode_tokens'] == 10
+        assert stub.stats()['generations'] == 1
+    print("✅ Stub streams answers with timings")
+
+
+def test_stub_parallel_limit():
+    """Generations beyond `parallel` queue behind the running ones"""
+    with StubOllamaServer(ttft_ms=200, tokens_per_second=0, answer_tokens=2, parallel=2) as stub:
+        def generate():
+            httpx.post(f"{stub.url}/api/generate", json={'model': "stub", 'prompt': "hi", 'stream': False}, timeout=10)
+
+        threads = [threading.Thread(target=generate) for _ in range(4)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        stats = stub.stats()
+        assert stats['generations'] == 4 and stats['max_running'] == 2
+        assert elapsed >= 0.4
+    print("✅ Parallel limit enforced")
+
+
+def test_stub_errors_and_embeddings():
+    """Injected failures return 500; /api/embed serves hash embeddings"""
+    with StubOllamaServer(error_rate=1.0, embedding_dimension=32) as stub:
+        response = httpx.post(f"{stub.url}/api/generate", json={'model': "stub", 'prompt': "hi"}, timeout=10)
+        assert response.status_code == 500 and stub.stats()['errors'] == 1
+
+        embeddings = OllamaEmbeddingBackend(model="stub", host=stub.url).embed_documents(["red wine", "white wine"])
+        assert len(embeddings) == 2 and len(embeddings[0]) == 32
+    print("✅ Errors injected and embeddings served")
+
+
+def test_summarize():
+    """Throughput, percentiles, busy and error rates per kind"""
+    records = [{'kind': "chat", 'start': 0, 'status': 200, 'latency': 0.1 * i, 'ttfb': 0.05 * i,
+                'answer_path': "llm", 'error': None} for i in range(1, 11)]
+    records += [
+        {'kind': "chat", 'start': 0, 'status': 503, 'latency': 0.01, 'ttfb': 0.01, 'answer_path': "busy", 'error': None},
+        {'kind': "search", 'start': 0, 'status': None, 'latency': 1.0, 'ttfb': None, 'answer_path': None,
+         'error': "ReadTimeout"},
+    ]
+    summary = summarize(records, window=5.0)
+
+    assert summary['requests'] == 12 and summary['ok'] == 10
+    assert summary['busy'] == 1 and summary['errors'] == 1
+    assert summary['throughput_rps'] == 2.0
+    assert summary['latency']['max_ms'] == 1000.0
+    assert summary['error_kinds'] == {'ReadTimeout': 1}
+    assert summary['by_kind']['chat']['answer_paths'] == {'llm': 10}
+    assert summary['by_kind']['search']['error_rate'] == 1.0
+    assert parse_mix("chat=3,search=1") == {'chat': 3.0, 'search': 1.0}
+    print("✅ Load summary computed")
+
+
+def test_load_run():
+    """A short closed- and open-loop run against api_server.py on the stub"""
+    stub = StubOllamaServer(ttft_ms=50, tokens_per_second=0, answer_tokens=5)
+    with local_stack(stub, seed_pdfs=-1) as base_url:
+        generator = LoadGenerator(base_url, parse_mix("chat=0.5,search=0.5"), ["Which red wine goes with steak?"],
+                                  unique_questions=True)
+        closed = run_level(generator, "closed", 2, duration=1.0, warmup=0.2)
+        opened = run_level(generator, "open", 5, duration=1.0, warmup=0.0)
+
+    for result in (closed, opened):
+        summary = result['summary']
+        assert summary['requests'] > 0 and summary['ok'] == summary['requests']
+        assert summary['latency']['p50_ms'] > 0
+        assert result['server_metrics'] is not None
+    assert stub.stats()['generations'] > 0
+    print("✅ Load run completed")
+
+
+def main():
+    print("🧪 Testing Load Harness...")
+    print("=" * 50)
+
+    tests = [
+        ("Stub Generation", test_stub_generation),
+        ("Stub Parallel Limit", test_stub_parallel_limit),
+        ("Stub Errors and Embeddings", test_stub_errors_and_embeddings),
+        ("Summary", test_summarize),
+        ("Load Run", test_load_run),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test script for pipeline metrics
+Runs offline with the hash embedding backend and a fake LLM
+"""
+
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from llm_scripts import metrics
+from llm_scripts.metrics import PrometheusMetrics
+
+
+def test_disabled_hooks():
+    """Without hooks the instrumentation does nothing"""
+    # Importing api_server registers its hook; set it aside for this test
+    registered = list(metrics._hooks)
+    for hook in registered:
+        metrics.remove_hook(hook)
+    try:
+        assert metrics.timed('embed') is metrics.timed('rerank')
+        with metrics.timed('embed'):
+            pass
+        metrics.observe('embed', 0.1)
+        metrics.count('errors', stage='search')
+    finally:
+        for hook in registered:
+            metrics.add_hook(hook)
+    print("✅ Disabled instrumentation is a no-op")
+
+
+def test_prometheus_render():
+    """Histograms, counters and gauges render in the text format"""
+    registry = PrometheusMetrics(buckets=(0.01, 0.1, 1.0))
+    metrics.add_hook(registry)
+    try:
+        metrics.observe('embed', 0.005)
+        metrics.observe('embed', 0.05)
+        metrics.observe('embed', 5.0)
+        with metrics.timed('rerank', reranker='features'):
+            pass
+        metrics.count('llm_tokens', 120, direction='prompt')
+        metrics.count('llm_tokens', 30, direction='completion')
+        metrics.count('errors', stage='search')
+        metrics.count('errors', stage='search')
+    finally:
+        metrics.remove_hook(registry)
+    registry.add_gauge("llm_queue_depth", "Generations waiting for a slot", lambda: 3)
+    registry.add_gauge("broken", "Fails to read", lambda: 1 / 0)
+
+    text = registry.render()
+    assert '# TYPE rag_stage_duration_seconds histogram' in text
+    assert 'rag_stage_duration_seconds_bucket{stage="embed",le="0.01"} 1' in text
+    assert 'rag_stage_duration_seconds_bucket{stage="embed",le="0.1"} 2' in text
+    assert 'rag_stage_duration_seconds_bucket{stage="embed",le="1.0"} 2' in text
+    assert 'rag_stage_duration_seconds_bucket{stage="embed",le="+Inf"} 3' in text
+    assert 'rag_stage_duration_seconds_count{stage="embed"} 3' in text
+    assert 'rag_stage_duration_seconds_count{stage="rerank",reranker="features"} 1' in text
+    assert 'rag_llm_tokens_total{direction="prompt"} 120' in text
+    assert 'rag_llm_tokens_total{direction="completion"} 30' in text
+    assert 'rag_errors_total{stage="search"} 2' in text
+    assert 'rag_llm_queue_depth 3' in text
+    assert 'rag_broken' not in text
+    print("✅ Prometheus text rendered")
+
+
+def test_rag_pipeline_metrics():
+    """A RAG question records every stage of the pipeline"""
+    from langchain_core.language_models.fake import FakeListLLM
+    from llm_scripts.embeddings import HashEmbeddingBackend
+    from llm_scripts.rag_system import WineRAGSystem
+
+    registry = PrometheusMetrics()
+    db_path = tempfile.mkdtemp()
+    metrics.add_hook(registry)
+    try:
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=64),
+                            reranker="features")
+        rag.llm = FakeListLLM(responses=["Returns are accepted within 30 days."])
+        rag.create_embeddings_and_store(rag.chunk_documents([
+            {'id': 'faq', 'content': "Returns are accepted within 30 days.", 'metadata': {'type': 'faq'}},
+        ]))
+        rag.query("What is your return policy?")
+        rag.client.close()
+    finally:
+        metrics.remove_hook(registry)
+        shutil.rmtree(db_path, ignore_errors=True)
+
+    text = registry.render()
+    for stage in ('embed', 'vector_search', 'rerank', 'prompt_build', 'llm_generation', 'query', 'ingest'):
+        assert f'stage="{stage}"' in text, stage
+    assert 'rag_answers_total{path="llm"} 1' in text
+    assert 'rag_ingested_chunks_total 1' in text
+    print("✅ Pipeline stages recorded")
+
+
+def main():
+    print("🧪 Testing Metrics...")
+    print("=" * 50)
+
+    tests = [
+        ("Disabled Hooks", test_disabled_hooks),
+        ("Prometheus Render", test_prometheus_render),
+        ("RAG Pipeline Metrics", test_rag_pipeline_metrics),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
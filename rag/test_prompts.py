@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for prompt templates
+Runs offline, no LLM needed
+"""
+
+import sys
+from pathlib import Path
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from llm_scripts.prompts import SYSTEM_PROMPT, build_prompt, generation_timings
+
+
+def test_static_prefix():
+    """Prompts for different requests share the whole static instruction prefix"""
+    first = build_prompt("WINE PRODUCTS:\n- Wine: Barolo", "Do you have Barolo?")
+    second = build_prompt("ADDITIONAL INFORMATION:\n- Shipping takes 2 days", "How fast is shipping?")
+    assert first.startswith(SYSTEM_PROMPT) and second.startswith(SYSTEM_PROMPT)
+    assert first.index("Do you have Barolo?") > first.index("Wine: Barolo") > len(SYSTEM_PROMPT)
+    assert first.endswith("RESPONSE:")
+    print("✅ Static instructions form the prompt prefix")
+
+
+def test_generation_timings():
+    """Ollama nanosecond durations become prefill/decode stats"""
+    timings = generation_timings({
+        'load_duration': 5_000_000, 'prompt_eval_count': 40, 'prompt_eval_duration': 80_000_000,
+        'eval_count': 50, 'eval_duration': 1_000_000_000, 'total_duration': 1_100_000_000,
+    })
+    assert timings['prefill_ms'] == 80.0 and timings['prefill_tokens'] == 40
+    assert timings['decode_ms'] == 1000.0 and timings['decode_tokens_per_second'] == 50.0
+    assert generation_timings({'finish_reason': None}) == {}
+    assert generation_timings(None) == {}
+    print("✅ Generation timings parsed")
+
+
+def main():
+    print("🧪 Testing Prompt Templates...")
+    print("=" * 50)
+
+    tests = [
+        ("Static Prefix", test_static_prefix),
+        ("Generation Timings", test_generation_timings),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test script for Qdrant server mode
+Runs against a locally started Qdrant binary (./qdrant, listening on 6333
+for REST and 6334 for gRPC) or the URL in QDRANT_URL; skipped when no server
+is reachable. Uses a throwaway collection, never wine_knowledge.
+"""
+
+import os
+import sys
+import threading
+import uuid
+from pathlib import Path
+
+import httpx
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from llm_scripts.collection_metadata import delete_collection_metadata
+from llm_scripts.collection_versions import garbage_collect_versions, get_alias_target, list_versions
+from llm_scripts.embeddings import HashEmbeddingBackend
+from llm_scripts.qdrant_connection import create_qdrant_client, get_qdrant_client, describe_qdrant_client
+
+QDRANT_TEST_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
+
+
+def server_available() -> bool:
+    try:
+        return httpx.get(f"{QDRANT_TEST_URL}/readyz", timeout=2).status_code == 200
+    except httpx.HTTPError:
+        return False
+
+
+def test_local_fallback():
+    """Without a URL the factory opens the embedded database and shares it"""
+    import tempfile
+    import shutil
+
+    db_path = tempfile.mkdtemp()
+    try:
+        client = get_qdrant_client(url="", path=db_path)
+        assert describe_qdrant_client(client)['mode'] == 'local'
+        # A second open in the same process reuses the client instead of hitting the file lock
+        assert get_qdrant_client(url="", path=db_path) is client
+        client.close()
+        assert get_qdrant_client(url="", path=db_path) is not client
+        get_qdrant_client(url="", path=db_path).close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+    print("✅ Local mode is shared per path")
+
+
+def drop_aliased_collection(client, alias: str):
+    """Delete an alias together with every versioned collection behind it"""
+    from qdrant_client.models import DeleteAlias, DeleteAliasOperation
+
+    garbage_collect_versions(client, alias, keep=0)
+    if get_alias_target(client, alias) is not None:
+        client.update_collection_aliases(
+            change_aliases_operations=[DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias))]
+        )
+    for version in list_versions(client, alias):
+        client.delete_collection(version)
+        delete_collection_metadata(client, version)
+
+
+def test_concurrent_ingest_and_search():
+    """Two RAG systems share a server collection: one ingests while the other searches"""
+    if not server_available():
+        print(f"⚠️  No Qdrant server at {QDRANT_TEST_URL}; skipped")
+        return
+
+    from llm_scripts.rag_system import WineRAGSystem
+
+    collection = f"test_wine_{uuid.uuid4().hex[:8]}"
+    backend = HashEmbeddingBackend(dimension=64)
+    # Separate clients, as the API server and an ingestion script would have
+    writer = WineRAGSystem(qdrant_url=QDRANT_TEST_URL, collection_name=collection, embedding_backend=backend)
+    reader = WineRAGSystem(qdrant_url=QDRANT_TEST_URL, collection_name=collection, embedding_backend=backend)
+    reader.client = create_qdrant_client(url=QDRANT_TEST_URL, prefer_grpc=False)
+    try:
+        assert describe_qdrant_client(writer.client)['mode'] == 'server'
+        documents = [
+            {'id': f'note_{i}', 'content': f"Wine note {i}: a {('red', 'white')[i % 2]} from region {i % 7}",
+             'metadata': {'type': 'note'}}
+            for i in range(500)
+        ]
+        errors = []
+
+        def search_loop():
+            try:
+                for _ in range(50):
+                    reader.search("red wine from region 3", limit=3)
+            except Exception as e:
+                errors.append(e)
+
+        searcher = threading.Thread(target=search_loop)
+        searcher.start()
+        writer.create_embeddings_and_store(writer.chunk_documents(documents), deduplicate=False)
+        searcher.join()
+
+        assert not errors, errors
+        assert writer.client.count(collection).count == 500
+        assert reader.search("Wine note 42", limit=1)
+    finally:
+        drop_aliased_collection(writer.client, collection)
+        reader.client.close()
+    print("✅ Searches keep working while another client ingests")
+
+
+def test_apply_collection_profile():
+    """Switching profiles moves payloads to disk on the server, as the recorded profile says"""
+    if not server_available():
+        print(f"⚠️  No Qdrant server at {QDRANT_TEST_URL}; skipped")
+        return
+
+    from llm_scripts.collection_metadata import read_collection_metadata, resolve_collection_name
+    from llm_scripts.rag_system import WineRAGSystem
+
+    collection = f"test_wine_{uuid.uuid4().hex[:8]}"
+    rag = WineRAGSystem(qdrant_url=QDRANT_TEST_URL, collection_name=collection,
+                        embedding_backend=HashEmbeddingBackend(dimension=64), collection_profile='default')
+    try:
+        def params():
+            return rag.client.get_collection(resolve_collection_name(rag.client, collection)).config.params
+
+        assert not params().on_disk_payload
+        rag.apply_collection_profile('scalar_int8_on_disk')
+        assert params().on_disk_payload and params().vectors.on_disk
+        assert read_collection_metadata(rag.client, collection)['profile']['on_disk_payload']
+    finally:
+        drop_aliased_collection(rag.client, collection)
+    print("✅ Collection profile applied on the server")
+
+
+def main():
+    print("🧪 Testing Qdrant Server Mode...")
+    print("=" * 50)
+
+    tests = [
+        ("Local Fallback", test_local_fallback),
+        ("Concurrent Ingest And Search", test_concurrent_ingest_and_search),
+        ("Apply Collection Profile", test_apply_collection_profile),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for the reranking stage
+Runs offline with the feature-based reranker and the hash embedding backend
+"""
+
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from llm_scripts.reranking import FeatureReranker, create_reranker, parse_query_constraints, price_in_dollars
+
+WINES = [
+    {'content': "Wine: Barolo Riserva\nType: Red\nPrice: $89.00\nCountry: Italy", 'score': 0.62,
+     'metadata': {'type': 'wine_product', 'name': 'Barolo Riserva', 'wine_type': 'Red', 'price': 8900,
+                  'country': 'Italy', 'average_rating': 4.8, 'featured': True}},
+    {'content': "Wine: Chianti Classico\nType: Red\nPrice: $24.00\nCountry: Italy", 'score': 0.58,
+     'metadata': {'type': 'wine_product', 'name': 'Chianti Classico', 'wine_type': 'Red', 'price': 2400,
+                  'country': 'Italy', 'average_rating': 4.2, 'featured': False}},
+    {'content': "Wine: Sancerre\nType: White\nPrice: $32.00\nCountry: France", 'score': 0.60,
+     'metadata': {'type': 'wine_product', 'name': 'Sancerre', 'wine_type': 'White', 'price': 3200,
+                  'country': 'France', 'average_rating': 4.5, 'featured': True}},
+    {'content': "Returns are accepted within 30 days of delivery for unopened bottles.", 'score': 0.64,
+     'metadata': {'type': 'faq'}},
+]
+
+
+def test_parse_query_constraints():
+    """Prices, types, countries and intents are read from the question"""
+    assert parse_query_constraints("What red wines do you have under $50?") == {'max_price': 50.0, 'wine_types': ['red']}
+    assert parse_query_constraints("Italian wines between $40 and $20") == {
+        'min_price': 20.0, 'max_price': 40.0, 'countries': ['italy']
+    }
+    assert parse_query_constraints("best-rated rosé")['wants_rating']
+    assert parse_query_constraints("What is your return policy?") == {}
+    print("✅ Query constraints parsed")
+
+
+def test_feature_reranker():
+    """Constraint matches outrank higher cosine scores; non-catalog questions keep lexical matches"""
+    reranker = FeatureReranker()
+
+    top = reranker.rerank("What red wines do you have under $50?", WINES, limit=2)
+    assert top[0]['metadata']['name'] == 'Chianti Classico'
+    assert all('rerank_score' in doc for doc in top) and len(top) == 2
+
+    # Catalog prices are stored in cents
+    assert price_in_dollars({'price': 2450}) == 24.5 and price_in_dollars({}) is None
+    cheap = reranker.rerank("Any wines under $30?", WINES[:3], limit=3)
+    assert cheap[0]['metadata']['name'] == 'Chianti Classico'
+    assert reranker.rerank("Any wines over $50?", WINES[:3], limit=1)[0]['metadata']['name'] == 'Barolo Riserva'
+
+    assert reranker.rerank("What is your return policy for bottles?", WINES, limit=1)[0]['metadata']['type'] == 'faq'
+    assert reranker.rerank("best rated French white", WINES, limit=1)[0]['metadata']['name'] == 'Sancerre'
+    assert create_reranker("none") is None
+    print("✅ Feature reranker orders candidates by relevance")
+
+
+def test_rag_with_reranker():
+    """WineRAGSystem reranks its vector-search candidates"""
+    from llm_scripts.embeddings import HashEmbeddingBackend
+    from llm_scripts.rag_system import WineRAGSystem
+
+    db_path = tempfile.mkdtemp()
+    try:
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=64), reranker="features")
+        documents = [
+            {'id': f"wine_{i}", 'content': doc['content'], 'metadata': doc['metadata']} for i, doc in enumerate(WINES)
+        ]
+        rag.create_embeddings_and_store(rag.chunk_documents(documents))
+        results = rag.search("Red wine under $50 from Italy", limit=2)
+        assert len(results) == 2
+        assert results[0]['metadata']['name'] == 'Chianti Classico'
+        assert results[0]['rerank_score'] >= results[1]['rerank_score']
+        rag.client.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+    print("✅ RAG search uses the reranker")
+
+
+def main():
+    print("🧪 Testing Reranking...")
+    print("=" * 50)
+
+    tests = [
+        ("Query Constraints", test_parse_query_constraints),
+        ("Feature Reranker", test_feature_reranker),
+        ("RAG With Reranker", test_rag_with_reranker),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
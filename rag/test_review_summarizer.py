@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script for review summarisation
+Checks grouping per wine and vintage, document contents and edge cases
+"""
+
+import sys
+from pathlib import Path
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from llm_scripts.review_summarizer import select_representative_reviews, summarize_reviews
+
+
+def review(review_id, wine_id, rating, comment, vintage=2018, author="Alex", **wine):
+    """Review row shaped like integrate_real_data.load_real_reviews builds them"""
+    return {
+        'id': review_id,
+        'wine_id': wine_id,
+        'wine_name': wine.get('wine_name', f"Wine {wine_id}"),
+        'wine_type': wine.get('wine_type', "RED"),
+        'price': wine.get('price', 4500),
+        'region': wine.get('region', "Tuscany"),
+        'country': wine.get('country', "Italy"),
+        'rating': rating,
+        'author': author,
+        'comment': comment,
+        'vintage': vintage,
+        'date': "2024-01-01T00:00:00",
+    }
+
+
+def test_grouping():
+    """One document per wine, vintage and sentiment bucket"""
+    reviews = [
+        review("r1", "w1", 5, "Beautiful cherry fruit and silky tannins"),
+        review("r2", "w1", 4, "Silky tannins, lovely cherry finish"),
+        review("r3", "w1", 2, "Too oaky for my taste"),
+        review("r4", "w1", 5, "Great with pasta", vintage=2019),
+        review("r5", "w2", 3, "Decent everyday wine", vintage=None),
+    ]
+    documents = summarize_reviews(reviews)
+    ids = sorted(doc['id'] for doc in documents)
+    assert ids == ["reviews_w1_2018_critical", "reviews_w1_2018_positive",
+                   "reviews_w1_2019_positive", "reviews_w2_nv_mixed"], ids
+
+    positive = next(doc for doc in documents if doc['id'] == "reviews_w1_2018_positive")
+    metadata = positive['metadata']
+    assert metadata['type'] == 'customer_review' and metadata['sentiment'] == 'positive'
+    assert metadata['review_ids'] == ["r1", "r2"]
+    assert metadata['review_count'] == 2 and metadata['total_review_count'] == 3
+    assert metadata['rating'] == 4.5 and metadata['average_rating'] == round(11 / 3, 2)
+    print("✅ Reviews grouped per wine, vintage and sentiment")
+
+
+def test_document_contents():
+    """Summary text carries the rating breakdown, quotes and the price in dollars"""
+    reviews = [
+        review("r1", "w1", 5, "Beautiful cherry fruit", author="Sam", wine_name="Chianti Classico", price=2450),
+        review("r2", "w1", 2, "Too oaky", author="Kim", wine_name="Chianti Classico", price=2450),
+    ]
+    documents = summarize_reviews(reviews)
+    content = next(doc for doc in documents if doc['metadata']['sentiment'] == 'positive')['content']
+
+    assert "Customer Reviews for Chianti Classico (Vintage: 2018)" in content
+    assert "Overall: 2 reviews, average rating 3.5/5 stars" in content
+    assert "5 stars: 1, 2 stars: 1" in content
+    assert "- Sam: 5/5 - Beautiful cherry fruit" in content
+    assert "Too oaky" not in content
+    assert "- Price: $24.50" in content
+    print("✅ Summary contents correct")
+
+
+def test_representative_quotes():
+    """Quotes are capped, skip empty comments and near-duplicates"""
+    reviews = [
+        review("r1", "w1", 5, "Silky tannins and cherry fruit"),
+        review("r2", "w1", 5, "Silky tannins and cherry fruit!"),
+        review("r3", "w1", 4, "Cherry fruit, great value"),
+        review("r4", "w1", 4, ""),
+        review("r5", "w1", 5, "Perfect with steak"),
+    ]
+    quotes = select_representative_reviews(reviews, max_quotes=3)
+    comments = [r['comment'] for r in quotes]
+    assert len(quotes) == 3 and "" not in comments
+    assert not {"Silky tannins and cherry fruit", "Silky tannins and cherry fruit!"} <= set(comments)
+    print("✅ Representative quotes selected")
+
+
+def test_edge_cases():
+    """No reviews, missing comments and unknown region or vintage"""
+    assert summarize_reviews([]) == []
+    assert select_representative_reviews([]) == []
+
+    documents = summarize_reviews([review("r1", "w1", 1, None, vintage=None, region=None, country=None)])
+    assert len(documents) == 1
+    content = documents[0]['content']
+    assert "Vintage: Not specified" in content and "- Region: Unknown" in content
+    assert documents[0]['metadata']['review_count'] == 1
+    print("✅ Edge cases handled")
+
+
+def main():
+    print("🧪 Testing Review Summariser...")
+    print("=" * 50)
+
+    tests = [
+        ("Grouping", test_grouping),
+        ("Document Contents", test_document_contents),
+        ("Representative Quotes", test_representative_quotes),
+        ("Edge Cases", test_edge_cases),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
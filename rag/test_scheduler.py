@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test script for the generation scheduler
+Runs offline with the hash embedding backend and a fake LLM
+"""
+
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from llm_scripts.scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, GenerationScheduler, SchedulerBusy
+
+
+def test_bounded_concurrency():
+    """No more than max_concurrency generations run at once"""
+    scheduler = GenerationScheduler(max_concurrency=2, max_queue=10, queue_timeout=5)
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def generate(_):
+        with scheduler.slot():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(generate, range(6)))
+    stats = scheduler.stats()
+    assert peak[0] == 2 and stats['running'] == 0 and stats['queue_depth'] == 0
+    assert stats['admitted']['interactive'] == 6 and stats['max_wait_ms']['interactive'] > 0
+    print("✅ Concurrency bounded")
+
+
+def test_priority_order():
+    """Interactive requests are admitted before earlier background ones"""
+    scheduler = GenerationScheduler(max_concurrency=1, max_queue=10, queue_timeout=5)
+    order = []
+
+    def generate(name, priority):
+        with scheduler.slot(priority):
+            order.append(name)
+
+    scheduler.acquire()
+    threads = [threading.Thread(target=generate, args=("background", PRIORITY_BACKGROUND))]
+    threads[0].start()
+    while scheduler.stats()['queue_depth'] < 1:
+        time.sleep(0.005)
+    threads.append(threading.Thread(target=generate, args=("interactive", PRIORITY_INTERACTIVE)))
+    threads[1].start()
+    while scheduler.stats()['queue_depth'] < 2:
+        time.sleep(0.005)
+    scheduler.release()
+    for thread in threads:
+        thread.join()
+    assert order == ["interactive", "background"]
+    print("✅ Interactive requests served first")
+
+
+def test_shedding():
+    """Requests past their deadline or beyond the queue are shed quickly"""
+    scheduler = GenerationScheduler(max_concurrency=1, max_queue=1, queue_timeout=5)
+    scheduler.acquire()
+
+    start = time.monotonic()
+    try:
+        scheduler.acquire(deadline=time.monotonic() + 0.05)
+        assert False, "expected SchedulerBusy"
+    except SchedulerBusy as e:
+        assert e.reason == 'deadline'
+    assert time.monotonic() - start < 1
+
+    waiter = threading.Thread(target=scheduler.acquire)
+    waiter.start()
+    while scheduler.stats()['queue_depth'] < 1:
+        time.sleep(0.005)
+    try:
+        scheduler.acquire()
+        assert False, "expected SchedulerBusy"
+    except SchedulerBusy as e:
+        assert e.reason == 'queue_full' and e.retry_after >= 1
+    scheduler.release()
+    waiter.join()
+    scheduler.release()
+    assert scheduler.stats()['running'] == 0
+    assert scheduler.stats()['shed'] == {'deadline': 1, 'queue_full': 1}
+    print("✅ Overload shed")
+
+
+def test_rag_busy_answer():
+    """WineRAGSystem answers busy when generation cannot start in time"""
+    from langchain_core.language_models.fake import FakeListLLM
+    from llm_scripts.conversation import ConversationSession
+    from llm_scripts.embeddings import HashEmbeddingBackend
+    from llm_scripts.rag_system import BUSY_MESSAGE, WineRAGSystem
+
+    db_path = tempfile.mkdtemp()
+    try:
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=64), llm_concurrency=1)
+        rag.llm = FakeListLLM(responses=["Returns are accepted within 30 days."])
+        rag.create_embeddings_and_store(rag.chunk_documents([
+            {'id': 'faq', 'content': "Returns are accepted within 30 days.", 'metadata': {'type': 'faq'}},
+        ]))
+
+        session = ConversationSession("c1")
+        rag.scheduler.acquire()
+        result = rag.query("What is your return policy?", session=session, deadline=time.monotonic() + 0.05)
+        assert result['answer_path'] == 'busy' and result['response'] == BUSY_MESSAGE and result['retry_after'] >= 1
+        assert session.turns == []
+        rag.scheduler.release()
+
+        result = rag.query("What is your return policy?", session=session)
+        assert result['answer_path'] == 'llm' and len(session.turns) == 1
+        assert rag.warm_up()
+        assert rag.scheduler.stats()['admitted'] == {'interactive': 2, 'background': 1}
+        rag.client.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+    print("✅ RAG sheds generations with a busy answer")
+
+
+def main():
+    print("🧪 Testing Generation Scheduler...")
+    print("=" * 50)
+
+    tests = [
+        ("Bounded Concurrency", test_bounded_concurrency),
+        ("Priority Order", test_priority_order),
+        ("Shedding", test_shedding),
+        ("RAG Busy Answer", test_rag_busy_answer),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test script for per-request tracing
+Runs offline with the hash embedding backend and a fake LLM
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Add current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.append(str(current_dir))
+
+from llm_scripts import metrics, tracing
+from llm_scripts.tracing import FileSpanExporter
+
+
+def test_trace_spans():
+    """Timed stages become nested spans of the current trace"""
+    assert tracing.current_trace() is None
+    with tracing.start_trace('request', user="test") as trace:
+        with metrics.timed('search'):
+            with metrics.timed('embed'):
+                pass
+            tracing.set_attributes(candidates=12)
+        start = trace.now_ns()
+        tracing.add_span('llm_prefill', start, start + 5_000_000, tokens=40)
+    assert tracing.current_trace() is None
+
+    spans = {span['name']: span for span in trace.to_dict()['spans']}
+    assert set(spans) == {'request', 'search', 'embed', 'llm_prefill'}
+    assert spans['search']['parent_id'] == spans['request']['span_id']
+    assert spans['embed']['parent_id'] == spans['search']['span_id']
+    assert spans['llm_prefill']['parent_id'] == spans['request']['span_id']
+    assert spans['search']['attributes'] == {'candidates': 12}
+    assert spans['llm_prefill']['duration_ms'] == 5.0
+    assert spans['request']['duration_ms'] >= spans['search']['duration_ms']
+
+    # Outside a trace the attribute helpers do nothing
+    tracing.set_attributes(ignored=True)
+    tracing.add_span('ignored', 0, 1)
+    print("✅ Spans nested under the trace")
+
+
+def test_otlp_export():
+    """Traces are appended to the file as OTLP JSON lines"""
+    with tracing.start_trace('request', question="red wine?", limit=3, cached=False) as trace:
+        with metrics.timed('embed'):
+            tracing.set_attributes(score=0.5)
+
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "traces.jsonl")
+        exporter = FileSpanExporter(path, service_name="test-service")
+        exporter.export(trace)
+        exporter.export(trace)
+        with open(path) as f:
+            lines = [json.loads(line) for line in f]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    assert len(lines) == 2
+    resource_spans = lines[0]['resourceSpans'][0]
+    assert resource_spans['resource']['attributes'] == [{'key': 'service.name', 'value': {'stringValue': 'test-service'}}]
+    spans = resource_spans['scopeSpans'][0]['spans']
+    root, embed = spans
+    assert root['traceId'] == embed['traceId'] == trace.trace_id and len(root['traceId']) == 32
+    assert root['parentSpanId'] == "" and embed['parentSpanId'] == root['spanId'] and len(root['spanId']) == 16
+    assert int(root['endTimeUnixNano']) >= int(embed['endTimeUnixNano']) >= int(embed['startTimeUnixNano'])
+    assert {'key': 'limit', 'value': {'intValue': '3'}} in root['attributes']
+    assert {'key': 'cached', 'value': {'boolValue': False}} in root['attributes']
+    assert embed['attributes'] == [{'key': 'score', 'value': {'doubleValue': 0.5}}]
+    print("✅ Traces exported as OTLP JSON")
+
+
+def test_rag_query_trace():
+    """A traced question reports its pipeline stages and is exported"""
+    from langchain_core.language_models.fake import FakeListLLM
+    from llm_scripts.embeddings import HashEmbeddingBackend
+    from llm_scripts.rag_system import WineRAGSystem
+
+    db_path = tempfile.mkdtemp()
+    trace_file = os.path.join(db_path, "traces.jsonl")
+    try:
+        rag = WineRAGSystem(db_path=db_path, embedding_backend=HashEmbeddingBackend(dimension=64),
+                            reranker="features", trace_file=trace_file)
+        rag.llm = FakeListLLM(responses=["Returns are accepted within 30 days."])
+        rag.create_embeddings_and_store(rag.chunk_documents([
+            {'id': 'faq', 'content': "Returns are accepted within 30 days.", 'metadata': {'type': 'faq'}},
+        ]))
+
+        result = rag.query("What is your return policy?", trace=True)
+        untraced = rag.query("Do you ship abroad?")
+        with open(trace_file) as f:
+            exported = [json.loads(line) for line in f]
+        rag.client.close()
+    finally:
+        shutil.rmtree(db_path, ignore_errors=True)
+
+    spans = {span['name']: span for span in result['trace']['spans']}
+    for stage in ('rag.query', 'search', 'embed', 'vector_search', 'diversify', 'rerank', 'prompt_build',
+                  'llm_queue', 'llm_generation'):
+        assert stage in spans, stage
+    assert spans['vector_search']['attributes']['candidates'] == 1
+    assert spans['prompt_build']['attributes']['prompt_tokens'] > 0
+    assert spans['llm_generation']['attributes']['model'] == rag.model_name
+    assert spans['rag.query']['attributes']['answer_path'] == 'llm'
+    assert 'trace' not in untraced
+    # The exporter records every query, asked for or not
+    assert len(exported) == 2
+    assert exported[0]['resourceSpans'][0]['scopeSpans'][0]['spans'][0]['traceId'] == result['trace']['trace_id']
+    print("✅ RAG query traced")
+
+
+def main():
+    print("🧪 Testing Tracing...")
+    print("=" * 50)
+
+    tests = [
+        ("Trace Spans", test_trace_spans),
+        ("OTLP Export", test_otlp_export),
+        ("RAG Query Trace", test_rag_query_trace),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n🔍 Testing {test_name}...")
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test_name} failed: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+
+
+if __name__ == "__main__":
+    main()